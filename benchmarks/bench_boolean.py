@@ -0,0 +1,102 @@
+## yapCAD Boolean intersection benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Measure bounding-box pre-rejection on the sparse Boolean shapes of
+example12.  The outline pairs intersected while the example12 shapes
+are built are collected, and then intersected again with intersectXY(),
+counting the calls to the analytic line and arc intersection solvers.
+For comparison, every element pair of each outline pair is also passed
+to the solvers directly, with no rejection.
+"""
+
+import os
+import sys
+import random
+import timeit
+import yapcad.geom as geom
+from yapcad.geom import *
+from yapcad.combine import *
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import examples.example12 as example12
+
+solvers = ('lineLineIntersectXY','lineArcIntersectXY','arcArcIntersectXY')
+calls = [0]
+
+def count(f):
+    def wrapper(*args,**kwargs):
+        calls[0] += 1
+        return f(*args,**kwargs)
+    return wrapper
+
+def workload(seed=0):
+    pairs = []
+    combine = Boolean.combine_geom
+    def collect(self,g1,g2):
+        pairs.append((g1.geom(),g2.geom()))
+        return combine(self,g1,g2)
+    Boolean.combine_geom = collect
+    try:
+        random.seed(seed)
+        example12.docGeomList.clear()
+        with open(os.devnull,'w') as f:
+            stdout = sys.stdout
+            sys.stdout = f
+            try:
+                example12.geometry()
+            finally:
+                sys.stdout = stdout
+    finally:
+        Boolean.combine_geom = combine
+    return pairs
+
+def pruned(pairs):
+    with unchecked():
+        for g1,g2 in pairs:
+            intersectXY(g1,g2,params=True)
+
+def bruteforce(pairs):
+    with unchecked():
+        for g1,g2 in pairs:
+            for e1 in g1:
+                for e2 in g2:
+                    intersectSimpleXY(e1,e2,params=True)
+
+if __name__ == "__main__":
+    print("bench_boolean.py -- yapCAD Boolean intersection benchmark")
+    pairs = workload()
+    npairs = sum(len(g1)*len(g2) for g1,g2 in pairs)
+    for name in solvers:
+        setattr(geom,name,count(getattr(geom,name)))
+    for name,f in (('intersectXY',pruned),('all element pairs',bruteforce)):
+        calls[0] = 0
+        f(pairs)
+        n = calls[0]
+        t = timeit.timeit(lambda: f(pairs),number=3)/3
+        print("{:>18}: {:3d} outline pairs, {:6d} element pairs, {:6d} solver calls, {:8.1f} ms".format(
+            name,len(pairs),npairs,n,t*1000.0))
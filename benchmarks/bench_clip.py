@@ -0,0 +1,77 @@
+## yapCAD clipping kernel benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Time cutting n rectangular notches into the edges of a rectangular
+panel, the kind of straight-edged Boolean work that boxcut does.  The
+panel is cut one notch at a time by a chain of two-operand Booleans,
+and each step is timed both with Boolean.combine_geom() and with the
+clipXY() integer-grid clipper on the same operands.  The panel is
+also cut by a single N-ary Boolean, which passes all notches to the
+clipper at once.
+"""
+
+import timeit
+from yapcad.geom import *
+from yapcad.poly import *
+from yapcad.combine import *
+from yapcad.clip import clipXY
+
+def notches(n):
+    k = n//4
+    w = 20.0/(2*k+1)
+    r = []
+    for i in range(k):
+        x = -10.0 + w*(2*i+1.5)
+        r.append(makeRect(w,2.0,point(x,10.0)))
+        r.append(makeRect(w,2.0,point(x,-10.0)))
+        r.append(makeRect(2.0,w,point(10.0,x)))
+        r.append(makeRect(2.0,w,point(-10.0,x)))
+    return r
+
+if __name__ == "__main__":
+    print("bench_clip.py -- yapCAD clipping kernel benchmark")
+    for n in (8,40,200):
+        ops = notches(n)
+        face = makeRect(20.0,20.0)
+        t1 = 0.0
+        t2 = 0.0
+        with unchecked():
+            for p in ops:
+                b = Boolean('difference',[face,p])
+                t1 += timeit.timeit(lambda: b.combine_geom(face,p),number=1)
+                t2 += timeit.timeit(
+                    lambda: clipXY([face.geom(copy=False),p.geom(copy=False)],
+                                   'difference'),number=1)
+                b.geom(copy=False)
+                face = b
+            clearBooleanCache()
+            t3 = timeit.timeit(
+                lambda: Boolean('difference',[makeRect(20.0,20.0)]+ops).geom(),
+                number=1)
+        print("{:4d} notches: chained combine_geom {:9.1f} ms, chained clipXY {:8.1f} ms, N-ary {:8.1f} ms".format(
+            n,t1*1000.0,t2*1000.0,t3*1000.0))
@@ -0,0 +1,71 @@
+## yapCAD geometry copying benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare the structure-aware yapcad.geom.deepcopy() against the
+generic copy.deepcopy() on the outlines of large Polygon instances:
+a many-vertex point polygon, and a polygon with many rounded
+(circle) corners that produces a mixed line and arc outline.
+"""
+
+import copy
+import timeit
+from yapcad.geom import *
+from yapcad.poly import *
+
+## star-shaped polygon, alternating between radius r and r/2 so that
+## adjacent edges are never close to parallel
+def pointPolygon(n,r=10000.0):
+    poly = Polygon()
+    for i in range(n):
+        ang = pi2*i/n
+        rr = r if i % 2 == 0 else r/2.0
+        poly.addPoint(point(rr*cos(ang),rr*sin(ang)))
+    return poly
+
+def roundPolygon(n,r=1000.0):
+    poly = Polygon()
+    for i in range(n):
+        ang = pi2*i/n
+        poly.addArc(arc(point(r*cos(ang),r*sin(ang)),1.0))
+    return poly
+
+def bench(name,gl,number=10):
+    t1 = timeit.timeit(lambda: copy.deepcopy(gl),number=number)/number
+    t2 = timeit.timeit(lambda: deepcopy(gl),number=number)/number
+    print("{:>32}: {:6d} elements, copy.deepcopy {:8.2f} ms, geom.deepcopy {:8.2f} ms, speedup {:5.1f}x".format(
+        name,len(gl),t1*1000.0,t2*1000.0,t1/t2))
+
+if __name__ == "__main__":
+    print("bench_copy.py -- yapCAD geometry copy benchmark")
+    for n in (1000,10000):
+        bench("point Polygon outline, n={}".format(n),
+              pointPolygon(n).geom())
+    for n in (250,1000):
+        bench("rounded Polygon outline, n={}".format(n),
+              roundPolygon(n).geom())
+    ply = [ point(i,i*0.5) for i in range(100000) ]
+    bench("100k point poly",ply)
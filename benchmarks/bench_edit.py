@@ -0,0 +1,67 @@
+## yapCAD polygon editing benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Time moving one vertex of a Polygon and querying it again, as an
+interactive editor or an optimization loop would.  Every other
+element is a small circle, so that the outline is made of
+circle-tangent lines and arcs.  A full rebuild constructs the whole
+outline again, while an edit made with setPoint() only rebuilds the
+outline next to the vertex that moved.
+"""
+
+import timeit
+from math import *
+from yapcad.geom import *
+from yapcad.poly import Polygon
+
+## a star-shaped ring of n elements, with circles on the outer points
+def ring(n):
+    elems = []
+    for i in range(n):
+        r = 50.0 if i % 2 else 52.0
+        p = point(r*cos(pi2*i/n),r*sin(pi2*i/n))
+        elems.append(arc(p,0.1) if i % 2 == 0 else p)
+    return Polygon(elems)
+
+if __name__ == "__main__":
+    print("bench_edit.py -- yapCAD polygon editing benchmark")
+    for n in (100,1000,4000):
+        a = ring(n)
+        a.geom(copy=False)
+        k = (n//8) | 1   # a point, not a circle
+        def nudge():
+            p = a._elem[k]
+            a.setPoint(k,point(p[0]+0.001,p[1]))
+            a.geom(copy=False)
+        def rebuild():
+            a._update = True
+            a.geom(copy=False)
+        t1 = timeit.timeit(rebuild,number=3)/3
+        t2 = timeit.timeit(nudge,number=20)/20
+        print("{:5d} elements: full rebuild {:8.2f} ms, setPoint {:6.2f} ms".format(
+            n,t1*1000.0,t2*1000.0))
@@ -0,0 +1,67 @@
+## yapCAD batched inside-testing benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare per-point isinsideXY() against the batched isinside_many() on
+the example10 workload: 2,000 random points tested against 20 arcs,
+20 circles, and 20 random polygons.
+"""
+
+import os
+import sys
+import random
+import timeit
+import numpy as np
+from yapcad.geom import *
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','examples'))
+import example10
+
+def workload(seed=0,numpoints=2000):
+    random.seed(seed)
+    bbox = line([-60,-60,0,1],[60,60,0,1])
+    tps = example10.randomPoints(bbox,numpoints)
+    glist = example10.randomGeometry(bbox,20,20,20)
+    return tps,glist
+
+def single(tps,glist):
+    return np.array([[isinsideXY(g,p) for p in tps] for g in glist])
+
+def batched(tps,glist):
+    pa = PointArray(tps)
+    return np.array([isinside_many(g,pa) for g in glist])
+
+if __name__ == "__main__":
+    print("bench_inside.py -- yapCAD inside testing benchmark")
+    for numpoints in (2000,20000):
+        tps,glist = workload(numpoints=numpoints)
+        number = 1 if numpoints > 2000 else 3
+        t1 = timeit.timeit(lambda: single(tps,glist),number=number)/number
+        t2 = timeit.timeit(lambda: batched(tps,glist),number=number)/number
+        agree = np.sum(single(tps,glist) == batched(tps,glist))
+        print("{:6d} points x {} shapes: isinsideXY {:8.1f} ms, isinside_many {:8.1f} ms, speedup {:6.1f}x, {} of {} agree".format(
+            numpoints,len(glist),t1*1000.0,t2*1000.0,t1/t2,agree,
+            numpoints*len(glist)))
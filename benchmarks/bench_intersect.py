@@ -0,0 +1,80 @@
+## yapCAD intersection benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Time intersectXY() on pairs of large outlines, two wavy closed curves
+of n line segments each, as geometry lists and as polys, and with the
+sweepIntersectXY() engine.  The spatial index means that only segments with overlapping bounding boxes are
+tested; for the smaller sizes the result is checked against a
+brute-force test of every segment pair.
+"""
+
+import timeit
+from math import *
+from yapcad.geom import *
+
+def outline(n,r=1000.0,wobble=50.0,lobes=7,phase=0.0,dx=0.0):
+    pnts = []
+    for i in range(n):
+        a = i*pi2/n
+        rr = r + wobble*sin(lobes*a+phase)
+        pnts.append(point(dx+rr*cos(a),rr*sin(a)))
+    pnts.append(pnts[0])
+    return pnts
+
+def aslines(ply):
+    return [line(ply[i-1],ply[i]) for i in range(1,len(ply))]
+
+def bruteforce(gl1,gl2):
+    count = 0
+    for l1 in gl1:
+        for l2 in gl2:
+            if intersectXY(l1,l2) != False:
+                count += 1
+    return count
+
+if __name__ == "__main__":
+    print("bench_intersect.py -- yapCAD outline intersection benchmark")
+    for n in (1000,10000):
+        p1 = outline(n)
+        p2 = outline(n,phase=1.0,dx=50.0)
+        gl1 = aslines(p1)
+        gl2 = aslines(p2)
+        with unchecked():
+            t1 = timeit.timeit(lambda: intersectXY(gl1,gl2,params=True),
+                               number=1)
+            t2 = timeit.timeit(lambda: intersectXY(p1,p2,params=True),
+                               number=1)
+            t4 = timeit.timeit(lambda: sweepIntersectXY(gl1,gl2),number=1)
+            r = intersectXY(gl1,gl2,params=True)
+            found = len(r[0]) if r else 0
+            print("{:6d} segments: geometry lists {:8.1f} ms, polys {:8.1f} ms, sweep line {:8.1f} ms, {} intersections".format(
+                n,t1*1000.0,t2*1000.0,t4*1000.0,found))
+            if n <= 1000:
+                t3 = timeit.timeit(lambda: bruteforce(gl1,gl2),number=1)
+                print("        brute force {:8.1f} ms, {} intersecting pairs".format(
+                    t3*1000.0,bruteforce(gl1,gl2)))
@@ -0,0 +1,82 @@
+## yapCAD N-ary Boolean benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Time subtracting n drill-clearance circles from a rectangular plate,
+and the union of n circles in a row that each overlap their
+neighbours.  The chained form nests n two-operand Booleans, the way
+this had to be written before Boolean took more than two operands;
+the N-ary form passes all operands to a single Boolean.
+"""
+
+import timeit
+from yapcad.geom import *
+from yapcad.poly import *
+from yapcad.combine import *
+
+def holes(n):
+    k = int(ceil(sqrt(n)))
+    return [ makeCircle(point(3.0*(i % k),3.0*(i // k)),1.0)
+             for i in range(n) ]
+
+def row(n):
+    return [ makeCircle(point(1.5*i,0.0),1.0) for i in range(n) ]
+
+def plate(n):
+    k = int(ceil(sqrt(n)))
+    return makeRect(3.0*k+2.0,3.0*k+2.0,point(1.5*(k-1),1.5*(k-1)))
+
+def chained(tpe,ops):
+    b = ops[0]
+    for p in ops[1:]:
+        b = Boolean(tpe,[b,p])
+        b.geom(copy=False)
+    return b.geom()
+
+def nary(tpe,ops):
+    return Boolean(tpe,ops).geom()
+
+if __name__ == "__main__":
+    print("bench_nary.py -- yapCAD N-ary Boolean benchmark")
+    for n in (10,30,100,500):
+        ops = [plate(n)] + holes(n)
+        with unchecked():
+            if n <= 30:
+                t1 = timeit.timeit(lambda: chained('difference',ops),number=1)
+                c = "{:9.1f} ms".format(t1*1000.0)
+            else:
+                c = "      n/a   "
+            t2 = timeit.timeit(lambda: nary('difference',ops),number=1)
+        print("{:4d} holes:     chained {}, N-ary {:8.1f} ms".format(
+            n,c,t2*1000.0))
+    for n in (10,30,100):
+        ops = row(n)
+        with unchecked():
+            t1 = timeit.timeit(lambda: chained('union',ops),number=1)
+            t2 = timeit.timeit(lambda: nary('union',ops),number=1)
+        print("{:4d} in a row:  chained {:9.1f} ms, N-ary {:8.1f} ms".format(
+            n,t1*1000.0,t2*1000.0))
@@ -0,0 +1,60 @@
+## yapCAD offset benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Time growing closed outlines of n line segments by a fixed distance.
+The circle-tangent construction puts a circle of the offset radius on
+every vertex and builds the outline of the resulting Polygon, which is
+how Polygon.grow() used to work; offsetXY() offsets the elements
+directly and trims the result where it crosses itself.  Shrinking is
+only supported by offsetXY().
+"""
+
+import timeit
+from yapcad.geom import *
+from yapcad.poly import *
+from yapcad.offset import offsetXY
+from bench_intersect import outline
+
+def circlegrow(ply,r):
+    return Polygon([arc(p,r) for p in ply[:-1]]).geom()
+
+if __name__ == "__main__":
+    print("bench_offset.py -- yapCAD outline offset benchmark")
+    for n in (100,1000,10000):
+        ply = outline(n)
+        with unchecked():
+            if n <= 1000:
+                t1 = timeit.timeit(lambda: circlegrow(ply,5.0),number=1)
+                c = "{:8.1f} ms".format(t1*1000.0)
+            else:
+                c = "     n/a   "
+            t2 = timeit.timeit(lambda: offsetXY(ply,5.0),number=1)
+            t3 = timeit.timeit(lambda: offsetXY(ply,-5.0),number=1)
+            n2 = sum(map(len,offsetXY(ply,5.0)))
+        print("{:6d} segments: circle construction {}, offsetXY grow {:8.1f} ms, shrink {:8.1f} ms, {} elements".format(
+            n,c,t2*1000.0,t3*1000.0,n2))
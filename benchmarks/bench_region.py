@@ -0,0 +1,76 @@
+## yapCAD region nesting benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Time finding which loops of a perforated plate are holes of which.
+The pairwise method tests a point of every loop against every other
+loop with windingnumberXY(), as offsetXY() used to; yapcad.region
+places the loops largest first and only tests the loops that a
+BoxIndex reports as enclosing candidates.
+"""
+
+import timeit
+from yapcad.geom import *
+from yapcad.offset import _elements, _loops, _sample
+from yapcad.region import Region
+
+## a square plate with an n by n grid of square holes, each of which
+## holds a round island
+def plate(n):
+    x = [ [point(0,0),point(4*n,0),point(4*n,4*n),point(0,4*n),
+           point(0,0)] ]
+    for i in range(n):
+        for j in range(n):
+            cx = 4*i+2
+            cy = 4*j+2
+            x.append([point(cx-1,cy-1),point(cx+1,cy-1),point(cx+1,cy+1),
+                      point(cx-1,cy+1),point(cx-1,cy-1)])
+            x.append(arc(point(cx,cy),0.5))
+    return x
+
+def pairwise(x):
+    loops = _loops(_elements(x,[]))
+    depth = []
+    for i in range(len(loops)):
+        p = _sample(loops[i][0],0.5)
+        depth.append(sum(1 for j in range(len(loops))
+                         if j != i and windingnumberXY(loops[j],p) != 0))
+    return depth
+
+if __name__ == "__main__":
+    print("bench_region.py -- yapCAD region nesting benchmark")
+    for n in (5,10,20,40):
+        x = plate(n)
+        if n <= 20:
+            t1 = timeit.timeit(lambda: pairwise(x),number=1)
+            c = "{:8.1f} ms".format(t1*1000.0)
+            assert pairwise(x) == Region(x).depth
+        else:
+            c = "     n/a   "
+        t2 = timeit.timeit(lambda: Region(x),number=1)
+        print("{:5d} loops: pairwise {}, Region {:8.1f} ms".format(
+            2*n*n+1,c,t2*1000.0))
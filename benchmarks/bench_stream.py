@@ -0,0 +1,77 @@
+## yapCAD polyline streaming benchmark
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Stream points into a Polyline, asking for its length and a sample
+point every 100 points, as a plotter or a data logger would.  Report
+the time taken, and the peak memory traced by tracemalloc in a
+second, slower run.  Appends only extend the segments, lengths and
+arc-length index, so the work and memory per point stay constant.
+For comparison, the smallest run is repeated with a full rebuild
+forced before every query.
+"""
+
+import time
+import tracemalloc
+from math import *
+from yapcad.geom import *
+from yapcad.poly import Polyline
+
+def stream(n,rebuild=False,every=100):
+    a = Polyline()
+    for i in range(n):
+        t = i*0.001
+        a.addPoint(point(t,sin(t)))
+        if i % every == every-1:
+            if rebuild:
+                a._update = True
+                a._appendonly = None
+            a.getLength()
+            a.sample(0.5)
+    return a
+
+if __name__ == "__main__":
+    print("bench_stream.py -- yapCAD polyline streaming benchmark")
+    for n in (10000,100000,1000000):
+        t0 = time.perf_counter()
+        a = stream(n)
+        t1 = time.perf_counter()-t0
+        length = a.getLength()
+        del a
+        if n <= 10000:
+            t0 = time.perf_counter()
+            stream(n,rebuild=True)
+            c = "{:7.2f} s".format(time.perf_counter()-t0)
+        else:
+            c = "    n/a  "
+        tracemalloc.start()
+        a = stream(n)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del a
+        print("{:8d} points: appending {:6.2f} s, rebuilding {}, peak {:6.1f} MB ({:3.0f} bytes/point), length {:.3f}".format(
+            n,t1,c,peak/2**20,peak/n,length))
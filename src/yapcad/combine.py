@@ -1,36 +1,87 @@
 ## yapCAD boolen operation support
 
+from collections import OrderedDict
+import hashlib
 from yapcad.geom import *
 from yapcad.poly import *
-
-combineDebugGL=[]
+from yapcad.geom import _xybox, _xyoverlap
+from yapcad.spatial import BoxIndex
+from yapcad.clip import clipXY, clipGrid
+from yapcad.region import Region
+from yapcad.offset import _xydist, _jointol, _reverseloop, _chain
+
+## Combined outlines are cached, keyed by the type and offset of the
+## Boolean and content hashes of the outlines of its operands, so that
+## Booleans built from identical operands (as happens when a
+## parametric design is evaluated over and over) share one outline.
+## The cache holds the outlines of the booleanCacheSize most recently
+## used combinations; setting it to 0 turns caching off.
+
+booleanCacheSize = 128
+_resultcache = OrderedDict()
+
+def clearBooleanCache():
+    """empty the cache of combined Boolean outlines"""
+    _resultcache.clear()
+
+def _contenthash(gl):
+    return hashlib.sha1(repr(gl).encode()).hexdigest()
+
+## Booleans whose operands are made of lines only are combined with
+## the integer-grid clipper in yapcad.clip, which is faster and more
+## robust for them than combine_geom().  Operands with arcs are
+## combined by combine_geom(), unless the Boolean is given a chord
+## tolerance to flatten the arcs with, in which case the clipper is
+## used for them as well.  combine_geom() has no 'xor', so the 'xor'
+## of operands with arcs is computed loop by loop by _combine_loops().
 
 class Boolean(IntersectGeometry):
     """Boolean operations on Polygons"""
 
-    types = ('union','intersection','difference')
+    types = ('union','intersection','difference','xor')
     
-    def __init__(self,type='union',polys=[]):
+    def __init__(self,type='union',polys=[],grid=clipGrid,flatten=None):
+        if not type in self.types:
+            raise ValueError('invalid type passed to Boolean(): {}'.format(type))
         for p in polys:
             if not ( isinstance(p,Polygon) or isinstance(p,Boolean) ):
                 raise ValueError('non-poly or non-boolean passed to Boolean(): {}'.format(p))
-            if not type in self.types:
-                raise ValueError('invalid type passed to Boolean(): {}'.format(tpe))
-            self._elem=list(polys)
-            self._type=type
-            self._update=True
-            self._outline=[]
-
+        self._elem=list(polys)
+        self._type=type
+        self._update=True
+        self._outline=[]
+        self._path=None
+        self._offset=0.0
+        self._grid=grid
+        self._flatten=flatten
+        self.diagnostics=[]
+
+
+    ## Record a diagnostic about the last combination: a dict with a
+    ## 'kind' key naming the condition and further keys describing it.
+    ## Diagnostics are collected in self.diagnostics, which is cleared
+    ## each time the outline is recomputed.
+    def _diagnose(self,kind,**info):
+        info['kind'] = kind
+        self.diagnostics.append(info)
 
     def combine_geom(self,g1,g2):
+        ## combination segment by segment only works for operands
+        ## that are single loops
+        nl1 = len(Region(g1))
+        nl2 = len(Region(g2))
+        if nl1 > 1 or nl2 > 1:
+            self._diagnose('several loops',loops=(nl1,nl2))
+            return self._combine_loops(g1,g2)
         bbox1 = g1.bbox()
         bbox2 = g2.bbox()
         try :
-            inter = intersectXY(g1.geom(),g2.geom(),params=True)
+            with unchecked():
+                inter = intersectXY(g1.geom(copy=False),g2.geom(copy=False),
+                                    params=True)
         except ValueError:
-            print("had a problem intersecting following geometries:")
-            print("g1.geom(): ",g1.geom())
-            print("g2.geom(): ",g2.geom())
+            self._diagnose('intersection failed',
+                           g1=g1.geom(),g2=g2.geom())
             raise
 
         if inter != False and (inter[0] == False or inter[1] == False):
@@ -47,155 +98,88 @@ class Boolean(IntersectGeometry):
         # corresponding arc.  If neither x1 nor x2 exists, we bias
         # towards the counter-clockwise arc.
 
-        def between(u1,u2,ilist):
+        def between(i,u1,u2,ilist):
             if len(ilist) < 2:
                 raise ValueError('bad ilist')
-            
+            if len(ilist) == 2:
+                if u1 > u2:
+                    return u1,u2+1.0
+                return u1,u2
+
             if u1 > u2 :
-                if len(ilist) == 2:
-                    return u1,u2+1.0,False
                 x1s = list(filter(lambda x: x > u2 and x < u1,ilist))
                 x2s = list(filter(lambda x: x > u1 or x < u2,ilist))
-                l1 = len(x1s)
-                l2 = len(x2s)
-                #print("u1: ",u1," u2: ",u2," ilist: ",ilist," x1s: ",x1s," x2s: ",x2s)
-                if l1 > 0 and l2 > 0:
-                    print('WARNING: intersections on both sides')
-                elif l1 > l2:
-                    print("AA")
-                    if True or self._type == 'union':
-                        return u1,u2+1.0,False
-                    else:
-                        return u2,u1,True
-                else:
-                    print("A-")
-                    return u2,u1,True
-
             else:
-                if len(ilist) == 2:
-                    return u1,u2,False
                 x1s = list(filter(lambda x: x > u1 and x < u2,ilist))
                 x2s = list(filter(lambda x: x > u2 or x < u1,ilist))
-                l1 = len(x1s)
-                l2 = len(x2s)
-                #print("u1: ",u1," u2: ",u2," ilist: ",ilist," x1s: ",x1s," x2s: ",x2s)
-                if l1 > 0 and l2 > 0:
-                    print('WARNING: intersections on both sides')
-                elif l1 > l2:
-                    print("BB")
-
-                    if True or self._type == 'union':
-                        return u2,u1+1,False
-                    else:
-                        return u1,u2,False
-                else:
-                    print("B-")
-                    return u1,u2,False
-            
-
-        ## utility to perform combination on one "segment"
-        def cmbin(g1,g2,itr):
-            g1s = itr[0][0]
-            g1e = itr[0][1]
-            g2s = itr[1][0]
-            g2e = itr[1][1]
-
-            seg = []
-            ZLEN1=close(g1s,g1e)
-            ZLEN2=close(g2s,g2e)
-
-            g1reverse=False
-            g2reverse=False
-            
-            if True or self._type == 'difference':
-                if g1e < g1s:
-                    g1e+=1.0
-                #g1s,g1e,g1reverse = between(g1s,g1e,inter[0])
-                g2s,g2e,g2reverse = between(g2s,g2e,inter[1])
-                g2reverse = False
-            else:
-                if g1e < g1s:
-                    g1e+=1.0
-                if g2e < g2s:
-                    g2e += 1.0
-
-            p1=g1.sample(((g1s+g1e)/2)%1.0)
-
-            p1inside=0
-            for i in range(5):
-                u = (i+1)/6.0
-                p = g1.sample((u*g1e+(1.0-u)*g1s)%1.0)
-                if g2.isinside(p):
-                    p1inside=p1inside+1
-
-            p2inside = 0
-            for i in range(5):
-                u = (i+1)/6.0
-                p = g2.sample((u*g2e+(1.0-u)*g2s)%1.0)
-                if g1.isinside(p):
-                    p2inside=p2inside+1
-                
-            if p1inside > 0 and p2inside > 0:
-                print("warning: inside test succeeded for both p1s and p2s: ",
-                      p1inside," ",p2inside)
-
-            if p1inside == 0 and p2inside == 0:
-                print("warning: inside test failed for both p1s and p2s")
-                
-            p2=g2.sample(((g2s+g2e)/2)%1.0)
-
-            if ZLEN1 and ZLEN2:
-                print ('both segments zero length')
+            l1 = len(x1s)
+            l2 = len(x2s)
+            if l1 > 0 and l2 > 0:
+                self._diagnose('intersections on both sides',segment=i,
+                               u1=u1,u2=u2)
+            if l2 == 0 and l1 > 0:
+                ## the only intersections lie between u1 and u2, so
+                ## take the other way around
+                self._diagnose('between',segment=i,u1=u1,u2=u2,
+                               wrapped=True)
+                if u1 > u2:
+                    return u1,u2+1.0
+                return u2,u1+1.0
+            self._diagnose('between',segment=i,u1=u1,u2=u2,wrapped=False)
+            if u1 > u2:
+                return u2,u1
+            return u1,u2
+
+        ## utility to perform combination on one "segment", given the
+        ## parameter ranges of the segment on g1 and g2, whether they
+        ## are of zero length, and their classifications
+        def cmbin(i,g1s,g1e,g2s,g2e,zlen1,zlen2,c1,c2):
+            if zlen1 and zlen2:
+                self._diagnose('zero length',segment=i,operands=(1,2))
                 return []
-            elif ZLEN2 and not ZLEN1:
-                print ('zero length segment 2')
+            elif zlen2:
+                self._diagnose('zero length',segment=i,operands=(2,))
                 if self._type=='union':
                     return g1.segment(g1s,g1e)
-                elif self._type=='difference':
-                    return 
-                else: #intersection
+                elif self._type=='difference' and c1 != 'inside':
+                    return g1.segment(g1s,g1e)
+                else:
                     return []
-            elif ZLEN1 and not ZLEN2:
-                print ('zero length segment 1')
+            elif zlen1:
+                self._diagnose('zero length',segment=i,operands=(1,))
                 if self._type=='union':
-                    if g2e < g2s:
-                        g2e += 1.0
                     return g2.segment(g2s,g2e)
                 else: # difference or intersection
                     return []
-            
+
+            if c1 == 'inside' and c2 == 'inside':
+                self._diagnose('both inside',segment=i)
+            elif c1 != 'inside' and c2 != 'inside':
+                self._diagnose('neither inside',segment=i,
+                               classes=(c1,c2))
+
+            ## is the piece of g1 inside g2, while the piece of g2
+            ## isn't inside g1?
+            g1inside = c1 == 'inside' and c2 != 'inside'
+
+            seg = []
             if self._type == 'union':
-                #if g2.isinside(p1):
-                if p1inside > p2inside:
-                    # if g2e < g2s:
-                    #     g2e += 1.0
+                if g1inside:
                     seg += g2.segment(g2s,g2e)
                 else:
-                    seg += g1.segment(g1s,g1e)                    
+                    seg += g1.segment(g1s,g1e)
             elif self._type == 'intersection':
-                #if g2.isinside(p1):
-                if p1inside > p2inside:
+                if g1inside:
                     seg += g1.segment(g1s,g1e)
                 else:
-                    # if g2e < g2s:
-                    #     g2e += 1.0
-                    #seg += g2.segment(g2s,g2e,reverse=g2reverse)
                     seg += g2.segment(g2s,g2e)
             elif self._type == 'difference':
                 s = []
-                #if g2.isinside(p1):
-                if p1inside > p2inside:
-                    pass
-                else:
-                    # print("rsort: ",vstr(inter))
+                if not g1inside:
                     seg += g1.segment(g1s,g1e)
-                    # print("g2s: ",g2s," g2e: ",g2e," g2reverse: ",g2reverse)
-                    s = g2.segment(g2s,g2e,reverse=g2reverse)
+                    s = g2.segment(g2s,g2e)
                     s = reverseGeomList(s)
                     seg += s
-                if len(inter[0]) > 2:
-                    combineDebugGL.append(s)
-                    # print("seg: ",vstr(seg))
 
             return seg
 
@@ -263,38 +247,238 @@ class Boolean(IntersectGeometry):
                 return []
         ## There are two or more points of intersection.
         inter = rsort(inter)
-        #print("rsort: ",vstr(inter))
+        n = len(inter[0])
+        if n % 2 != 0:
+            self._diagnose('odd intersections',count=n)
+
+        ## Split both outlines at the intersections.  Segment i runs
+        ## between intersections i-1 and i on both outlines.
+        spans = []
+        for i in range(1,n+1):
+            g1s = inter[0][i-1]
+            g1e = inter[0][i%n]
+            g2s = inter[1][i-1]
+            g2e = inter[1][i%n]
+            zlen1 = close(g1s,g1e)
+            zlen2 = close(g2s,g2e)
+            if g1e < g1s:
+                g1e += 1.0
+            g2s,g2e = between(i,g2s,g2e,inter[1])
+            spans.append((g1s,g1e,g2s,g2e,zlen1,zlen2))
+
+        ## classify each piece of each outline against the other
+        ## operand, all at once
+        c1 = _classify(g1,[(s[0],s[1]) for s in spans],g2)
+        c2 = _classify(g2,[(s[2],s[3]) for s in spans],g1)
+
+        ## Each segment keeps the piece of one outline or the other,
+        ## which can't describe a result in which both pieces or
+        ## neither of them belong, as when a union closes a ring
+        ## around a hole.
+        unpaired = [ i+1 for i in range(n) if c1[i] == c2[i] != 'on' ]
+        if unpaired:
+            self._diagnose('unpaired segments',segments=unpaired)
+            return self._combine_loops(g1,g2)
 
-        if len(inter[0]) %2 != 0:
-            print("WARNING: odd number of intersections (",len(inter[0]),", unpredictable behavior may result")
         r = []
-        for i in range(1,len(inter[0])+1):
-            r += cmbin(g1,g2,[[inter[0][i-1],
-                               inter[0][i%len(inter[0])]],
-                              [inter[1][i-1],
-                               inter[1][i%len(inter[1])]]])
+        for i in range(n):
+            r += cmbin(i+1,*spans[i],c1[i],c2[i])
         return r
 
+    ## Combine operands g1 and g2 loop by loop, for operands that
+    ## combine_geom() can't pair up segment by segment.  The loops of
+    ## each operand are split where they cross the other operand.  A
+    ## piece of the boundary of one operand is part of the result if
+    ## the result differs between the two sides of the piece, which is
+    ## decided by testing its midpoint against the other operand, or
+    ## points just to either side of it if it lies on the boundary of
+    ## the other operand.  Pieces that lie on both boundaries are
+    ## taken from g1 only.  The pieces are directed with the inside of
+    ## the result on their left and chained into loops.
+    def _combine_loops(self,g1,g2):
+        regions = [ Region(g1), Region(g2) ]
+        pieces = []
+        for k in (0,1):
+            ra = regions[k]
+            rb = regions[1-k]
+            other = rb.geom(copy=False)
+            index = BoxIndex([ _xybox(e,0.0) for e in other ])
+            for loop in ra.loops:
+                us = []
+                if other:
+                    with unchecked():
+                        uu = sweepIntersectXY(loop,other)
+                    if uu:
+                        us = sorted(set(u % 1.0 for u in uu[0]))
+                leng = length(loop)
+                ## drop cuts that would leave pieces shorter than
+                ## _jointol
+                cuts = []
+                for u in us:
+                    if not cuts or (u-cuts[-1])*leng >= _jointol:
+                        cuts.append(u)
+                if len(cuts) > 1 and (cuts[0]+1.0-cuts[-1])*leng < _jointol:
+                    cuts.pop()
+                if len(cuts) < 2:
+                    spans = [ None ]
+                else:
+                    spans = [ (cuts[i],cuts[(i+1) % len(cuts)])
+                              for i in range(len(cuts)) ]
+                for span in spans:
+                    if span is None:
+                        piece = loop
+                    else:
+                        piece = segmentgeomlist(loop,span[0],span[1],
+                                                closed=True)
+                    pp = preparedpath(piece)
+                    p = pp.sample(0.5)
+                    near = index.query([p[0]-_jointol,p[1]-_jointol,
+                                        p[0]+_jointol,p[1]+_jointol])
+                    if any(_xydist(other[i],p[0],p[1]) < _jointol
+                           for i in near):
+                        if k == 1:
+                            continue
+                        h = _jointol/pp.length
+                        t = sub(pp.sample(min(1.0,0.5+h)),
+                                pp.sample(max(0.0,0.5-h)))
+                        t = scale3(t,_jointol/mag(t))
+                        bl = rb.isinside(point(p[0]-t[1],p[1]+t[0]))
+                        br = rb.isinside(point(p[0]+t[1],p[1]-t[0]))
+                    else:
+                        bl = br = rb.isinside(p)
+                    if k == 0:
+                        left = _evaluate(self._type,iter((True,bl)))
+                        right = _evaluate(self._type,iter((False,br)))
+                    else:
+                        left = _evaluate(self._type,iter((bl,True)))
+                        right = _evaluate(self._type,iter((br,False)))
+                    if left != right:
+                        pieces.append(piece if left else
+                                      _reverseloop(piece))
+        loops = _chain(pieces)
+        if loops is None:
+            self._diagnose('open chain',pieces=len(pieces))
+            raise ValueError('pieces of Boolean {} do not chain into '
+                             'closed loops'.format(self._type))
+        if len(loops) == 1:
+            return loops[0]
+        return loops
+
+    ## Lazy queries.  Until the combined outline is needed, bbox(),
+    ## isinside(), isinside_many() and isempty() answer from the
+    ## operands where that is possible: a point is inside a union if
+    ## it is inside any operand, inside an intersection if it is inside
+    ## all of them, and so on, and the bounding box of a union is that
+    ## of its operand boxes.  Grown or shrunk Booleans, and Booleans
+    ## whose outline has already been computed, answer from the
+    ## outline.
+
+    def _lazy(self):
+        return self._update and close(self._offset,0.0)
+
     def bbox(self):
-        return bbox(self.geom())
+        if self._lazy() and self._type == 'union':
+            bbs = [ q.bbox() for q in self._elem if not _isempty(q) ]
+            if bbs:
+                return [ point(min(b[0][0] for b in bbs),
+                               min(b[0][1] for b in bbs),
+                               min(b[0][2] for b in bbs)),
+                         point(max(b[1][0] for b in bbs),
+                               max(b[1][1] for b in bbs),
+                               max(b[1][2] for b in bbs)) ]
+        return bbox(self.geom(copy=False))
+
+    ## An XY box [xmin,ymin,xmax,ymax] that contains the combined
+    ## figure, or None if the figure is known to be empty.  It is
+    ## exact once the outline is computed, and otherwise bounds it.
+    def _bound(self):
+        if not self._update:
+            if self._outline == []:
+                return None
+            return _xybox(self._outline,0.0)
+        bs = [ _bound(q) for q in self._elem ]
+        if self._type == 'intersection':
+            if None in bs or len(bs) == 0:
+                return None
+            b = [ max(x[0] for x in bs), max(x[1] for x in bs),
+                  min(x[2] for x in bs), min(x[3] for x in bs) ]
+            if b[0] > b[2] or b[1] > b[3]:
+                return None
+        elif self._type == 'difference':
+            if len(bs) == 0 or bs[0] is None:
+                return None
+            b = bs[0]
+        else:
+            bs = [ x for x in bs if x is not None ]
+            if len(bs) == 0:
+                return None
+            b = [ min(x[0] for x in bs), min(x[1] for x in bs),
+                  max(x[2] for x in bs), max(x[3] for x in bs) ]
+        if self._offset > 0.0:
+            r = self._offset
+            b = [ b[0]-r, b[1]-r, b[2]+r, b[3]+r ]
+        return b
+
+    def isempty(self):
+        """
+        Return ``True`` if the combined figure is empty.  The
+        outline is only computed if the operands don't tell.
+        """
+        if self._lazy():
+            if self._bound() is None:
+                return True
+            ops = [ q for q in self._elem if not _isempty(q) ]
+            if self._type == 'union' or \
+               (self._type == 'xor' and len(ops) == 1):
+                return False
+            if self._type == 'difference':
+                b = _bound(self._elem[0])
+                if not any(_xyoverlap(b,_bound(q)) for q in ops[1:]):
+                    return False
+        return self.geom(copy=False) == []
+
+    def region(self):
+        """
+        Return the combined outline as a ``Region``, which records
+        which of its loops are holes of which.
+        """
+        return Region(self.geom(copy=False))
 
     def getCenter(self):
-        gl = self.geom()
+        gl = self.geom(copy=False)
         if gl == []:
             raise ValueError('empty Boolean, no center')
         return center(gl)
 
     def getLength(self):
-        gl = self.geom()
+        gl = self.geom(copy=False)
         if gl == []:
             raise ValueError('empty Boolean, no length')
         return length(gl)
 
+    ## return the arc-length index for the outline, building it the
+    ## first time it is needed after the outline is recomputed
+    def _prepared(self):
+        gl = self.geom(copy=False)
+        if self._path is None:
+            self._path = PreparedPath(gl)
+        return self._path
+
     def segment(self,u1,u2,reverse=False):
-        gl = self.geom()
+        gl = self.geom(copy=False)
         if gl == []:
             raise ValueError('empty Boolean, segment not defined')
-        return segmentgeomlist(gl,u1,u2,closed=True,reverse=reverse)
+        return self._prepared().segment(u1,u2,reverse,closed=True)
+
+    ## The outline of a copy of a Boolean that has been rotated,
+    ## translated, or uniformly scaled is the transformed outline of
+    ## the original, so copies made once the original outline is known
+    ## take it over instead of combining their operands again.  A
+    ## mirror image runs the other way around, and is recombined.
+    def _reuse(self,outline):
+        self._outline = outline
+        self._path = None
+        self._update = False
 
     def mirror(self,plane,poly=False):
         b = deepcopy(self)
@@ -314,6 +498,8 @@ class Boolean(IntersectGeometry):
         for p in self._elem:
             p2 = p.rotate(angle,cent,axis,poly=True)
             b._elem.append(p2)
+        if not self._update:
+            b._reuse(rotate(self._outline,angle,cent,axis))
         if poly:
             return b
         return b.geom()
@@ -322,9 +508,16 @@ class Boolean(IntersectGeometry):
         b = deepcopy(self)
         b._elem = []
         b._update=True
+        if not close(self._offset,0.0):
+            if not (sy == False or close(sy,sx)):
+                raise NotImplementedError('non-uniform scaling of a grown or shrunk Boolean')
+            b._offset = self._offset*abs(sx)
         for p in self._elem:
             p2 = p.scale(sx,sy,sz,cent,poly=True)
             b._elem.append(p2)
+        if not self._update and sx > 0 and \
+           (sy == False or close(sy,sx)) and (sz == False or close(sz,sx)):
+            b._reuse(scale(self._outline,sx,sy,sz,cent))
         if poly:
             return b
         return b.geom()                        
@@ -336,51 +529,328 @@ class Boolean(IntersectGeometry):
         for p in self._elem:
             p2 = p.translate(delta,poly=True)
             b._elem.append(p2)
+        if not self._update:
+            b._reuse(translate(self._outline,delta))
         if poly:
             return b
         return b.geom()                        
             
     def sample(self,u):
-        gl = self.geom()
+        gl = self.geom(copy=False)
         if gl == []:
             raise ValueError('empty Boolean, sample not defined')
-        return sample(gl,u)
+        return self._prepared().sample(u)
+
+    def sample_many(self,us):
+        gl = self.geom(copy=False)
+        if gl == []:
+            raise ValueError('empty Boolean, sample not defined')
+        return sample_many(self._prepared(),us)
+
+    def unsample_many(self,pnts):
+        return unsample_many(self._prepared(),pnts)
 
     def isinside(self,p):
-        gm = self.geom()
+        if self._lazy():
+            return _evaluate(self._type,(q.isinside(p) for q in self._elem))
+        gm = self.geom(copy=False)
         if gm == []:
-            raise ValueError('empty Boolean, inside not defined')
-        bb = bbox(gm)
-        p2 = add([1,1,0,1],bb[1])
-        l = line(p,p2)
-
-        pp = intersectGeomListXY(l,gm)
-        if pp == False:
             return False
-        return len(pp) % 2 == 1
+        return windingnumberXY(gm,p) % 2 == 1
+
+    ## batched isinside(), returning a boolean array
+    def isinside_many(self,pnts):
+        if self._lazy():
+            ins = [ q.isinside_many(pnts) for q in self._elem ]
+            if len(ins) == 0:
+                return np.zeros(len(PointArray(pnts)),dtype=bool)
+            if self._type == 'union':
+                return np.logical_or.reduce(ins)
+            elif self._type == 'intersection':
+                return np.logical_and.reduce(ins)
+            elif self._type == 'difference':
+                if len(ins) == 1:
+                    return ins[0]
+                return ins[0] & ~np.logical_or.reduce(ins[1:])
+            return np.logical_xor.reduce(ins)
+        gm = self.geom(copy=False)
+        if gm == []:
+            return np.zeros(len(PointArray(pnts)),dtype=bool)
+        return isinside_many(gm,pnts)
+
+    ## Growing or shrinking the members of a Boolean doesn't in general
+    ## grow or shrink the result (think of the difference of a shape
+    ## and a slightly smaller copy of it), so the offset is applied to
+    ## the combined outline instead.
 
     def grow(self,r):
+        """
+        Offset the combined outline by ``r``, or shrink it for
+        negative ``r``.  See ``yapcad.offset.offsetXY()``.
+        """
         if close(r,0.0):
             return
-        elif r < 0:
-            raise ValueError('negative growth not allowed')
-
-        if self._type in ['union','intersection']:
-            for p in self._elem:
-                p.grow(r)
-            self._update = True
+        self._offset += r
+        self._update = True
+
+    def shrink(self,r):
+        """shrink the combined outline by ``r``, the same as ``grow(-r)``"""
+        self.grow(-r)
+
+    ## Booleans of more than two operands are reduced to trees of
+    ## two-operand Booleans.  combine_geom() is fastest for operands
+    ## whose outlines are single closed loops, and falls back to
+    ## _combine_loops() for the others, so operands are only paired
+    ## with operands they overlap, and groups of operands that don't
+    ## touch are combined separately, with their outlines
+    ## gathered at the end.  Candidate pairs come from a BoxIndex over
+    ## the operand bounding boxes, so that N disjoint operands (a
+    ## plate with N drill holes, say) are combined without computing
+    ## any outline intersections.  The diagnostics of the
+    ## intermediate Booleans are collected in those of this one.
+
+    def _combine_many(self):
+        if self._type == 'union':
+            parts = _unionparts([ p for p in self._elem
+                                  if p.geom(copy=False) != [] ],
+                                self.diagnostics)
+            return _gather(parts)
+        elif self._type == 'intersection':
+            return _intersect_many(self._elem,self.diagnostics)
         else:
-            raise NotImplementedError("Don't have grow support for {} yet".format(self._type))
-        
-
-    def geom(self):
+            return _difference_many(self._elem[0],self._elem[1:],
+                                    self.diagnostics)
+
+    ## cache key for the combined outline
+    def _cachekey(self):
+        return (self._type,self._offset,self._grid,self._flatten,
+                tuple(_contenthash(p.geom(copy=False)) for p in self._elem))
+
+    ## return the combined outline.  If copy is False, return the
+    ## cached outline itself, which must be treated as read-only, and
+    ## may be shared with other Booleans.
+    def geom(self,copy=True):
         if self._update:
-            if len(self._elem)==2:
-                self._outline = self.combine_geom(self._elem[0],self._elem[1])
-                self._outline = cullZeroLength(self._outline)
-                self._update = False
+            key = self._cachekey()
+            if key in _resultcache:
+                _resultcache.move_to_end(key)
+                self._outline,diag = _resultcache[key]
+                self.diagnostics = list(diag)
             else:
-                raise NotImplementedError("don't know how to do {} yet for {} polygons".format(self._type,len(self._elem)))
+                self._combine()
+                if booleanCacheSize > 0:
+                    _resultcache[key] = (self._outline,list(self.diagnostics))
+                    while len(_resultcache) > booleanCacheSize:
+                        _resultcache.popitem(last=False)
+            self._path = None
+            self._update = False
+        if not copy:
+            return self._outline
         return deepcopy(self._outline)
-        
-        
+
+    def _combine(self):
+        self.diagnostics = []
+        if self._flatten is not None or \
+           all(_lineonly(p.geom(copy=False)) for p in self._elem):
+            self._outline = clipXY([ p.geom(copy=False) for p in self._elem ],
+                                   self._type,self._grid,self._flatten)
+        elif self._type == 'xor':
+            if len(self._elem) == 2:
+                self._outline = self._combine_loops(self._elem[0],
+                                                    self._elem[1])
+            else:
+                self._outline = _xor_many(self._elem,self.diagnostics)
+        elif len(self._elem)==2:
+            self._outline = self.combine_geom(self._elem[0],self._elem[1])
+        else:
+            self._outline = self._combine_many()
+        self._outline = cullZeroLength(self._outline)
+        if not close(self._offset,0.0):
+            self._outline = [ e for l in offsetXY(self._outline,
+                                                  self._offset)
+                              for e in l ]
+
+## is operand q empty?
+def _isempty(q):
+    if isinstance(q,Boolean):
+        return q.isempty()
+    return q.geom(copy=False) == []
+
+## XY bounding box of operand q, or None if it is empty
+def _bound(q):
+    if isinstance(q,Boolean):
+        return q._bound()
+    g = q.geom(copy=False)
+    if g == []:
+        return None
+    return _xybox(g,0.0)
+
+## combine the inside tests of the operands, given as an iterator, for
+## a Boolean of the given type, evaluating as few of them as needed
+def _evaluate(type,flags):
+    if type == 'union':
+        return any(flags)
+    elif type == 'intersection':
+        return all(flags)
+    elif type == 'difference':
+        return next(flags,False) and not any(flags)
+    return sum(flags) % 2 == 1
+
+## is figure g made of lines only?
+def _lineonly(g):
+    for x in g:
+        if isarc(x):
+            return False
+        elif isinstance(x,list) and not (ispoint(x) or isline(x) or ispoly(x)) \
+             and not _lineonly(x):
+            return False
+    return True
+
+## Label the pieces of the outline of g between the parameter pairs
+## in spans as 'inside' or 'outside' other, or 'on' its outline,
+## from a single test of the midpoint of each piece against a
+## PreparedPolygon of other.
+def _classify(g,spans,other):
+    mids = g.sample_many([ ((us+ue)/2.0) % 1.0 for us,ue in spans ])
+    inside = PreparedPolygon(other).isinside_many(mids)
+    on = ~np.isnan(other.unsample_many(mids))
+    return [ 'on' if on[i] else 'inside' if inside[i] else 'outside'
+             for i in range(len(spans)) ]
+
+## do the outlines of a and b cross, or does one contain the other?
+def _touching(a,b):
+    with unchecked():
+        if intersectXY(a.geom(copy=False),b.geom(copy=False)):
+            return True
+    return a.isinside(b.sample(0.0)) or b.isinside(a.sample(0.0))
+
+## outline of a list of operands that don't touch each other
+def _gather(parts):
+    if len(parts) == 0:
+        return []
+    elif len(parts) == 1:
+        return parts[0].geom()
+    return [ p.geom() for p in parts ]
+
+## Union the operands in ops, and return the resulting list of parts
+## that don't touch each other.  The graph of touching operands is
+## contracted in rounds: each round pairs up as many touching
+## operands as it can and replaces each pair with their union, which
+## touches everything either of them touched.  A chain or cluster of
+## N operands takes about log2(N) rounds.  Each union is evaluated as
+## soon as it is made, so that the Boolean tree is never evaluated
+## recursively.  The diagnostics of the unions are added to diag.
+def _unionparts(ops,diag):
+    nodes = dict(enumerate(ops))
+    boxes = [ _xybox(p.geom(copy=False)) for p in ops ]
+    idx = BoxIndex(boxes)
+    adj = {}
+    for i in range(len(ops)):
+        adj[i] = set()
+        for j in idx.query(boxes[i]):
+            if j < i and _touching(ops[i],ops[j]):
+                adj[i].add(j)
+                adj[j].add(i)
+    k = len(ops)
+    while True:
+        pairs = []
+        matched = set()
+        for i in sorted(nodes):
+            if i in matched:
+                continue
+            free = [ j for j in adj[i] if not j in matched ]
+            if free:
+                j = min(free)
+                pairs.append((i,j))
+                matched.update((i,j))
+        if not pairs:
+            break
+        for i,j in pairs:
+            b = Boolean('union',[nodes.pop(i),nodes.pop(j)])
+            b.geom(copy=False)
+            diag += b.diagnostics
+            nodes[k] = b
+            adj[k] = (adj.pop(i) | adj.pop(j)) - {i,j}
+            for n in adj[k]:
+                adj[n] -= {i,j}
+                adj[n].add(k)
+            k += 1
+    return [ nodes[i] for i in sorted(nodes) ]
+
+## intersection of a list of operands, reduced pairwise as a balanced
+## tree, after checking that the bounding boxes have a common part.
+## The diagnostics of the intersections are added to diag.
+def _intersect_many(ops,diag):
+    if len(ops) == 0:
+        return []
+    boxes = []
+    for p in ops:
+        if p.geom(copy=False) == []:
+            return []
+        boxes.append(_xybox(p.geom(copy=False)))
+    if max(b[0] for b in boxes) > min(b[2] for b in boxes) or \
+       max(b[1] for b in boxes) > min(b[3] for b in boxes):
+        return []
+    while len(ops) > 1:
+        nxt = []
+        for i in range(0,len(ops)-1,2):
+            b = Boolean('intersection',ops[i:i+2])
+            b.geom(copy=False)
+            diag += b.diagnostics
+            if b.geom(copy=False) == []:
+                return []
+            nxt.append(b)
+        if len(ops) % 2 == 1:
+            nxt.append(ops[-1])
+        ops = nxt
+    return ops[0].geom()
+
+## xor of a list of operands, reduced pairwise as a balanced tree.
+## The diagnostics of the intermediate Booleans are added to diag.
+def _xor_many(ops,diag):
+    if len(ops) == 0:
+        return []
+    while len(ops) > 1:
+        nxt = []
+        for i in range(0,len(ops)-1,2):
+            b = Boolean('xor',ops[i:i+2])
+            b.geom(copy=False)
+            diag += b.diagnostics
+            nxt.append(b)
+        if len(ops) % 2 == 1:
+            nxt.append(ops[-1])
+        ops = nxt
+    return ops[0].geom()
+
+## Difference of a and the operands in subs.  The subtracted operands
+## are unioned first.  Parts of that union that cross the outline of
+## a are cut from it one at a time, parts that lie inside it become
+## holes, and parts that lie outside it are dropped.  The diagnostics
+## of the unions and differences are added to diag.
+def _difference_many(a,subs,diag):
+    if a.geom(copy=False) == []:
+        return []
+    abox = _xybox(a.geom(copy=False))
+    subs = [ p for p in subs if p.geom(copy=False) != [] and
+             _xyoverlap(abox,_xybox(p.geom(copy=False))) ]
+    apath = a._prepared()
+    cut = []
+    holes = []
+    for p in _unionparts(subs,diag):
+        g = p.geom(copy=False)
+        if apath.index().query(_xybox(g)):
+            with unchecked():
+                if intersectXY(a.geom(copy=False),g):
+                    cut.append(p)
+                    continue
+        if a.isinside(p.sample(0.0)):
+            holes.append(p)
+        elif p.isinside(a.sample(0.0)):
+            return []
+    for p in cut:
+        a = Boolean('difference',[a,p])
+        a.geom(copy=False)
+        diag += a.diagnostics
+        if a.geom(copy=False) == []:
+            return []
+    return _gather([a] + holes)
@@ -5,6 +5,7 @@
 ## See licensing terms here: https://github.com/rdevaul/yapCAD/blob/master/LICENSE
 
 from yapcad.geom import *
+from yapcad.region import Region
 
 ## Generic drawing functions -- assumed to use current coordinate
 ## transform and drawing pen (color, line weight, etc.)
@@ -31,6 +32,13 @@ class Drawable:
         print("pure virtual draw_text called: {}, {}, {}, {}".format(text,location,align,attr))
         return
 
+    ## draw a region.  The base class draws its outline; drawables
+    ## that can fill shapes override this to fill each face of the
+    ## region (see Region.faces()) when fillcolor is set.
+    def draw_region(self,r):
+        for l in r.loops:
+            self.draw(l)
+
     ## non-virtual utility drawing functions 
     def draw_circle(self,p,r):
         self.draw_arc(p,r,0.0,360.0)
@@ -251,6 +259,8 @@ class Drawable:
             else:
                 raise ValueError("bad value for polystyle: {}".format(self.polystyle))
             
+        elif isinstance(x,Region):
+            self.draw_region(x)
         elif isgeomlist(x):
             for e in x:
                 self.draw(e)
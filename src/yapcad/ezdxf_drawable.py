@@ -25,9 +25,36 @@
 # SOFTWARE.
 
 from yapcad.geom import *
+from yapcad.geom import _samplearcangles
 import yapcad.drawable as drawable
 import ezdxf
 
+## vertices of a closed loop of lines and arcs as (x,y,bulge) tuples
+## for a DXF polyline boundary path.  The bulge of an arc is the
+## tangent of a quarter of its sweep, negative if it runs clockwise,
+## and full circles are split in half.
+def _bulgepath(loop):
+    verts = []
+    for e in loop:
+        if isline(e):
+            verts.append((e[0][0],e[0][1],0.0))
+            continue
+        start,end = _samplearcangles(e)
+        sweep = end-start
+        if sweep > 180.0:
+            angs = [start,start+sweep/2.0]
+            sweep = sweep/2.0
+        else:
+            angs = [start]
+        b = tan(sweep*pi2/(4*360.0))
+        if e[1][3] == -2:
+            angs = [ a+sweep for a in reversed(angs) ]
+            b = -b
+        for a in angs:
+            a = a*pi2/360.0
+            verts.append((e[0][0]+e[1][0]*cos(a),e[0][1]+e[1][0]*sin(a),b))
+    return verts
+
 ## class to provide dxf drawing functionality
 class ezdxfDraw(drawable.Drawable):
 
@@ -121,6 +148,25 @@ class ezdxfDraw(drawable.Drawable):
                                       'color': color,
                                       'linetype': linetype})
 
+    ## draw the outline of region r, and if fillcolor is set, fill
+    ## each face of it with a solid hatch whose holes are islands
+    def draw_region(self,r):
+        super().draw_region(r)
+        if not self.fillcolor:
+            return
+        layer=self.layer
+        if layer == False:
+            layer = '0'
+        color = self.thing2color(self.fillcolor,'i')
+        for face in r.faces():
+            hatch = self.__msp.add_hatch(color=color,
+                                         dxfattribs={'layer': layer})
+            for k,i in enumerate(face):
+                flags = ezdxf.const.BOUNDARY_PATH_EXTERNAL if k == 0 \
+                    else ezdxf.const.BOUNDARY_PATH_OUTERMOST
+                hatch.paths.add_polyline_path(_bulgepath(r.loops[i]),
+                                              is_closed=True,flags=flags)
+
     def draw_text(self,text,location,
                   align='LEFT',
                   attr={'style': 'LiberationMono',
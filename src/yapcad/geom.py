@@ -241,6 +241,115 @@ lists composed of closed elements.
 Geometry lists are paramaterized a bit like polylines, except that
 there is no guarantee of continuity.
 
+point arrays
+============
+
+For large point sets, such as the vertices of a many-thousand vertex
+outline, the one-list-per-point representation spends most of its
+time in interpreter overhead.  The ``PointArray`` class stores `N`
+homogeneous points as a single `(N,4)` NumPy ``float64`` array, and
+the batched vector functions ``add_many()``, ``sub_many()``,
+``scale3_many()``, ``dot_many()``, ``cross_many()``, ``mag_many()``,
+``dist_many()``, and ``homo_many()`` operate on whole arrays at
+once. ::
+
+  pa = PointArray([point(0,0),point(1,0),point(1,1)])
+  lengths = dist_many(pa[1:],pa[:-1])
+  ply = pa.poly() # back to an ordinary list-of-points poly
+
+Conversion to and from list-of-points polys is lossless, so a point
+array can always be handed to ``ispoly()``, ``samplepoly()``, and
+friends by way of ``PointArray.poly()``.
+
+tagged geometry
+===============
+
+Validating a figure with ``ispoly()`` or ``isgeomlist()`` means
+scanning the whole figure, and for nested geometry lists these scans
+are repeated at every level of every generalized operation.  The
+``tag()`` function validates a figure once and returns a
+``TaggedGeom``, a list subclass that records the kind of figure and the
+XY plane it lies in.  Tagged figures work everywhere ordinary figures
+do, but type and planarity checks on them take constant time. ::
+
+  gl = tag([poly1, [line1, arc1]])
+  p = sample(gl,0.5) # no repeated validation of poly1
+
+In-place modification of a tagged list drops the tag.
+
+prepared paths
+==============
+
+Sampling a poly or geometry list by its 0 to 1 parameter means
+finding the segment that contains a given distance along the figure.
+A ``PreparedPath`` stores the segments of a figure together with
+cumulative segment lengths, and answers ``sample()``, ``unsample()``,
+and ``segment()`` queries using binary search. ::
+
+  pp = PreparedPath(ply)
+  pnts = [ pp.sample(i/100) for i in range(100) ]
+
+``samplepoly()``, ``segmentgeomlist()`` and their relatives use
+``preparedpath()``, which caches the prepared path on tagged figures,
+so repeated queries on a tagged figure skip the rebuild.  ``Polyline``,
+``Polygon`` and ``Boolean`` instances keep a prepared path of their
+outline, and ``PreparedPath.extend()`` appends segments to a prepared
+path in place, which is how a ``Polyline`` keeps its path up to date
+as points are added.
+
+The batched ``sample_many()`` and ``unsample_many()`` functions sample
+a figure at a whole array of parameters, or find the parameters of a
+whole array of points, in vectorized form: ::
+
+  pa = sample_many(ply,np.linspace(0.0,1.0,1000)) # a PointArray
+  us = unsample_many(ply,pa)
+
+Likewise, ``isinside_many()`` classifies a whole array of points
+against a figure at once. ::
+
+  inside = isinside_many(ply,pa) # a boolean array
+
+and ``lineArcIntersectXY_many()`` intersects one arc with a whole
+array of line segments.
+
+A prepared path also caches the bounding boxes of its segments
+(``PreparedPath.boxes()``), and a spatial index over them (see
+``yapcad.spatial``), built on first use by ``PreparedPath.index()``.
+``intersectXY()`` uses them for polys and geometry lists, rejecting
+figures and segments whose boxes don't overlap before calling the
+analytic intersection functions.
+
+robust predicates
+=================
+
+Whether a point lies to the left or right of a line is decided with
+the adaptive ``orient2d()`` predicate from ``yapcad.predicates``,
+which is evaluated in floating point when that gives a reliable sign,
+and exactly otherwise.  ``lineLineIntersectXY()``, the winding number
+used by the inside tests, and ``PreparedPolygon`` use it, so their
+answers for nearly collinear points don't depend on ``epsilon``.
+``lineLineIntersectXY()`` still treats lines as parallel when the
+shorter one deviates from the direction of the longer by less than
+``epsilon`` over its length.
+
+value safety
+============
+
+Functions described as "value-safe", such as ``intersectSimplePolyXY()``
+or ``lineArcIntersectXY()``, check on every call that their arguments
+are valid geometry lying in a common XY plane.  Trusted inner loops that
+work on geometry they built themselves can skip these checks with the
+``unchecked()`` context manager: ::
+
+  with unchecked():
+      for l in rays:
+          pp = intersectGeomListXY(l,outline)
+
+Checking remains the default.  Calling ``setdebugchecks(True)``, or
+setting the ``YAPCAD_DEBUG_CHECKS`` environment variable, turns the
+checks back on everywhere, including inside ``unchecked()`` blocks,
+which is useful when testing.
+
 ======================
 COMPUTATIONAL GEOMETRY
 ======================
@@ -278,7 +387,12 @@ described here support the following operations:
   the interior of figure ``x``.  In the case where ``x`` is a point,
   line, or polyline where there is no two-dimensional interior
   defined, determine if ``p`` lies on or within epsilon of the
-  `0 <= u <=1` parameter domain of figure ``x``.
+  `0 <= u <=1` parameter domain of figure ``x``.  Closed figures
+  contain the points around which their winding number is odd.
+
+- ``windingnumberXY(x,p)`` -- for closed figure ``x`` and point ``p``
+  that lie in the same XY plane, return the number of times ``x``
+  winds counterclockwise around ``p``.
 
 - ``intersectXY(g1,g2,inside=True,params=False)`` -- Compute the
   intersections of the two figures ``g1`` and ``g2`` that lie in the
@@ -289,6 +403,13 @@ described here support the following operations:
   ``params==True``, then return a list of intersection parameter
   values for each figure, or ``False`` if there are no intersections.
 
+- ``sweepIntersectXY(g1,g2)`` -- find every intersection of two
+  figures with a sweep line, returning parameters in the same form as
+  ``intersectXY(g1,g2,params=True)``.
+
+- ``selfIntersectXY(g)`` -- find the parameter pairs at which a poly or
+  geometry list crosses itself.
+
 In addition to the above, ``yapcad.geom`` supports following affine
 transformation operations for all figures:
 
@@ -398,14 +519,57 @@ and polygon-specific computational geometry operations, notably:
 
 from math import *
 import mpmath as mpm
+import numpy as np
 import copy
+import os
+from contextlib import contextmanager
+from bisect import bisect_left
+from heapq import heappush, heappop
 import yapcad.xform as xform
+from yapcad.spatial import BoxIndex
+from yapcad.predicates import orient2d, orient2d_many
 
 ## constants
 #epsilon=0.0000001
 epsilon=0.000005
 pi2 = 2.0*pi
 
+## validation control
+## ------------------
+
+## Value-safe functions like intersectSimplePolyXY() check that their
+## arguments are valid, coplanar geometry on every call.  Code that
+## calls these functions many times on geometry that it constructed
+## itself (and thus already knows to be good) can skip the redundant
+## checks by calling them inside a ``with unchecked():`` block.
+## Checking is on by default, and debug checking (enabled with
+## setdebugchecks(True), or by setting the YAPCAD_DEBUG_CHECKS
+## environment variable) turns the checks back on even inside
+## unchecked blocks, which is useful for testing.
+
+_checks = True
+_debugchecks = os.environ.get('YAPCAD_DEBUG_CHECKS','') not in ('','0')
+
+@contextmanager
+def unchecked():
+    """context manager that disables value-safety checks in its block"""
+    global _checks
+    old = _checks
+    _checks = False
+    try:
+        yield
+    finally:
+        _checks = old
+
+def setdebugchecks(flag=True):
+    """force value-safety checks on, even inside ``unchecked()`` blocks"""
+    global _debugchecks
+    _debugchecks = flag
+
+def checking():
+    """are value-safety checks currently enabled?"""
+    return _checks or _debugchecks
+
 ## operations on scalars
 ## -----------------------
 
@@ -604,26 +768,49 @@ def dist4(a,b):  # compute distance between two points a & b
 ## misc operations
 ## -----------------------------------------
 
-## function to deep-copy geometry, which is to say lists containing
-## non-zero-length lists or 4-vectors.  Returns False if a isn't valid
-## geometry list
-
-# def deepcopy(a):
-#     if isvect(a):
-#         return vect(a)
-#     elif isinstance(a,list):
-#         if len(a) > 0:
-#             c = list(map(deepcopy,a))
-#             for i in c:
-#                 if not i:
-#                     return False
-#             return c
-#         else:
-#             return False
-#     else:
-#         return False
-
-deepcopy = copy.deepcopy
+## function to deep-copy geometry.  yapCAD geometry is made of nested
+## lists whose leaves are immutable scalars, so rather than paying for
+## the memo dictionary and generic type dispatch of copy.deepcopy(),
+## we copy the list structure directly.  4-vectors (points, and the
+## parameter quasivectors of arcs) are copied with a single slice.
+## Anything that isn't a list of lists and scalars, such as Polygon or
+## Boolean instances, falls back to copy.deepcopy().
+
+## NOTE: unlike copy.deepcopy(), this does not preserve aliasing, so
+## a point object that appears twice in the original will be two
+## separate (equal) points in the copy.
+
+_scalartypes = frozenset((int,float,bool,str,type(None)))
+
+def deepcopy(a):
+    """ copy geometry, or fall back to copy.deepcopy() for anything else"""
+    t = type(a)
+    if t is list:
+        return _copylist(a)
+    elif t is TaggedGeom:
+        return TaggedGeom(_copylist(a),a.kind,a.xyplane)
+    elif t in _scalartypes:
+        return a
+    return copy.deepcopy(a)
+
+def _copylist(a):
+    r = []
+    ap = r.append
+    for x in a:
+        t = type(x)
+        if t is list:
+            if len(x) == 4 and type(x[0]) in _scalartypes \
+               and type(x[1]) in _scalartypes \
+               and type(x[2]) in _scalartypes \
+               and type(x[3]) in _scalartypes:
+                ap(x[:])
+            else:
+                ap(_copylist(x))
+        elif t in _scalartypes:
+            ap(x)
+        else:
+            ap(deepcopy(x))
+    return r
 
 # pretty printing string formatter for vectors, lines, and polygons.
 # You can use this anywhere you use str(), since it will fall back to
@@ -667,6 +854,147 @@ def vstr(a):
         return str(a)
 
 
+## batched operations on arrays of points
+## --------------------------------------
+
+## A PointArray holds N homogeneous points as a single (N,4) float64
+## NumPy array, rather than as N separate four-element lists.  The
+## *_many() functions below are batched versions of the vector
+## operations above, and work on whole point arrays at once.  Each
+## argument may be a PointArray, an (N,4) array, a list of points, or
+## a single point, which is broadcast against the other argument.
+
+class PointArray:
+    """N homogeneous points stored as an `(N,4)` float64 NumPy array"""
+
+    def __init__(self,a=None):
+        if a is None:
+            self.array = np.zeros((0,4))
+        elif isinstance(a,PointArray):
+            self.array = a.array.copy()
+        elif isinstance(a,np.ndarray):
+            self.array = _padpoints(np.array(a,dtype=np.float64,ndmin=2))
+        elif isinstance(a,(list,tuple)):
+            if len(a) == 0:
+                self.array = np.zeros((0,4))
+            elif len(list(filter(lambda x: not ispoint(x),a))) > 0:
+                raise ValueError('non-point passed to PointArray constructor')
+            else:
+                self.array = np.array(a,dtype=np.float64)
+        else:
+            raise ValueError('bad argument to PointArray constructor: {}'.format(a))
+
+    ## wrap an existing (N,4) array without copying it
+    @classmethod
+    def _wrap(cls,arr):
+        pa = cls.__new__(cls)
+        pa.array = arr
+        return pa
+
+    def __repr__(self):
+        return 'PointArray({} points)'.format(len(self.array))
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self,i):
+        if isinstance(i,(int,np.integer)):
+            return self.array[i].tolist()
+        return PointArray._wrap(np.atleast_2d(self.array[i]))
+
+    def __iter__(self):
+        for row in self.array:
+            yield row.tolist()
+
+    def poly(self):
+        """return the points as an ordinary list-of-points poly"""
+        return self.array.tolist()
+
+    def bbox(self):
+        """return the three-dimensional bounding box of the points"""
+        if len(self.array) == 0:
+            return False
+        return [ self.array[:,:3].min(axis=0).tolist() + [1.0],
+                 self.array[:,:3].max(axis=0).tolist() + [1.0] ]
+
+## pad an (N,2) or (N,3) coordinate array out to homogeneous (N,4)
+## form, setting unspecified z to 0 and w to 1 as vect() does
+def _padpoints(arr):
+    if arr.ndim != 2 or arr.shape[1] < 2 or arr.shape[1] > 4:
+        raise ValueError('bad shape for point array: {}'.format(arr.shape))
+    if arr.shape[1] == 4:
+        return arr
+    r = np.zeros((arr.shape[0],4))
+    r[:,3] = 1.0
+    r[:,:arr.shape[1]] = arr
+    return r
+
+def ispointarray(x):
+    """ is it a PointArray? """
+    return isinstance(x,PointArray)
+
+## return the (N,4) or (4,) float array underlying a batched argument
+def _pointdata(a):
+    if isinstance(a,PointArray):
+        return a.array
+    return np.asarray(a,dtype=np.float64)
+
+def _vectresult(r):
+    r[...,3] = 1.0
+    return PointArray._wrap(np.atleast_2d(r))
+
+def add_many(a,b):
+    """ batched 3 vector `a + b`"""
+    a = _pointdata(a)
+    b = _pointdata(b)
+    return _vectresult(a+b)
+
+def sub_many(a,b):
+    """ batched 3 vector `a - b`"""
+    a = _pointdata(a)
+    b = _pointdata(b)
+    return _vectresult(a-b)
+
+def scale3_many(a,c):
+    """ batched 3 vector ``a`` times scalar (or array of scalars) ``c``"""
+    a = _pointdata(a)
+    c = np.asarray(c,dtype=np.float64)
+    if c.ndim > 0:
+        c = c[:,None]
+    return _vectresult(a*c)
+
+def dot_many(a,b):
+    """ batched 3 vector ``a`` dot ``b``, returns an array of scalars"""
+    a = _pointdata(a)
+    b = _pointdata(b)
+    return np.atleast_1d(np.sum(a[...,:3]*b[...,:3],axis=-1))
+
+def cross_many(a,b):
+    """ batched 3 vector ``a`` cross ``b``"""
+    a = _pointdata(a)
+    b = _pointdata(b)
+    r = np.zeros(np.broadcast_shapes(a.shape,b.shape))
+    r[...,:3] = np.cross(a[...,:3],b[...,:3])
+    return _vectresult(r)
+
+def mag_many(a):
+    """ batched 3 vector magnitude, returns an array of scalars"""
+    a = _pointdata(a)
+    return np.atleast_1d(np.sqrt(np.sum(a[...,:3]*a[...,:3],axis=-1)))
+
+def dist_many(a,b):
+    """ batched euclidean distance between points ``a`` and ``b``"""
+    a = _pointdata(a)
+    b = _pointdata(b)
+    d = a[...,:3]-b[...,:3]
+    return np.atleast_1d(np.sqrt(np.sum(d*d,axis=-1)))
+
+def homo_many(a):
+    """ batched homogenization, project back to the w=1 plane"""
+    a = _pointdata(a)
+    return _vectresult(a/a[...,3:4])
+
+
 ## COMPUTATIONAL GEOMETRY
 ## ======================
 ## operations on points
@@ -687,7 +1015,7 @@ def vstr(a):
 def point(x=False,y=False,z=False,w=False):
     """Point creation from point or scalars"""
     if ispoint(x):
-        return deepcopy(x)
+        return x[:]
     r = [0,0,0,1]
     if isgoodnum(x):
         r[0]=x
@@ -755,7 +1083,7 @@ def isinsidepointXY(x,p):
 def line(p1,p2=False):
     """Value-safe line creation"""
     if isline(p1):
-        return deepcopy(p1)
+        return [ p1[0][:], p1[1][:] ]
     elif ispoint(p1) and ispoint(p2):
         return [ point(p1), point(p2) ]
     else:
@@ -846,6 +1174,14 @@ def lineLineIntersectXY(l1,l2,inside=True,params=False):
     """Compute the intersection of two lines that lie in the same XY
     plane. **NOTE:** It's usually preferable to use the generalized
     ``intersectXY()`` function than this non-type-safe, line-specific one.
+
+    The lines are treated as parallel, and ``False`` is returned, if
+    the shorter line deviates from the direction of the longer by less
+    than ``epsilon`` over its length.  This threshold is relative to
+    the lengths of the lines; earlier versions compared the squared
+    cross product of the direction vectors with ``epsilon``, which
+    rejected short lines at large angles and accepted long, nearly
+    parallel ones.
     """
 
     x1=l1[0][0]
@@ -868,15 +1204,26 @@ def lineLineIntersectXY(l1,l2,inside=True,params=False):
     if abs(z2-z1) > epsilon or abs(z3-z1) > epsilon or abs(z4-z1) > epsilon:
         raise ValueError('lines not in same x-y plane')
 
-    ## do lines intersect anywhere?
+    ## do lines intersect anywhere?  They are treated as parallel if
+    ## the shorter line deviates from parallel to the longer by less
+    ## than epsilon over its length
     denom=(x1-x2)*(y3-y4)-(y1-y2)*(x3-x4)
-    if denom*denom < epsilon:
+    len1 = sqrt((x2-x1)*(x2-x1)+(y2-y1)*(y2-y1))
+    len2 = sqrt((x4-x3)*(x4-x3)+(y4-y3)*(y4-y3))
+    if abs(denom) <= epsilon*max(len1,len2):
         return False
 
-    ## the lines do intersect, so let's see if they intersect
-    ## inside both line segments
-    t = ((x1-x3)*(y3-y4) - (y1-y3)*(x3-x4))/denom
-    u = -1 * ((x1-x2)*(y1-y3) - (y1-y2)*(x1-x3))/denom
+    ## the lines do intersect, so let's see if they intersect inside
+    ## both line segments.  The parameters are ratios of robust
+    ## orientations of the end points of each line with respect to
+    ## the other, so their signs, and the parameters of intersections
+    ## at end points, are exact.
+    o1 = orient2d(l2[0],l2[1],l1[0])
+    o2 = orient2d(l2[0],l2[1],l1[1])
+    o3 = orient2d(l1[0],l1[1],l2[0])
+    o4 = orient2d(l1[0],l1[1],l2[1])
+    t = o1/(o1-o2)
+    u = o3/(o3-o4)
 
     ## return the paramater space intersection
     if params:
@@ -935,7 +1282,7 @@ def linePointXY(l,p,inside=True,distance=False,params=False):
     z2=b[2]
 
     ## check to see if all three points lie in the same x,y plane
-    if not isXYPlanar([p,a,b]):
+    if checking() and not isXYPlanar([p,a,b]):
         raise ValueError('non-XY points in linePointXY call')
         return false
     # if abs(z1-z0) > epsilon or abs(z2-z0) > epsilon:
@@ -1072,7 +1419,7 @@ def arc(c,rp=False,sn=False,e=False,n=False,samplereverse=False):
 
     """
     if isarc(c):
-        return deepcopy(c)
+        return [ v[:] for v in c ]
     elif ispoint(c):
         cen = point(c)
         w=-1
@@ -1273,12 +1620,31 @@ def arcbbox(c):
         rr=point(c[1][0],c[1][0])
         return [sub(c[0],rr),add(c[0],rr)]
     else:
-        pp = []
-        for i in range(5):
-            u = i/4
-            pp.append(samplearc(c,u))
+        x = c[0]
+        r = c[1][0]
+        pp = [ point(x[0]+r*cos(a*pi2/360.0),x[1]+r*sin(a*pi2/360.0),x[2])
+               for a in _arcboxangles(c) ]
         return polybbox(pp)
 
+## angles, in degrees, of the ends of arc c and of the quadrant points
+## between them, where the extremes of its coordinates lie
+def _arcboxangles(c):
+    start = c[1][1]
+    end = c[1][2]
+    if iscircle(c):
+        start,end = 0.0,360.0
+    else:
+        start = start % 360.0
+        end = end % 360.0
+        if end < start:
+            end += 360.0
+    angs = [start,end]
+    k = ceil(start/90.0)
+    while k*90.0 <= end:
+        angs.append(k*90.0)
+        k += 1
+    return angs
+
 def isinsidearcXY(c,p):
     """
     Determine if point ``p`` lies on (within `epsilon of) the arc ``c``.  In the special
@@ -1440,7 +1806,7 @@ def _arcArcIntersectXY(c1,c2,inside=True,params=False):
             uparam1 = uparam1 + [ u1 ]
                 
             if end2 <= 360.0 or ang2 >= start2 or \
-               ( end2 > 360.0 and ang2 > end1-360.0):
+               ( end2 > 360.0 and ang2 > end2-360.0):
                 u2 = (ang2-start2)/(end2-start2)
                 if sr2:
                     u2 = 1.0-u2
@@ -1490,7 +1856,8 @@ def arcArcIntersectXY(c1,c2,inside=True,params=False):
     each arc.
 
     """
-    
+    if not checking():
+        return _arcArcIntersectXY(c1,c2,inside,params)
     for c in [c1,c2]:
         if len(c) == 3:
             norm = c[2]
@@ -1501,6 +1868,64 @@ def arcArcIntersectXY(c1,c2,inside=True,params=False):
     return _arcArcIntersectXY(c1,c2,inside,params)
     
 
+## Solve for the parameters b at which b*V + P lies on the circle of
+## radius r centered at the origin:
+##     | b*V + P |^2 = r^2
+##       b^2(Vx^2 + Vy^2) + 2b(VxPx+VyPy) + Px^2 + Py^2 - r^2 = 0
+## let a = Vx^2 + Vy^2,
+##     b = 2*(VxPx + VyPy)
+##     cc = Px^2 + Py^2 - r^2
+## If the discriminant b^2 - 4ac is within epsilon (scaled by the
+## length of V) of zero, the line is tangent and there is one root.
+
+## The quadratic is solved in double precision, using the
+## cancellation-free form of the quadratic formula.  Only when the
+## discriminant lies so close to the tangency threshold that rounding
+## error could change the number of roots is it recomputed with
+## mpmath, at higher precision.  The roots are returned in the order
+## (-b + sqrt(d))/2a, (-b - sqrt(d))/2a.
+
+_dblerr = 8*2.0**-52
+
+def _linecircleroots_mp(v0,v1,p0,p1,r):
+    with mpm.workdps(40):
+        mpV0 = mpm.mpf(v0)
+        mpV1 = mpm.mpf(v1)
+        mpP0 = mpm.mpf(p0)
+        mpP1 = mpm.mpf(p1)
+        mpr = mpm.mpf(r)
+        a = mpV0*mpV0+mpV1*mpV1
+        b = 2*(mpV0*mpP0+mpV1*mpP1)
+        cc = mpP0*mpP0+mpP1*mpP1-mpr*mpr
+        d = b*b-4*a*cc
+        if mpm.fabs(d) < mpm.sqrt(a)*2*epsilon:
+            return [ float(-b/(2*a)) ]
+        elif d < 0:
+            raise ValueError("imaginary solution to circle line intersection -- shouldn't happen here, d = {}".format(float(d)))
+        return [ float((-b + mpm.sqrt(d))/(2*a)),
+                 float((-b - mpm.sqrt(d))/(2*a)) ]
+
+def _linecircleroots(v0,v1,p0,p1,r):
+    a = v0*v0+v1*v1
+    if a < epsilon*epsilon:
+        raise ValueError('degenerate line in lineArcIntersectXY')
+    b = 2*(v0*p0+v1*p1)
+    cc = p0*p0+p1*p1-r*r
+    d = b*b-4*a*cc
+    tol = sqrt(a)*2*epsilon
+    ## bound on the rounding error in d
+    err = _dblerr*(b*b+4*a*(p0*p0+p1*p1+r*r))
+    if abs(abs(d)-tol) <= err:
+        return _linecircleroots_mp(v0,v1,p0,p1,r)
+    if abs(d) < tol:
+        return [ -b/(2*a) ]
+    elif d < 0:
+        raise ValueError("imaginary solution to circle line intersection -- shouldn't happen here, d = {}".format(d))
+    q = -0.5*(b + copysign(sqrt(d),b))
+    if b >= 0.0:
+        return [ cc/q, q/a ]
+    return [ q/a, cc/q ]
+
 ## non-value-safe line-arc intersection function
 def _lineArcIntersectXY(l,c,inside=True,params=False):
     """
@@ -1508,8 +1933,16 @@ def _lineArcIntersectXY(l,c,inside=True,params=False):
     """
     x=c[0]
     r=c[1][0]
-    mpr=mpm.mpf(r)
-    
+
+    ## quick rejection of line segments that lie outside the box of
+    ## the circle, before any distance or extended-precision
+    ## calculation
+    if inside and not params:
+        rr = r+epsilon
+        if max(l[0][0],l[1][0]) < x[0]-rr or min(l[0][0],l[1][0]) > x[0]+rr or \
+           max(l[0][1],l[1][1]) < x[1]-rr or min(l[0][1],l[1][1]) > x[1]+rr:
+            return False
+
     # is the arc a full circle?
     circle = False
     if c[1][1] == 0 and c[1][2] == 360:
@@ -1546,38 +1979,11 @@ def _lineArcIntersectXY(l,c,inside=True,params=False):
     
     V = sub(p0,p1)
     P = p1
-    #a = V[0]*V[0]+V[1]*V[1]
-    mpV0 = mpm.mpf(V[0])
-    mpV1 = mpm.mpf(V[1])
-    mpP0 = mpm.mpf(P[0])
-    mpP1 = mpm.mpf(P[1])
-    a = mpV0*mpV0+mpV1*mpV1
-    mpepsilon = mpm.mpf(epsilon)
-    if mpm.fabs(a) < mpepsilon*mpepsilon:
-        print('degenerate line in lineArcIntersectXY')
-        raise ValueError('bad!')
-        return False
-    # b = 2*(V[0]*P[0]+V[1]*P[1])
-    b = 2*(mpV0*mpP0+mpV1*mpP1)
-    #cc = P[0]*P[0]+P[1]*P[1]-r*r
-    cc = mpP0*mpP0+mpP1*mpP1-mpr*mpr
-    d = b*b-4*a*cc
-    ## Check to see if we are within epsilon, scaled by the length of the line
-    if mpm.fabs(d) < mpm.sqrt(a)*2*mpepsilon: # one point of intersection
-        b0 = -b/(2*a)
-        b1 = False
-    elif d < 0:
-        print("value of d: ",d,"  value of sqrt(a)*epsilon",sqrt(a)*epsilon)
-        raise ValueError("imaginary solution to circle line intersection -- shouldn't happen here")
-    else: # two points of intersection
-        b0 = (-b + mpm.sqrt(d))/(2*a)
-        b1 = (-b - mpm.sqrt(d))/(2*a)
+    roots = _linecircleroots(V[0],V[1],P[0],P[1],r)
 
     # use computed parameters to calculate solutions, still in
     # circle-at-origin coordinates
-    s = [ add(scale3(V,float(b0)),p1) ]
-    if b1:
-        s = s + [ add(scale3(V,float(b1)),p1) ]
+    s = [ add(scale3(V,bb),p1) for bb in roots ]
 
     if not inside or circle or params:              # transform back into world
                                           # coordinates
@@ -1619,7 +2025,8 @@ def lineArcIntersectXY(l,c,inside=True,params=False):
     True`` return a list of intersection parameters instead.
 
     """
-    
+    if not checking():
+        return _lineArcIntersectXY(l,c,inside,params)
     if len(c) == 3:
         norm = c[2]
         if dist(norm,vect(0,0,1)) > epsilon:
@@ -1629,6 +2036,71 @@ def lineArcIntersectXY(l,c,inside=True,params=False):
         raise ValueError('line and circle passed to lineArcIntersectXY do not all lie in same x-y plane')
     return _lineArcIntersectXY(l,c,inside,params)
 
+def lineArcIntersectXY_many(lines,c,inside=True):
+    """
+    Intersect the arc ``c`` with each of an array of line segments
+    ``lines``, given as a list of lines or an `(N,2,4)` array, all
+    lying in the same XY plane.  Return two `(N,2)` arrays holding the
+    line and arc parameters of up to two intersections per segment,
+    with NaN where there is none.  If ``inside == True``, only
+    intersections within both the segment and the arc are kept;
+    otherwise the lines are infinite and the arc is a circle.
+    """
+    L = np.asarray(lines,dtype=np.float64).reshape((-1,2,4))
+    n = len(L)
+    uu1 = np.full((n,2),np.nan)
+    uu2 = np.full((n,2),np.nan)
+    if n == 0:
+        return uu1,uu2
+    if len(c) == 3 and dist(c[2],vect(0,0,1)) > epsilon:
+        raise ValueError('arc passed to lineArcIntersectXY_many does not lie in x-y plane')
+    x = np.array(c[0][:2],dtype=np.float64)
+    r = c[1][0]
+    P = L[:,1,:2] - x
+    V = L[:,0,:2] - L[:,1,:2]
+    a = np.sum(V*V,axis=1)
+    b = 2*np.sum(V*P,axis=1)
+    pp = np.sum(P*P,axis=1)
+    cc = pp-r*r
+    d = b*b-4*a*cc
+    tol = np.sqrt(a)*2*epsilon
+    err = _dblerr*(b*b+4*a*(pp+r*r))
+    good = a >= epsilon*epsilon
+    amb = good & (np.abs(np.abs(d)-tol) <= err)
+    tan = good & ~amb & (np.abs(d) < tol)
+    two = good & ~amb & (d >= tol)
+
+    B = np.full((n,2),np.nan)
+    with np.errstate(divide='ignore',invalid='ignore'):
+        B[tan,0] = -b[tan]/(2*a[tan])
+        sd = np.sqrt(np.where(two,d,0.0))
+        q = -0.5*(b + np.copysign(sd,b))
+        r1 = q/a
+        r2 = cc/q
+        pos = b >= 0.0
+        B[two,0] = np.where(pos,r2,r1)[two]
+        B[two,1] = np.where(pos,r1,r2)[two]
+    for i in np.nonzero(amb)[0]:
+        try:
+            rr = _linecircleroots(V[i,0],V[i,1],P[i,0],P[i,1],r)
+        except ValueError:
+            continue
+        B[i,:len(rr)] = rr
+
+    ## points b*V + P, in world coordinates, and their arc parameters
+    pnts = np.zeros((n*2,4))
+    pnts[:,:2] = (B[:,:,None]*V[:,None,:] + P[:,None,:] + x).reshape((-1,2))
+    pnts[:,2] = c[0][2]
+    pnts[:,3] = 1.0
+    uu1 = 1.0-B
+    uu2 = _unsamplearc_many(c,pnts).reshape((n,2))
+    uu2[np.isnan(B)] = np.nan
+    if inside:
+        out = ~((uu1 >= 0.0) & (uu1 <= 1.0) & (uu2 >= 0.0) & (uu2 <= 1.0))
+        uu1[out] = np.nan
+        uu2[out] = np.nan
+    return uu1,uu2
+
 
 ## function to compute tangent lines to two coplanar circles lying in
 ## an x-y plane.  Function will either return two lines or False, if
@@ -1798,7 +2270,9 @@ def poly(*args):
         raise ValueError('bad number of arguments {} passed to poly()'.format(len(args)))
     if len(args) == 1:
         if ispoly(args[0]):
-            return deepcopy(args[0])
+            return [ p[:] for p in args[0] ]
+        elif ispointarray(args[0]) and len(args[0]) > 2:
+            return args[0].poly()
         else:
             raise VauleError('non-poly list passed to poly()')
     # args is of length 3 or greater.  Check to see if args are points
@@ -1806,10 +2280,12 @@ def poly(*args):
     b = list(filter(lambda x: not ispoint(x),a))
     if len(b) > 0:
         raise ValueError('non-point arguments to poly(): {} '.format(b))
-    return deepcopy(a)
+    return [ p[:] for p in a ]
 
 def ispoly(a):
     """is ``a`` a poly?"""
+    if isinstance(a,TaggedGeom) and a.kind:
+        return a.kind == 'poly'
     return isinstance(a,list) and len(a) > 2 and \
         len(list(filter(lambda x: not ispoint(x),a))) == 0
 
@@ -1866,7 +2342,7 @@ def isinsidepolyXY(a,p):
     """
     Determine if point ``p`` lies on (within `epsilon of) the polyline ``a``.  In the 
     case where ``a`` is a closed polygon, determine if point ``p`` lies anywhere within
-    the polygon by even-odd line intersection method.
+    the polygon by the parity of its winding number (the even-odd rule).
 
     """
     closed=False
@@ -1877,46 +2353,20 @@ def isinsidepolyXY(a,p):
     ## if not closed, use "unsample" test to determine if ``p`` lies
     ## on the polyline
     if not closed:
-        if unsamplepoly(a,p) == False:
-            return False
-        else:
-            return True
+        return not isinstance(unsamplepoly(a,p),bool)
     ## poly is closed polygon
     bb = polybbox(a)
     ## do quick bounding box check
     if not isinsidebbox(bb,p):
         return False
-    ## inside the bounding box, do intersection testing
-    p2 = add([1,1,0,1],bb[1])
-    if vclose(p2,p): ## did we randomly pick an outside point near the
-                     ## test point?
-        p2 = sub(bb[0],[1,1,0,1])
-    l = line(p,p2)
-
-    pp = intersectSimplePolyXY(l,a)
-    if pp == False:
-        return False
-    return len(pp) % 2 == 1
+    ## inside the bounding box, use the winding number
+    return windingnumberXY(a,p) % 2 == 1
 
 ## is it a polygon with all points in the same x-y plane
 def ispolygonXY(a):
     """is ``a`` an XY-coplanar polygon?"""
     return ispolygon(a) and isXYPlanar(a)
 
-## utility function used by both samplepoly() and unsamplepoly()
-def __lineslength(a):
-    lines=[]
-    lengths=[]
-    length=0
-    for i in range(1,len(a)):
-        p0=  a[i-1]
-        p1=  a[i]
-        lines.append(line(p0,p1))
-        l = dist(p0,p1)
-        lengths.append(l)
-        length += l
-    return lines,lengths,length
-
 ## map the interval 0 to 1 to the total length of all poly segments
 ## and return the sample point corresponding to the parameter u
 
@@ -1931,68 +2381,19 @@ def samplepoly(a,u):
 
     """
     
-    if not ispoly(a):
+    if checking() and not ispoly(a):
         raise ValueError('non-poly passed to samplepoly')
 
-    closed=False
-
-    lines,lengths,length = __lineslength(a)
-    if len(a) > 2 and dist(a[0],a[-1]) < epsilon:
-        closed = True
-
-    if closed:
-        u=u%1.0
-        
-    dst = u * length;
-    d = 0
-    if u < 1.0:
-        for i in range(len(lines)):
-            l=lengths[i]
-            if dst <= d+l:
-                uu = 1.0 - (d+l-dst)/l
-                return sampleline(lines[i],uu)
-            else:
-                d+=l
-    else:
-        uu = (dst-length+lengths[-1])/lengths[-1]
-        return sampleline(lines[-1],uu)
+    return preparedpath(a).sample(u)
 
 def segmentpoly(a,u1,u2):
     """slice out a parameterized segment from polyline or polygon ``a``
     and return this as a new polyline"""
 
-    if not ispoly(a):
+    if checking() and not ispoly(a):
         raise ValueError('non-poly passed to segmentpoly')
-    closed=False
-    if len(a) > 2 and dist(a[0],a[-1]) < epsilon:
-        closed = True
+    return preparedpath(a).segment(u1,u2)
 
-    if closed:
-        u1%= 1.0
-        u2%= 1.0
-        if u2 < u1:
-            return segmentpoly(a,u1,1.0-epsilon) + segmentpoly(a,0.0,u2)
-        
-    else:
-        if u1 < 0 or u2 < 0 or u1 > 1 or u2 > 1:
-            raise ValueError('parameters fall outside 0,1 interval: {},{}'.format(u1,u2))
-    if u2 < u1:
-        a = deepcopy(a).reverse()
-        u1 = 1.0-u1
-        u2 = 1.0-u2
-        
-    lines,lengths,length = __lineslength(a)
-    sgl = segmentgeomlist(lines,u1,u2)
-
-    ply = []
-    for l in sgl:
-        ply.append(l[0])
-    ply.append(sgl[-1][1])
-
-    return ply
-
-    
-        
 ## anlogous to the unsampleline() and unsamplearc() functions, given a
 ## point on a poly, return the corresponding sample parameter, or
 ## False if the point is more than epsilon away from any poly line
@@ -2005,46 +2406,27 @@ def unsamplepoly(a,p):
     False if the point is more than epsilon away from any poly line
     segment
     """
-    if not ispoly(a):
+    if checking() and not ispoly(a):
         raise ValueError('non-poly passed to unsamplepoly')
-    closed = False
-    if len(a) > 2 and dist(a[0],a[-1]) < epsilon:
-        closed = True
-    lines,lengths,length = __lineslength(a)
-    if len(lines) == 1:
-        return unsampleline(lines[0],p)
-    else:
-        uu1 = unsampleline(lines[0],p)
-        if not isinstance(uu1,bool) and uu1 < 1.0 and\
-           (not closed or uu1 >= 0.0):
-            return uu1*lengths[0]/length
-        dst = lengths[0]
-        if len(lines) > 2:
-            for i in range(1,len(lines)-1):
-                uu = unsampleline(lines[i],p)
-                if not isinstance(uu,bool) and uu >= 0.0 and uu < 1.0:
-                    return (uu*lengths[i]+dst)/length
-                else:
-                    dst = dst+lengths[i]
-        uu2 = unsampleline(lines[-1],p)
-        
-        if not isinstance(uu2,bool) and uu2 >= 0.0 and\
-           (not closed or uu2 <= 1.0):
-            return (uu2*lengths[-1]+dst)/length
-        else:
-            return False
+    return preparedpath(a).unsample(p)
 
 
 ## ccompute the intersection between non-compound geometric element g,
 ## and poly a.
 def intersectSimplePolyXY(g,a,inside=True,params=False):
-    if not (ispoly(a) and isXYPlanar(a)):
-        raise ValueError('non-XY-planar or bad poly argument to intersectSimplePOlyXY: {}'.format(vstr(p)))
-    closed = False
+    if checking() and not (ispoly(a) and _xyplane(a) is not False):
+        raise ValueError('non-XY-planar or bad poly argument to intersectSimplePolyXY: {}'.format(vstr(a)))
+    return _intersectSimplePolyXY(g,preparedpath(a),inside,params,
+                                  inside and not params)
+
+## no-checking version that takes the PreparedPath pp of the poly.  If
+## prune is true, only the segments whose bounding boxes overlap g are
+## tested, which is only correct if the caller discards intersections
+## that lie beyond the ends of g.
+def _intersectSimplePolyXY(g,pp,inside=True,params=False,prune=False):
+    closed = pp.closed
     ARC=False
     LINE=False
-    if len(a) > 2 and dist(a[0],a[-1]) < epsilon:
-        closed = True
     if isline(g):
         LINE=True
     elif isarc(g):
@@ -2054,15 +2436,30 @@ def intersectSimplePolyXY(g,a,inside=True,params=False):
     pnts = []
     uu1s = []
     uu2s = []
-    lines, lengths, leng = __lineslength(a)
+    lines, lengths, leng = pp.segments, pp.lengths, pp.length
     if len(lines) == 1:
         if LINE:
             return lineLineIntersectXY(lines[0],g,inside,params)
         else:
             return lineArcIntersectXY(lines[0],g,inside,params)
-    dst = 0.0
     if len(lines) > 2:
-        for i in range(len(lines)):
+        if prune:
+            gbox = _xybox(g)
+            if closed and not _xyoverlap(gbox,pp.box()):
+                return False
+            cand = pp.index().query(gbox)
+            ## the end segments of open polys are extended
+            if not closed:
+                cand = sorted(set(cand) | {0,len(lines)-1})
+        else:
+            cand = range(len(lines))
+        if ARC:
+            ## intersect the arc with all candidate segments at once
+            cand = list(cand)
+            U1,U2 = lineArcIntersectXY_many([lines[i] for i in cand],g,
+                                            inside=False)
+        for k,i in enumerate(cand):
+            dst = pp.cumlengths[i]
             if LINE:
                 uu = lineLineIntersectXY(lines[i],g,params=True)
                 if not isinstance(uu,bool) and \
@@ -2079,8 +2476,9 @@ def intersectSimplePolyXY(g,a,inside=True,params=False):
                            (uu[1] >= 0.0 and uu[1] <= 1.0):
                             pnts.append(sampleline(g,uu[1]))
             elif ARC:
-                uu = lineArcIntersectXY(lines[i],g,params=True)
-                if not isinstance(uu,bool):
+                ok = ~(np.isnan(U1[k]) | np.isnan(U2[k]))
+                uu = [ U1[k][ok].tolist(), U2[k][ok].tolist() ]
+                if len(uu[0]) > 0:
                     for j in range(len(uu[0])):
                         if (((closed or (i > 0 and i < len(lines)-1)) and \
                              uu[0][j] >= 0.0 and uu[0][j] <= 1.0) or\
@@ -2098,7 +2496,6 @@ def intersectSimplePolyXY(g,a,inside=True,params=False):
 
             else:
                 raise ValueError('unknown geometry type -- should never happen here')
-            dst = dst+lengths[i]
 
     if params:
         if len(uu1s) > 0:
@@ -2129,6 +2526,8 @@ def polylength(a):
 ## or other geometry lists.
 
 def isgeomlist(a):
+    if isinstance(a,TaggedGeom) and a.kind:
+        return a.kind in _glistkinds
     if not isinstance(a,list):
         return False
     b = list(filter(lambda x: not (ispoint(x) or isline(x) \
@@ -2137,39 +2536,23 @@ def isgeomlist(a):
     return not len(b) > 0
 
 
-def __geomlistlength(gl):
-    leng=0.0
-    lengths=[]
-    for g in gl:
-        l = length(g)
-        lengths.append(l)
-        leng=leng+l
-    return lengths,leng
-
 ## map the interval 0 to 1 to the total length of all geometry list
 ## elements and return the sample point corresponding to the parameter
 ## u.  Note that points elements are ignored for the purpose of
 ## sampling.
 
 def samplegeomlist(gl,u):
-    if not isgeomlist(gl):
+    if checking() and not isgeomlist(gl):
         raise ValueError('non-geomlist passed to samplegeomlist')
     
-    lengths,leng = __geomlistlength(gl)
-        
-    dst = u * leng
-    d = 0
-    if u < 1.0:
-        for i in range(len(gl)):
-            l=lengths[i]
-            if dst <= d+l:
-                uu = 1.0 - (d+l-dst)/l
-                return sample(gl[i],uu)
-            else:
-                d+=l
-    else:
-        uu = (dst-leng+lengths[-1])/lengths[-1]
-        return sample(gl[-1],uu)
+    return _samplegeomlist(gl,u)
+
+## no-checking version, for geometry lists that are known to be good.
+## Untagged lists are not checked again when their path is built.
+def _samplegeomlist(gl,u):
+    if isinstance(gl,TaggedGeom):
+        return preparedpath(gl).sample(u)
+    return PreparedPath(gl,trusted=True).sample(u)
 
 ## function to reverse a geometry list (presumably contiguous) for
 ## sampling purposes
@@ -2198,68 +2581,11 @@ def reverseGeomList(gl):
 ## given a geometry list paramaterized over a 0,1 interval, return a
 ## geometry list corresponding to the interval 0 <= u1 <= u2 <=1.0
 def segmentgeomlist(gl,u1,u2,closed=False,reverse=False):
-    if closed:
-        u1 %= 1.0
-        u2 %= 1.0
-        if u2 < u1:
-            if reverse:
-                return segmentgeomlist(gl,0.0,u2,closed=False,reverse=True) +\
-                    segmentgeomlist(gl,u1,1.0-epsilon,closed=False,reverse=True)
-            else:
-                return segmentgeomlist(gl,u1,1.0-epsilon,closed=False) \
-                    + segmentgeomlist(gl,0.0,u2,closed=False)
-    if u1 < 0 or u1 > u2 or u2 < 0 or u2 > 1.0:
-        raise ValueError('bad parameters {} and {} passed to segmentgeomlist'.format(u1,u2))
-    lengths, leng = __geomlistlength(gl)
-
-    STARTED = False
-    DONE= False
-    dst1 = u1 * leng
-    dst2 = u2 * leng
-    d = 0
-    rgl = []
-    def _segment(g,u1,u2):
-        if isline(g):
-            return segmentline(g,u1,u2)
-        elif isarc(g):
-            return segmentarc(g,u1,u2)
-        elif ispoly(g):
-            return segmentpoly(g,u1,u2)
-        elif isgeomlist(g):
-            return segmentgeomlist(g,u1,u2)
-        else:
-            raise NotImplementedError("don't know how to segment {}".format(g))
-        
-    for i in range(len(gl)):
-        l=lengths[i]
-        if dst1 <= d+l:
-            if not STARTED:
-                uu = 1.0 - (d+l-dst1)/l
-                uu2 = 1.0
-                if dst2 < d+l:
-                    uu2 = 1.0 - (d+l-dst2)/l
-                    DONE=True
-                rgl.append(_segment(gl[i],uu,uu2))
-                STARTED=True
-                                      
-            elif dst2 <= d+l:
-                uu = 1.0 - (d+l-dst2)/l
-                rgl.append(_segment(gl[i],0.0,uu))
-                DONE=True
-            else:
-                rgl.append(deepcopy(gl[i]))
-        if DONE:
-            if reverse:
-                rgl = reverseGeomList(rgl)
-            return rgl
-        d+=l
-    if reverse:
-        rgl = reverseGeomList(rgl)
-    return rgl
+    return preparedpath(gl).segment(u1,u2,reverse,closed)
 
 
 def geomlistbbox(gl):
-    if not isgeomlist(gl):
+    if checking() and not isgeomlist(gl):
         raise ValueError('non geomlist passed to geomlistbbox: {}'.format(gl))
     ply=[]
     for g in gl:
@@ -2276,30 +2602,22 @@ def geomlistbbox(gl):
     return polybbox(ply)
 
 ## determine if a point lies inside closed regions of a geometry list.
-## only valid for geometry lists with only closed regions.  Count the
-## intersections for a line drawn from point to test to a point
-## outside the bounding box. Inside only if the number of
-## intersections is odd.
+## only valid for geometry lists with only closed regions.  Inside
+## only if the winding number of the regions around the point is
+## odd, so that holes work regardless of their orientation.
 def isinsidegeomlistXY(a,p):
 
     bb = geomlistbbox(a)
     if not isinsidebbox(bb,p):
         return False
-    p2 = add([1,1,0,1],bb[1])
-    if vclose(p2,p): ## did we randomly pick an outside point near the
-                     ## test point?
-        p2 = sub(bb[0],[1,1,0,1])
-    l = line(p,p2)
-
-    pp = intersectGeomListXY(l,a)
-    if pp == False:
-        return False
-    return len(pp) % 2 == 1
+    return windingnumberXY(a,p) % 2 == 1
 
 
 ## determint if the contents of a geometry list lie in the same x-y
 ## plane
 def isgeomlistXYPlanar(gl):
+    if isinstance(gl,TaggedGeom) and gl.kind:
+        return gl.kind in _glistkinds and gl.xyplane is not False
     if not isgeomlist(gl):
         return False
     pp = []
@@ -2323,8 +2641,17 @@ def isgeomlistXYPlanar(gl):
 ## for intersection testing.
 
 def intersectGeomListXY(g,gl,inside=True,params=False):
-    if not isgeomlistXYPlanar(gl + [ g ]):
+    if checking() and not (isgeomlist(gl) and _xyplane([gl,g]) is not False):
         raise ValueError('non-XY-planar or geometry arguments to intersectSimpleGeomListXY: {}'.format(vstr(gl + [ g])))
+    return _intersectGeomListXY(g,preparedpath(gl),inside,params)
+
+## no-checking version that takes the PreparedPath pp of the geometry
+## list.  When inside is true, only the elements whose bounding boxes
+## overlap g are tested, using the spatial index of the path.  Poly
+## and geometry list arguments g are prepared once, rather than once
+## per element.
+def _intersectGeomListXY(g,pp,inside=True,params=False):
+    gl = pp.source
     gTypes = ('point','line','arc','poly','glist')
     def typeString(geom):
         if ispoint(geom):
@@ -2335,7 +2662,7 @@ def intersectGeomListXY(g,gl,inside=True,params=False):
             return 'simple'
         elif ispoly(geom):
             return 'poly'
-        elif isgeomlist(g):
+        elif isgeomlist(geom):
             return 'glist'
         else:
             return False
@@ -2345,28 +2672,38 @@ def intersectGeomListXY(g,gl,inside=True,params=False):
     pnts = []
     uu1s = []
     uu2s = []
-    lengths, leng = __geomlistlength(gl)
+    lengths, leng = pp.lengths, pp.length
     if len(gl) == 1:
         if gtype == 'simple':
             return _intersectSimpleXY(g,gl[0],inside,params)
         if gtype == 'poly':
             r = intersectSimplePolyXY(gl[0],g,inside,params)
-            if params:
+            if params and r:
                 return [ r[1], r[0] ]
             else:
                 return r
         if gtype == 'glist':
             r = intersectGeomListXY(gl[0],g,inside,params)
-            if params:
+            if params and r:
                 return [ r[1], r[0] ]
             else:
                 return r
         else:
             raise ValueError('bad gtype in intersectGeomListXY, this should never happen')
         
-    dst = 0.0
+    gpp = None
+    if gtype in ('poly','glist'):
+        gpp = preparedpath(g)
     if len(gl) > 2:
-        for i in range(len(gl)):
+        if inside:
+            gbox = gpp.box() if gpp else _xybox(g)
+            if not _xyoverlap(gbox,pp.box()):
+                return False
+            cand = pp.index().query(gbox)
+        else:
+            cand = range(len(gl))
+        for i in cand:
+            dst = pp.cumlengths[i]
             g2 = gl[i]
             uu = []
             gtype2 = typeString(g2)
@@ -2376,41 +2713,52 @@ def intersectGeomListXY(g,gl,inside=True,params=False):
                 continue
             elif gtype == 'simple' and  gtype2 == 'simple':
                 try:
-                    uu = _intersectSimpleXY(g,g2,params=True)
+                    uu = _intersectSimpleXY(g,g2,inside,params=True)
                 except ValueError:
                     print('simple intersection problem with: ',vstr(g),' and ',vstr(g2))
                     raise
             elif gtype == 'simple' and  gtype2 == 'poly':
-                uu = intersectSimplePolyXY(g,g2,params=True)
+                uu = _intersectSimplePolyXY(g,preparedpath(g2),params=True,
+                                            prune=inside)
             elif gtype == 'poly' and gtype2 == 'simple':
-                z = intersectSimplePolyXY(g2,g,params=True)
+                z = _intersectSimplePolyXY(g2,gpp,params=True,prune=True)
                 if not isinstance(z,bool):
                     uu = [z[1],z[0]]
             elif gtype == 'poly' and gtype2 == 'poly':
                 zz1 = []
                 zz2 = []
-                for i in range(1,len(g)):
-                    zz = intersectSimplePolyXY(line(g[i-1],g[i]),
-                                               g2, params=True)
+                pp2 = preparedpath(g2)
+                for k in range(len(gpp.segments)):
+                    zz = _intersectSimplePolyXY(gpp.segments[k],pp2,
+                                                params=True,prune=True)
                     if not isinstance(zz,bool):
-                        zz1.append(zz[0])
-                        zz2.append(zz[1])
+                        for u,u2 in zip(zz[0],zz[1]):
+                            if u >= 0.0 and u <= 1.0:
+                                zz1.append((u*gpp.lengths[k]+
+                                            gpp.cumlengths[k])/gpp.length)
+                                zz2.append(u2)
                 if len(zz1) > 0:
                     uu = [ zz1,zz2 ]
             elif gtype == 'simple' and gtype2 == 'glist':
-                uu = intersectGeomListXY(g,g2,params=True)
+                uu = _intersectGeomListXY(g,preparedpath(g2),params=True)
             elif gtype == 'glist' and gtype2 == 'simple':
-                z = intersectGeomListXY(g2,g,params=True)
+                z = _intersectGeomListXY(g2,gpp,params=True)
                 if not isinstance(z,bool):
                     uu = [z[1],z[0]]
             elif gtype == 'glist' and gtype2 == 'glist':
                 zz1 = []
                 zz2 = []
-                for gg in g:
-                    zz = intersectGeomListXY(gg,g2,params=True)
-                    if not isinstance(z,bool):
-                        zz1.append(zz[0])
-                        zz2.append(zz[1])
+                pp2 = preparedpath(g2)
+                for k in range(len(gpp.segments)):
+                    if ispoint(gpp.segments[k]):
+                        continue
+                    zz = _intersectGeomListXY(gpp.segments[k],pp2,
+                                              params=True)
+                    if not isinstance(zz,bool):
+                        for u in zz[0]:
+                            zz1.append((u*gpp.lengths[k]+
+                                        gpp.cumlengths[k])/gpp.length)
+                        zz2 += zz[1]
                 if len(zz1) > 0:
                     uu = [zz1,zz2 ]
             else:
@@ -2430,7 +2778,6 @@ def intersectGeomListXY(g,gl,inside=True,params=False):
                            (uu[0][j] >= 0.0 and uu[0][j] <= 1.0)) and \
                            (uu[1][j] >= 0.0 and uu[1][j] <= 1.0):
                             pnts.append(sample(g,uu[0][j]))
-            dst = dst+lengths[i]
 
     if params:
         if len(uu1s) > 0:
@@ -2496,6 +2843,480 @@ def isInsideConvexPolyXY(a,poly):
         raise ValueError('bad poly length or non-XY points in insidepolyXY call')
     return _isInsideConvexPolyXY(a,poly)
 
+## type-tagged geometry
+## ---------------------
+
+## Validating a figure with ispoly(), isgeomlist(), or
+## isgeomlistXYPlanar() requires a full (and for nested geometry
+## lists, recursive) scan of the figure, and these checks are
+## repeated by every generalized function that the figure passes
+## through.  As an opt-in alternative, tag() validates a figure once
+## and returns a TaggedGeom, a thin list subclass that records the
+## kind of figure ('point', 'line', 'arc', 'poly', or 'glist') and
+## the z coordinate of the XY plane it lies in (or False if it does
+## not lie in a single XY plane).  Elements of a tagged geometry list
+## are themselves tagged.  The type and planarity tests check for the
+## tag, and answer in constant time when it is present.
+
+## Modifying a TaggedGeom with list methods like append() drops the
+## tag, so that the figure is fully re-checked from then on.  The tag
+## cannot see changes made to the points inside a figure, so don't
+## change the z coordinates of the points of a tagged figure in place.
+
+## kinds that are also, structurally, geometry lists
+_glistkinds = ('line','poly','glist')
+
+class TaggedGeom(list):
+    """list subclass that records a validated figure kind and XY plane"""
+
+    def __init__(self,a,kind,xyplane):
+        super().__init__(a)
+        self.kind = kind
+        self.xyplane = xyplane
+        self.prepared = None
+
+    def __deepcopy__(self,memo):
+        return TaggedGeom(copy.deepcopy(list(self),memo),
+                          self.kind,self.xyplane)
+
+    def __copy__(self):
+        return TaggedGeom(self,self.kind,self.xyplane)
+
+    def __reduce__(self):
+        return (TaggedGeom,(list(self),self.kind,self.xyplane))
+
+    ## any in-place modification invalidates the tag
+    def _untag(self):
+        self.kind = False
+        self.xyplane = False
+        self.prepared = None
+
+    def append(self,x):
+        self._untag()
+        super().append(x)
+
+    def extend(self,x):
+        self._untag()
+        super().extend(x)
+
+    def insert(self,i,x):
+        self._untag()
+        super().insert(i,x)
+
+    def remove(self,x):
+        self._untag()
+        super().remove(x)
+
+    def pop(self,*args):
+        self._untag()
+        return super().pop(*args)
+
+    def clear(self):
+        self._untag()
+        super().clear()
+
+    def reverse(self):
+        self._untag()
+        super().reverse()
+
+    def sort(self,*args,**kwargs):
+        self._untag()
+        super().sort(*args,**kwargs)
+
+    def __setitem__(self,i,x):
+        self._untag()
+        super().__setitem__(i,x)
+
+    def __delitem__(self,i):
+        self._untag()
+        super().__delitem__(i)
+
+    def __iadd__(self,x):
+        self._untag()
+        return super().__iadd__(x)
+
+    def __imul__(self,x):
+        self._untag()
+        return super().__imul__(x)
+
+def istagged(x):
+    """is ``x`` a figure with a valid type tag?"""
+    return isinstance(x,TaggedGeom) and x.kind != False
+
+## return the z coordinate of the XY plane that figure x lies in,
+## None if x is an empty geometry list, or False if x is not valid
+## geometry or does not lie in a single XY plane
+def _xyplane(x):
+    if isinstance(x,TaggedGeom) and x.kind:
+        return x.xyplane
+    if ispoint(x):
+        return x[2]
+    elif isline(x) or ispoly(x):
+        if isXYPlanar(x):
+            return x[0][2]
+        return False
+    elif isarc(x):
+        if len(x) > 2 and not vclose(x[2],point(0,0,1)):
+            return False
+        return x[0][2]
+    elif isinstance(x,list):
+        z = None
+        for g in x:
+            zz = _xyplane(g)
+            if zz is False:
+                return False
+            elif zz is None:
+                continue
+            elif z is None:
+                z = zz
+            elif abs(zz-z) > epsilon:
+                return False
+        return z
+    return False
+
+def tag(x):
+    """
+    Validate figure ``x`` once and return it as a ``TaggedGeom`` that
+    records its kind and XY planarity, so that subsequent type and
+    planarity checks take constant time.  Raise ``ValueError`` if
+    ``x`` is not valid geometry.  Points are not copied, so the tagged
+    figure shares them with ``x``.
+    """
+    if istagged(x):
+        return x
+    if ispoint(x):
+        kind = 'point'
+    elif isline(x):
+        kind = 'line'
+    elif isarc(x):
+        kind = 'arc'
+    elif ispoly(x):
+        kind = 'poly'
+    elif isinstance(x,list):
+        gl = list(map(lambda g: g if ispoint(g) else tag(g),x))
+        return TaggedGeom(gl,'glist',_xyplane(gl))
+    else:
+        raise ValueError('bad geometry passed to tag(): {}'.format(vstr(x)))
+    return TaggedGeom(x,kind,_xyplane(x))
+
+## prepared paths ----------------------------------------------
+
+## Sampling a poly or geometry list by arc length means finding the
+## segment that contains a given distance along the path.  The
+## PreparedPath class stores the segments of a path along with the
+## cumulative (prefix-sum) segment lengths, so that the segment can be
+## found by bisection rather than by walking the path.
+
+## padded XY bounding box [xmin,ymin,xmax,ymax] of a figure, used to
+## index path segments.  Unlike arcbbox(), arc boxes are exact, so
+## that a figure can never extend beyond its box.
+def _xybox(g,pad=10*epsilon):
+    if ispoint(g):
+        x0 = x1 = g[0]
+        y0 = y1 = g[1]
+    elif isline(g):
+        x0 = min(g[0][0],g[1][0])
+        x1 = max(g[0][0],g[1][0])
+        y0 = min(g[0][1],g[1][1])
+        y1 = max(g[0][1],g[1][1])
+    elif isarc(g):
+        cx,cy = g[0][0],g[0][1]
+        r = g[1][0]
+        angs = _arcboxangles(g)
+        xs = [cx+r*cos(a*pi2/360.0) for a in angs]
+        ys = [cy+r*sin(a*pi2/360.0) for a in angs]
+        x0,x1,y0,y1 = min(xs),max(xs),min(ys),max(ys)
+    elif isinstance(g,list) and len(g) == 0:
+        x0 = x1 = y0 = y1 = 0.0
+    elif isinstance(g,list):
+        bb = [_xybox(x,0.0) for x in g]
+        x0 = min(b[0] for b in bb)
+        y0 = min(b[1] for b in bb)
+        x1 = max(b[2] for b in bb)
+        y1 = max(b[3] for b in bb)
+    else:
+        raise ValueError('bad argument to _xybox: {}'.format(vstr(g)))
+    return [x0-pad,y0-pad,x1+pad,y1+pad]
+
+## do XY boxes b1 and b2 overlap (or touch)?
+def _xyoverlap(b1,b2):
+    return b1[0] <= b2[2] and b2[0] <= b1[2] and \
+        b1[1] <= b2[3] and b2[1] <= b1[3]
+
+class PreparedPath:
+    """arc-length index over the segments of a poly or geometry list"""
+
+    def __init__(self,a,closed=None,lengths=None,trusted=False):
+        ## a trusted argument is a geometry list that the caller has
+        ## already checked
+        if not trusted and ispoly(a):
+            self.ispoly = True
+            segs = []
+            lengths = []
+            for i in range(1,len(a)):
+                segs.append(line(a[i-1],a[i]))
+                lengths.append(dist(a[i-1],a[i]))
+            if closed is None:
+                closed = len(a) > 2 and dist(a[0],a[-1]) < epsilon
+        elif trusted or \
+             (isinstance(a,list) and not (checking() and not isgeomlist(a))):
+            self.ispoly = False
+            segs = list(a)
+            if lengths is None or len(lengths) != len(segs):
+                lengths = list(map(length,segs))
+            else:
+                lengths = list(lengths)
+            if closed is None:
+                closed = False
+        else:
+            raise ValueError('bad argument to PreparedPath: {}'.format(vstr(a)))
+
+        ## cumlengths[i] is the distance along the path to the start
+        ## of segment i, accumulated in order so that it matches the
+        ## running sum of a linear walk exactly
+        cum = [0.0]
+        d = 0.0
+        for l in lengths:
+            d += l
+            cum.append(d)
+
+        self.source = a
+        self.segments = segs
+        self.lengths = lengths
+        self.cumlengths = cum
+        self.length = d
+        self.closed = closed
+        self._boxes = None
+        self._box = None
+        self._index = None
+
+    def __repr__(self):
+        return 'PreparedPath({} segments, length {})'.format(
+            len(self.segments),self.length)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def extend(self,segs,lengths=None):
+        """
+        Append the segments ``segs`` to the end of the path, with
+        their ``lengths`` if they are already known.  Cached segment
+        boxes are extended, and the spatial index is rebuilt when it
+        is next needed.
+        """
+        if lengths is None:
+            lengths = list(map(length,segs))
+        d = self.length
+        for g,l in zip(segs,lengths):
+            self.segments.append(g)
+            self.lengths.append(l)
+            d += l
+            self.cumlengths.append(d)
+        self.length = d
+        if self._boxes is not None:
+            bb = [_xybox(g) for g in segs]
+            if self._box is not None and len(self._boxes) > 0:
+                for b in bb:
+                    self._box = [min(self._box[0],b[0]),min(self._box[1],b[1]),
+                                 max(self._box[2],b[2]),max(self._box[3],b[3])]
+            else:
+                self._box = None
+            self._boxes += bb
+        self._index = None
+
+    def boxes(self):
+        """
+        Return the list of padded XY bounding boxes
+        ``[xmin,ymin,xmax,ymax]`` of the path segments, computed on
+        first use.
+        """
+        if self._boxes is None:
+            self._boxes = [_xybox(g) for g in self.segments]
+        return self._boxes
+
+    def box(self):
+        """
+        Return the padded XY bounding box of the whole path.
+        """
+        if self._box is None:
+            bb = self.boxes()
+            if len(bb) == 0:
+                self._box = _xybox([])
+            else:
+                self._box = [min(b[0] for b in bb),min(b[1] for b in bb),
+                             max(b[2] for b in bb),max(b[3] for b in bb)]
+        return self._box
+
+    def index(self):
+        """
+        Return a ``spatial.BoxIndex`` over the XY bounding boxes of
+        the path segments, built on first use.
+        """
+        if self._index is None:
+            self._index = BoxIndex(self.boxes())
+        return self._index
+
+    ## return the index of the first segment that ends at or beyond
+    ## distance dst along the path, or len(self) if there is none
+    def _find(self,dst):
+        return bisect_left(self.cumlengths,dst,1) - 1
+
+    def _samplesegment(self,i,u):
+        if self.ispoly:
+            return sampleline(self.segments[i],u)
+        return sample(self.segments[i],u)
+
+    def sample(self,u):
+        """
+        Return the point at parameter ``u`` along the path.  Closed
+        paths are sampled at ``u % 1.0``.  For open paths, samples
+        with ``u<0`` or ``u>1`` are drawn from the first or last
+        segment, respectively.
+        """
+        if self.closed:
+            u = u % 1.0
+        dst = u * self.length
+        if u < 1.0:
+            i = self._find(dst)
+            if i >= len(self.segments):
+                return None
+            l = self.lengths[i]
+            uu = 1.0 - (self.cumlengths[i+1]-dst)/l
+            return self._samplesegment(i,uu)
+        else:
+            l = self.lengths[-1]
+            uu = (dst-self.length+l)/l
+            return self._samplesegment(len(self.segments)-1,uu)
+
+    def unsample(self,p):
+        """
+        Return the path parameter of point ``p``, or ``False`` if ``p``
+        does not lie on the path.  Point location can't be answered
+        by bisection on arc length, so this is a walk over the cached
+        segments.
+        """
+        segs = self.segments
+        lengths = self.lengths
+        cum = self.cumlengths
+        if not self.ispoly:
+            for i in range(len(segs)):
+                if lengths[i] <= 0.0:
+                    continue
+                uu = unsample(segs[i],p)
+                if not isinstance(uu,bool) and uu >= 0.0 and uu <= 1.0:
+                    return (uu*lengths[i]+cum[i])/self.length
+            return False
+
+        ## polys keep the unsamplepoly() semantics, which allow
+        ## extrapolation beyond the ends of open polylines
+        if len(segs) == 1:
+            return unsampleline(segs[0],p)
+        uu1 = unsampleline(segs[0],p)
+        if not isinstance(uu1,bool) and uu1 < 1.0 and\
+           (not self.closed or uu1 >= 0.0):
+            return uu1*lengths[0]/self.length
+        for i in range(1,len(segs)-1):
+            uu = unsampleline(segs[i],p)
+            if not isinstance(uu,bool) and uu >= 0.0 and uu < 1.0:
+                return (uu*lengths[i]+cum[i])/self.length
+        uu2 = unsampleline(segs[-1],p)
+        if not isinstance(uu2,bool) and uu2 >= 0.0 and\
+           (not self.closed or uu2 <= 1.0):
+            return (uu2*lengths[-1]+cum[-2])/self.length
+        return False
+
+    ## return the list of segment pieces spanning the interval
+    ## 0 <= u1 <= u2 <= 1
+    def _pieces(self,u1,u2):
+        if u1 < 0 or u1 > u2 or u2 < 0 or u2 > 1.0:
+            raise ValueError('bad parameters {} and {} passed to segmentgeomlist'.format(u1,u2))
+        segs = self.segments
+        cum = self.cumlengths
+        n = len(segs)
+        dst1 = u1 * self.length
+        dst2 = u2 * self.length
+        i = self._find(dst1)
+        if i >= n:
+            return []
+        def _segment(g,uu1,uu2):
+            if isline(g):
+                return segmentline(g,uu1,uu2)
+            elif isarc(g):
+                return segmentarc(g,uu1,uu2)
+            elif ispoly(g):
+                return segmentpoly(g,uu1,uu2)
+            elif isgeomlist(g):
+                return segmentgeomlist(g,uu1,uu2)
+            else:
+                raise NotImplementedError("don't know how to segment {}".format(g))
+
+        l = self.lengths[i]
+        uu = 1.0 - (cum[i+1]-dst1)/l
+        if dst2 < cum[i+1]:
+            return [ _segment(segs[i],uu,1.0 - (cum[i+1]-dst2)/l) ]
+        rgl = [ _segment(segs[i],uu,1.0) ]
+        j = max(i+1,self._find(dst2))
+        rgl += deepcopy(segs[i+1:j])
+        if j < n:
+            l = self.lengths[j]
+            rgl.append(_segment(segs[j],0.0,1.0 - (cum[j+1]-dst2)/l))
+        return rgl
+
+    def segment(self,u1,u2,reverse=False,closed=None):
+        """
+        Return the part of the path spanning parameters ``u1`` to
+        ``u2`` as a new poly (for poly paths) or geometry list.  On
+        closed paths the parameters wrap, so ``u2 < u1`` spans the
+        start of the path.  For geometry list paths, ``closed``
+        overrides the closure of the path, and ``reverse`` reverses
+        the resulting list.
+        """
+        if self.ispoly:
+            if self.closed:
+                u1 %= 1.0
+                u2 %= 1.0
+                if u2 < u1:
+                    return self.segment(u1,1.0-epsilon) + \
+                        self.segment(0.0,u2)
+            elif u1 < 0 or u2 < 0 or u1 > 1 or u2 > 1:
+                raise ValueError('parameters fall outside 0,1 interval: {},{}'.format(u1,u2))
+            if u2 < u1:
+                rp = PreparedPath(list(reversed(self.source)),self.closed)
+                return rp.segment(1.0-u1,1.0-u2)
+            sgl = self._pieces(u1,u2)
+            ply = []
+            for l in sgl:
+                ply.append(l[0])
+            ply.append(sgl[-1][1])
+            return ply
+        if closed is None:
+            closed = self.closed
+        if closed:
+            u1 %= 1.0
+            u2 %= 1.0
+            if u2 < u1:
+                if reverse:
+                    return reverseGeomList(self._pieces(0.0,u2)) + \
+                        reverseGeomList(self._pieces(u1,1.0-epsilon))
+                return self._pieces(u1,1.0-epsilon) + self._pieces(0.0,u2)
+        rgl = self._pieces(u1,u2)
+        if reverse:
+            rgl = reverseGeomList(rgl)
+        return rgl
+
+def preparedpath(a):
+    """
+    Return a ``PreparedPath`` for poly or geometry list ``a``.  The
+    path is cached on tagged figures (see ``tag()``) and rebuilt after
+    they are modified in place; for untagged figures a new path is
+    built on each call.
+    """
+    if isinstance(a,TaggedGeom) and a.kind in ('poly','glist'):
+        if a.prepared is None:
+            a.prepared = PreparedPath(a)
+        return a.prepared
+    return PreparedPath(a)
+
 ## Generalized computational geometry functions
 ## ----------------------------------------
 
@@ -2581,7 +3402,7 @@ def sample(x,u):
     elif ispoly(x):
         return samplepoly(x,u)
     elif isgeomlist(x):
-        return samplegeomlist(x,u)
+        return _samplegeomlist(x,u)
     else:
         raise ValueError("inappropriate type for sample(): " + str(x))
 
@@ -2604,7 +3425,7 @@ def unsample(x,p):
     elif ispoly(x):
         return unsamplepoly(x,p)
     elif isgeomlist(x):
-        raise NotImplementedError('unsampling geometry lists currently not supported')
+        return preparedpath(x).unsample(p)
     else:
         raise ValueError("inappropriate type for unasample(): "+str(x))
 
@@ -2629,6 +3450,410 @@ def segment(x,u1,u2):
 
     
     
+## batched sampling ------------------------------------------
+
+## sample_many() and unsample_many() are the batched counterparts of
+## sample() and unsample().  Parameters and points are processed as
+## NumPy arrays, with the same wrap-around and extrapolation behavior
+## as the single-parameter functions.  Where unsample() would return
+## False, unsample_many() returns NaN.
+
+def _samplearcangles(c):
+    start=c[1][1]
+    end=c[1][2]
+    if start != 0 and end != 360:
+        start = start % 360.0
+        end = end % 360.0
+        if end < start:
+            end += 360.0
+    if len(c) == 3 and dist(c[2],vect(0,0,1)) > epsilon:
+        raise NotImplementedError('non x-y plane arc sampling not yet supported')
+    return start,end
+
+def _samplepath_many(pp,us):
+    us = np.array(us,dtype=np.float64)
+    r = np.full((len(us),4),np.nan)
+    n = len(pp.segments)
+    if n == 0 or len(us) == 0:
+        return r
+    if pp.closed:
+        us = us % 1.0
+    cum = np.array(pp.cumlengths)
+    lengths = np.array(pp.lengths)
+    dst = us * pp.length
+    idx = np.searchsorted(cum[1:],dst,side='left')
+    hi = us >= 1.0
+    idx[hi] = n-1
+    ok = idx < n
+    idx = np.minimum(idx,n-1)
+    with np.errstate(divide='ignore',invalid='ignore'):
+        uu = 1.0 - (cum[idx+1]-dst)/lengths[idx]
+        uu[hi] = (dst[hi]-pp.length+lengths[-1])/lengths[-1]
+    if pp.ispoly or all(map(isline,pp.segments)):
+        a = np.array([l[0] for l in pp.segments],dtype=np.float64)
+        b = np.array([l[1] for l in pp.segments],dtype=np.float64)
+        w = uu[:,None]
+        r[:,:3] = (a[idx,:3]*(1.0-w) + b[idx,:3]*w)
+        r[:,3] = 1.0
+    else:
+        for i in np.unique(idx[ok]):
+            m = ok & (idx == i)
+            r[m] = _sample_many(pp.segments[i],uu[m])
+    r[~ok] = np.nan
+    return r
+
+## return an (N,4) array of samples of x at parameters us
+def _sample_many(x,us):
+    us = np.asarray(us,dtype=np.float64)
+    if ispoint(x):
+        return np.tile(np.array(x,dtype=np.float64),(len(us),1))
+    elif isline(x):
+        a = np.array(x[0],dtype=np.float64)
+        b = np.array(x[1],dtype=np.float64)
+        w = us[:,None]
+        r = a*(1.0-w) + b*w
+        r[:,3] = 1.0
+        return r
+    elif isarc(x):
+        if x[1][3] == -2:
+            us = 1.0-us
+        start,end = _samplearcangles(x)
+        rad = (((end-start)*us+start)%360.0)*pi2/360.0
+        r = np.empty((len(us),4))
+        r[:,0] = x[0][0] + np.cos(rad)*x[1][0]
+        r[:,1] = x[0][1] + np.sin(rad)*x[1][0]
+        r[:,2] = x[0][2]
+        r[:,3] = 1.0
+        return r
+    elif isinstance(x,PreparedPath):
+        return _samplepath_many(x,us)
+    elif ispoly(x) or isgeomlist(x):
+        return _samplepath_many(preparedpath(x),us)
+    else:
+        raise ValueError("inappropriate type for sample_many(): " + str(x))
+
+def sample_many(x,us):
+    """
+    Batched ``sample()``: sample figure ``x`` at each parameter in the
+    array ``us`` and return the resulting points as a ``PointArray``.
+    ``x`` may be a point, line, arc, poly, geometry list,
+    ``PreparedPath``, or an object such as a ``Polygon`` that provides
+    a ``sample_many()`` method.  Rows for parameters that ``sample()``
+    can't map to a point are NaN.
+    """
+    if hasattr(x,'sample_many'):
+        return x.sample_many(us)
+    us = np.atleast_1d(np.asarray(us,dtype=np.float64))
+    return PointArray._wrap(_sample_many(x,us))
+
+def _unsampleline_many(l,p):
+    a = np.array(l[0][:3],dtype=np.float64)
+    v1 = np.array(l[1][:3],dtype=np.float64) - a
+    v2 = p[:,:3] - a
+    z = np.cross(v1,v2)
+    len1 = sqrt(float(np.dot(v1,v1)))
+    with np.errstate(divide='ignore',invalid='ignore'):
+        u = np.sqrt(np.sum(v2*v2,axis=1))/len1
+    u = np.where(v2 @ v1 > 0,u,-u)
+    u[np.sqrt(np.sum(z*z,axis=1)) > epsilon] = np.nan
+    return u
+
+def _unsamplearc_many(c,p):
+    start=c[1][1]
+    end=c[1][2]
+    if start != 0 and end != 360:
+        start = start % 360.0
+        end = end % 360.0
+        if end < start:
+            end += 360.0
+    if close(start,end):
+        return np.full(len(p),np.nan)
+    if len(c) == 3 and dist(c[2],vect(0,0,1)) > epsilon:
+        raise NotImplementedError('non x-y plane arc unsampling not yet supported')
+    x = p[:,:3] - np.array(c[0][:3],dtype=np.float64)
+    ang = (np.arctan2(x[:,1],x[:,0]) % pi2)*360/pi2
+    if end > 360.0:
+        ang = np.where(ang <= end-360.0,ang+360.0,ang)
+    u = (ang-start)/(end-start)
+    if c[1][3] == -2:
+        u = 1.0-u
+    u[np.abs(np.sqrt(np.sum(x*x,axis=1))-c[1][0]) > epsilon] = np.nan
+    return u
+
+def _unsamplepath_many(pp,p):
+    segs = pp.segments
+    n = len(segs)
+    r = np.full(len(p),np.nan)
+    if n == 0 or len(p) == 0:
+        return r
+    cum = np.array(pp.cumlengths)
+    lengths = np.array(pp.lengths)
+    if pp.ispoly:
+        if n == 1:
+            return _unsampleline_many(segs[0],p)
+        uu = np.array([_unsampleline_many(l,p) for l in segs])
+        with np.errstate(invalid='ignore'):
+            ok = (uu >= 0.0) & (uu < 1.0)
+            ok[0] = uu[0] < 1.0
+            if pp.closed:
+                ok[0] &= uu[0] >= 0.0
+            ok[-1] = uu[-1] >= 0.0
+            if pp.closed:
+                ok[-1] &= uu[-1] <= 1.0
+    else:
+        uu = np.array([_unsample_many(g,p) for g in segs])
+        with np.errstate(invalid='ignore'):
+            ok = (uu >= 0.0) & (uu <= 1.0) & (lengths > 0.0)[:,None]
+    ## take the first segment that accepts each point
+    hit = ok.any(axis=0)
+    first = np.argmax(ok,axis=0)
+    cols = np.arange(len(p))
+    u = uu[first,cols]
+    r[hit] = ((u*lengths[first] + cum[first])/pp.length)[hit]
+    return r
+
+## return an (N,) array of parameters of points p on x, NaN where the
+## point doesn't lie on x
+def _unsample_many(x,p):
+    if ispoint(x):
+        d = p[:,:3] - np.array(x[:3],dtype=np.float64)
+        return np.where(np.sqrt(np.sum(d*d,axis=1)) < epsilon,0.0,np.nan)
+    elif isline(x):
+        return _unsampleline_many(x,p)
+    elif isarc(x):
+        return _unsamplearc_many(x,p)
+    elif isinstance(x,PreparedPath):
+        return _unsamplepath_many(x,p)
+    elif ispoly(x) or isgeomlist(x):
+        return _unsamplepath_many(preparedpath(x),p)
+    else:
+        raise ValueError("inappropriate type for unsample_many(): "+str(x))
+
+def unsample_many(x,pnts):
+    """
+    Batched ``unsample()``: return an array with the parameter of each
+    point in ``pnts`` (a ``PointArray``, array, or list of points) on
+    figure ``x``, with NaN for points that don't lie on the figure.
+    ``x`` may be any figure accepted by ``sample_many()``.
+    """
+    if hasattr(x,'unsample_many'):
+        return x.unsample_many(pnts)
+    p = _pointdata(pnts)
+    if p.ndim == 1:
+        p = p[None,:]
+    return _unsample_many(x,_padpoints(p))
+
+## winding numbers ---------------------------------------------
+
+## The winding number of a closed figure around a point is the number
+## of times the figure travels counterclockwise around it.  It is the
+## sum of the angles subtended by the edges of the figure, as seen
+## from the point, divided by 2 pi.
+
+## The angle subtended by a line is the angle between the vectors
+## from the point to its endpoints.  The angle subtended by an arc is
+## the angle subtended by its chord, plus a full turn if the point
+## lies in the circular segment between the chord and the arc, since
+## the arc and its chord then enclose the point.
+
+## Because the sum is rounded to the nearest whole turn, small gaps
+## between the ends of adjacent elements, such as those left by
+## Polygon outline construction, don't change the result unless the
+## point is as close to the gap as the gap is wide.  A ray-crossing
+## count, by contrast, is thrown off by any gap the ray passes through.
+
+## return [cx,cy,r,sx,sy,ex,ey,dir,full] for arc c, where (sx,sy) and
+## (ex,ey) are the counterclockwise start and end points, dir is 1 if
+## the arc is traversed counterclockwise and -1 if it is
+## sample-reversed, and full is 1 for circles
+def _arcends(c):
+    start,end = _samplearcangles(c)
+    cx = c[0][0]
+    cy = c[0][1]
+    r = c[1][0]
+    a0 = start*pi2/360.0
+    a1 = end*pi2/360.0
+    dr = -1.0 if c[1][3] == -2 else 1.0
+    full = 1.0 if iscircle(c) else 0.0
+    return [cx,cy,r,cx+r*cos(a0),cy+r*sin(a0),cx+r*cos(a1),cy+r*sin(a1),
+            dr,full]
+
+## angle subtended by the line (x0,y0)-(x1,y1) as seen from (px,py).
+## The sign comes from a robust orientation test, so that points
+## (nearly) in line with an edge are put on the correct side of it.
+def _lineangle(x0,y0,x1,y1,px,py):
+    ax = x0-px
+    ay = y0-py
+    bx = x1-px
+    by = y1-py
+    return atan2(orient2d((x0,y0),(x1,y1),(px,py)),ax*bx+ay*by)
+
+def _arcangle(c,px,py):
+    cx,cy,r,sx,sy,ex,ey,dr,full = _arcends(c)
+    dx = px-cx
+    dy = py-cy
+    inside = dx*dx+dy*dy < r*r
+    if full:
+        return dr*pi2 if inside else 0.0
+    a = _lineangle(sx,sy,ex,ey,px,py)
+    ## the arc bulges to the right of its counterclockwise chord
+    if inside and orient2d((sx,sy),(ex,ey),(px,py)) < 0.0:
+        a += pi2
+    return dr*a
+
+def _windingangle(x,px,py):
+    if ispoint(x):
+        return 0.0
+    elif isline(x):
+        return _lineangle(x[0][0],x[0][1],x[1][0],x[1][1],px,py)
+    elif isarc(x):
+        return _arcangle(x,px,py)
+    elif ispoly(x):
+        a = 0.0
+        for i in range(1,len(x)):
+            a += _lineangle(x[i-1][0],x[i-1][1],x[i][0],x[i][1],px,py)
+        return a
+    elif isinstance(x,list):
+        a = 0.0
+        for g in x:
+            a += _windingangle(g,px,py)
+        return a
+    else:
+        raise ValueError('bad geometry passed to windingnumberXY(): {}'.format(vstr(x)))
+
+def windingnumberXY(x,p):
+    """
+    Return the winding number of closed poly or geometry list ``x``
+    around point ``p``, which is positive for counterclockwise and
+    negative for clockwise figures.  Line edges are directed from their
+    first to their second point, and arcs run counterclockwise unless
+    they are sample-reversed.  Points on the boundary are classified
+    deterministically but arbitrarily.
+    """
+    return int(round(_windingangle(x,p[0],p[1])/pi2))
+
+## batched inside testing --------------------------------------
+
+## isinside_many() is the batched counterpart of isinsideXY().  Closed
+## figures are classified by the parity of their winding number,
+## computed with the same subtended-angle sums as windingnumberXY(),
+## for all points and edges at once.
+
+## maximum size of the points by edges angle table built at once
+_insidechunk = 1 << 20
+
+## collect the edges of figure x, appending line edges as
+## [x0,y0,x1,y1] to lines and arcs as _arcends() lists to arcs
+def _insideedges(x,lines,arcs):
+    if ispoint(x):
+        return
+    elif isline(x):
+        lines.append([x[0][0],x[0][1],x[1][0],x[1][1]])
+    elif isarc(x):
+        arcs.append(_arcends(x))
+    elif ispoly(x):
+        for i in range(1,len(x)):
+            lines.append([x[i-1][0],x[i-1][1],x[i][0],x[i][1]])
+    elif isinstance(x,list):
+        for g in x:
+            _insideedges(g,lines,arcs)
+    else:
+        raise ValueError('bad geometry passed to isinside_many(): {}'.format(vstr(x)))
+
+def _lineangle_many(x0,y0,x1,y1,px,py):
+    ax = x0-px
+    ay = y0-py
+    bx = x1-px
+    by = y1-py
+    return np.arctan2(orient2d_many(x0,y0,x1,y1,px,py),ax*bx+ay*by)
+
+## return the winding numbers of closed figure x around the points
+## (px,py)
+def _winding_many(x,px,py):
+    lines = []
+    arcs = []
+    _insideedges(x,lines,arcs)
+    L = np.array(lines,dtype=np.float64).reshape((-1,4))
+    A = np.array(arcs,dtype=np.float64).reshape((-1,9))
+    w = np.zeros(len(px),dtype=np.int64)
+    step = max(1,_insidechunk // max(1,len(L)+len(A)))
+    for k in range(0,len(px),step):
+        x0 = px[k:k+step,None]
+        y0 = py[k:k+step,None]
+        ang = np.zeros(len(x0))
+        if len(L) > 0:
+            ang += np.sum(_lineangle_many(L[:,0],L[:,1],L[:,2],L[:,3],
+                                          x0,y0),axis=1)
+        if len(A) > 0:
+            cx,cy,r,sx,sy,ex,ey,dr,full = A.T
+            dx = x0-cx
+            dy = y0-cy
+            inside = dx*dx+dy*dy < r*r
+            a = _lineangle_many(sx,sy,ex,ey,x0,y0)
+            seg = inside & (orient2d_many(sx,sy,ex,ey,x0,y0) < 0.0)
+            a = np.where(seg,a+pi2,a)
+            a = np.where(full > 0.0,np.where(inside,pi2,0.0),a)
+            ang += np.sum(dr*a,axis=1)
+        w[k:k+step] = np.round(ang/pi2).astype(np.int64)
+    return w
+
+def _inbbox_many(bb,p):
+    return np.all((p[:,:3] >= np.array(bb[0][:3])) &
+                  (p[:,:3] <= np.array(bb[1][:3])),axis=1)
+
+def isinside_many(x,pnts):
+    """
+    Batched ``isinsideXY()``: return a boolean array that is true for
+    each point in ``pnts`` (a ``PointArray``, array, or list of points)
+    that lies inside figure ``x``.  ``x`` may be a point, line, arc,
+    poly, or geometry list, or an object such as a ``Polygon`` that
+    provides an ``isinside_many()`` method.  As with ``isinsideXY()``,
+    points, lines, open polys and non-circle arcs contain the points
+    that lie on them (arcs including their "pizza slice"), while
+    circles, closed polys and geometry lists contain the points that
+    lie within them.
+    """
+    if hasattr(x,'isinside_many'):
+        return x.isinside_many(pnts)
+    p = _pointdata(pnts)
+    if p.ndim == 1:
+        p = p[None,:]
+    p = _padpoints(p)
+    if ispoint(x):
+        return dist_many(p,x) < epsilon
+    elif isline(x):
+        a = np.array(x[0][:2],dtype=np.float64)
+        d = np.array(x[1][:2],dtype=np.float64) - a
+        v = p[:,:2] - a
+        dd = float(np.dot(d,d))
+        t = np.clip(v @ d / dd,0.0,1.0) if dd > 0.0 else np.zeros(len(p))
+        e = v - t[:,None]*d
+        return np.sqrt(np.sum(e*e,axis=1)) < epsilon
+    elif isarc(x):
+        v = p[:,:3] - np.array(x[0][:3],dtype=np.float64)
+        r = np.sqrt(np.sum(v*v,axis=1)) <= x[1][0]
+        if iscircle(x):
+            return r
+        start = x[1][1]%360.0
+        end = x[1][2]%360.0
+        if end < start:
+            end += 360.0
+        ang = (np.arctan2(v[:,1],v[:,0]) % pi2)*360/pi2
+        if end <= 360.0:
+            return r & (ang >= start) & (ang <= end)
+        return r & ((ang >= start) | (ang <= end-360.0))
+    elif ispoly(x):
+        if not (len(x) > 2 and dist(x[0],x[-1]) < epsilon):
+            return ~np.isnan(unsample_many(x,p))
+        r = _inbbox_many(polybbox(x),p)
+    elif isgeomlist(x):
+        r = _inbbox_many(geomlistbbox(x),p)
+    else:
+        raise ValueError("bad thing passed to isinside_many: {}".format(x))
+    if r.any():
+        r[r] = _winding_many(x,p[r,0],p[r,1]) % 2 == 1
+    return r
+
 def isinsideXY(x,p):
     if ispoint(x):
         return isinsidepointXY(x,p)
@@ -2831,6 +4056,12 @@ def mirror(x,plane):
 ## if no intersections
 
 def _intersectSimpleXY(g1,g2,inside=True,params=False):
+    ## elements whose boxes are apart can't intersect within both.
+    ## This holds for parameters too, so callers that want the
+    ## parameters of intersections beyond the ends of the elements
+    ## must pass inside=False
+    if inside and not _xyoverlap(_xybox(g1),_xybox(g2)):
+        return False
     g1line = True
     g2line = True
     if isarc(g1):
@@ -2861,10 +4092,12 @@ def _intersectSimpleXY(g1,g2,inside=True,params=False):
 ## Value-safe simple wrapper for calculation of intersection of
 ## non-compound geometric elements
 def intersectSimpleXY(g1,g2,inside=True,params=False):
+    if not checking():
+        return _intersectSimpleXY(g1,g2,inside,params)
     if not (isline(g1) or isarc(g1)) \
        or not (isline(g2) or isarc(g2)):
         raise ValueError('bad geometry passed to intersectSimpleXY')
-    if not isgeomlistXYPlanar([g1,g2]):
+    if _xyplane([g1,g2]) is False:
         raise ValueError('geometry not in same XY plane in intersectSimpleXY')
 
     return _intersectSimpleXY(g1,g2,inside,params)
@@ -2911,16 +4144,26 @@ def intersectXY(g1,g2,inside=True,params=False):
             closed = False
             if len(g1) > 2 and dist(g1[0],g1[-1]) < epsilon:
                 closed= True
-            uu1s = uu2s = []
+            uu1s = []
+            uu2s = []
             pnts = []
-            lines, lengths, leng =  __lineslength(g1)
+            pp = preparedpath(g1)
+            lines, lengths, leng = pp.segments, pp.lengths, pp.length
             if lines == []:
                 return False
             if len(lines) == 1:
                 return intersectSimplePolyXY(lines[0],g2,inside,params)
-            dst = 0.0
+            pp2 = preparedpath(g2)
+            if closed and pp2.closed and not _xyoverlap(pp.box(),pp2.box()):
+                return False
             for i in range(len(lines)):
-                uu = intersectSimplePolyXY(lines[i],g2,params=True)
+                dst = pp.cumlengths[i]
+                ## only the end lines of an open poly are extended, so
+                ## the other lines need only be tested against the
+                ## segments of g2 that overlap them
+                prune = closed or (i > 0 and i < len(lines)-1)
+                uu = _intersectSimplePolyXY(lines[i],pp2,params=True,
+                                            prune=prune)
                 if not uu == False:
                     for j in range(len(uu[0])):
                         if (((closed or (i > 0 and i < len(lines)-1)) and \
@@ -2938,7 +4181,7 @@ def intersectXY(g1,g2,inside=True,params=False):
                                     pnts.append(sample(g2,uu[1][j]))
             if params:
                 if len(uu1s) > 0:
-                    return [ uu2s, uu1s]
+                    return [ uu1s, uu2s]
                 else:
                     return False
             else:
@@ -2961,7 +4204,165 @@ def intersectXY(g1,g2,inside=True,params=False):
         return intersectGeomListXY(g1,g2,inside,params)
     else:
         raise ValueError('very bad thing, this should never happen')
-    
+
+## sweep-line intersection ----------------------------------------
+
+## intersectXY() finds the intersections of one figure with another by
+## walking the elements of one and querying the other.  To find every
+## crossing between two large figures, or the places where a single
+## outline crosses itself, the functions below flatten the figures
+## into line and arc pieces and sweep a vertical line across them in
+## order of their left edges.  Only pieces whose x extent spans the
+## sweep line are kept active, so the analytic intersection functions
+## are called only for pairs of pieces whose bounding boxes overlap.
+## This is sweep-and-prune rather than an ordered sweep: each new
+## piece is tested against every active piece, so the cost is
+## O(n log n + a) for n pieces, where a is the number of pairs that
+## are active together.  For outlines, which any vertical line
+## crosses only a few times, a is close to the number of overlapping
+## boxes, but many long pieces spanning the same x range make it
+## O(n^2) in the worst case.
+
+## flatten figure g into a list of [piece, u0, du] entries, where the
+## figure parameter of piece parameter u is u0 + u*du.  Points and
+## zero-length elements are dropped.
+def _sweeppieces(g,u0=0.0,du=1.0,out=None):
+    if out is None:
+        out = []
+    if isline(g) or isarc(g):
+        out.append([g,u0,du])
+    elif ispoly(g) or (isinstance(g,list) and not ispoint(g)):
+        pp = preparedpath(g)
+        if pp.length <= 0.0:
+            return out
+        for i in range(len(pp.segments)):
+            if pp.lengths[i] > 0.0 and not ispoint(pp.segments[i]):
+                _sweeppieces(pp.segments[i],
+                             u0 + du*pp.cumlengths[i]/pp.length,
+                             du*pp.lengths[i]/pp.length,out)
+    return out
+
+## return the sorted list of index pairs (i,j), i < j, of boxes that
+## overlap, found by sweeping across the boxes in order of xmin.  Each
+## box is checked against all the boxes whose x extent is active, so
+## this is O(n^2) in the worst case.
+def _sweeppairs(boxes):
+    order = sorted(range(len(boxes)),key=lambda i: boxes[i][0])
+    active = {}
+    heap = []
+    pairs = []
+    for i in order:
+        b = boxes[i]
+        while heap and heap[0][0] < b[0]:
+            del active[heappop(heap)[1]]
+        for j,bb in active.items():
+            if bb[1] <= b[3] and bb[3] >= b[1]:
+                pairs.append((j,i) if j < i else (i,j))
+        active[i] = b
+        heappush(heap,(b[2],i))
+    pairs.sort()
+    return pairs
+
+## intersection parameters of pieces a and b that fall within both,
+## as (ua,ub) pairs of piece parameters
+def _sweepintersect(a,b):
+    uu = _intersectSimpleXY(a[0],b[0],params=True)
+    r = []
+    if isinstance(uu,bool) or len(uu) == 0:
+        return r
+    for ua,ub in zip(uu[0],uu[1]):
+        ua = float(ua)
+        ub = float(ub)
+        if ua >= 0.0 and ua <= 1.0 and ub >= 0.0 and ub <= 1.0:
+            r.append((ua,ub))
+    return r
+
+def sweepIntersectXY(g1,g2):
+    """
+    Find every intersection of figures ``g1`` and ``g2``, which lie in
+    the same XY plane, using a sweep line over their line and arc
+    pieces.  Return the intersection parameters on each figure as
+    ``[[u1s],[u2s]]``, as ``intersectXY(g1,g2,params=True)`` does, or
+    ``False`` if there are no intersections.
+
+    The cost grows with the number of piece pairs whose x extents
+    overlap, which is O(n^2) in the worst case for n pieces.
+    """
+    if checking() and _xyplane([g1,g2]) is False:
+        raise ValueError('non-XY-planar or bad arguments to sweepIntersectXY')
+    p1 = _sweeppieces(g1)
+    p2 = _sweeppieces(g2)
+    n = len(p1)
+    pieces = p1 + p2
+    uu1s = []
+    uu2s = []
+    for i,j in _sweeppairs([_xybox(p[0]) for p in pieces]):
+        if i < n and j >= n:
+            a = pieces[i]
+            b = pieces[j]
+            for ua,ub in _sweepintersect(a,b):
+                uu1s.append(a[1]+ua*a[2])
+                uu2s.append(b[1]+ub*b[2])
+    if len(uu1s) > 0:
+        return [ uu1s, uu2s ]
+    return False
+
+def selfIntersectXY(g):
+    """
+    Find the places where figure ``g``, a poly or geometry list that
+    lies in the XY plane, intersects itself.  Return the pairs of
+    parameters ``u1 < u2`` of each self-intersection as
+    ``[[u1s],[u2s]]``, or ``False`` if there are none.  Joints, where
+    exactly two pieces of the figure meet end to end, are not counted
+    as intersections.
+    """
+    if checking() and _xyplane(g) is False:
+        raise ValueError('non-XY-planar or bad argument to selfIntersectXY')
+    pieces = _sweeppieces(g)
+    if len(pieces) < 2:
+        return False
+
+    ## piece end points, hashed by grid cell
+    tol = 10*epsilon
+    cells = {}
+    for p in pieces:
+        for u in (0.0,1.0):
+            e = sample(p[0],u)
+            k = (floor(e[0]/tol),floor(e[1]/tol))
+            cells.setdefault(k,[]).append(e)
+    def _ends(x):
+        k0 = floor(x[0]/tol)
+        k1 = floor(x[1]/tol)
+        n = 0
+        for i in (k0-1,k0,k0+1):
+            for j in (k1-1,k1,k1+1):
+                for e in cells.get((i,j),()):
+                    if dist(e,x) < tol:
+                        n += 1
+        return n
+
+    def _isend(u):
+        return u < epsilon or u > 1.0-epsilon
+
+    uu1s = []
+    uu2s = []
+    for i,j in _sweeppairs([_xybox(p[0]) for p in pieces]):
+        a = pieces[i]
+        b = pieces[j]
+        for ua,ub in _sweepintersect(a,b):
+            if _isend(ua) and _isend(ub) and \
+               _ends(sample(a[0],ua)) == 2:
+                continue
+            u1 = a[1]+ua*a[2]
+            u2 = b[1]+ub*b[2]
+            if u2 < u1:
+                u1,u2 = u2,u1
+            uu1s.append(u1)
+            uu2s.append(u2)
+    if len(uu1s) > 0:
+        return [ uu1s, uu2s ]
+    return False
+
         
             
             
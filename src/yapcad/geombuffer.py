@@ -0,0 +1,294 @@
+## columnar (struct-of-arrays) storage for yapCAD geometry lists
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+## A geometry list is a nested Python list of points, lines, arcs and
+## polys, and every generic operation on it has to rediscover the type
+## of each element before working on it one scalar at a time.  The
+## GeometryBuffer class flattens a geometry list into typed tables,
+## one per element type, so that operations like length, bounding
+## box, and translation can be computed for all elements of a type in
+## a single vectorized NumPy operation.
+
+## The tables are:
+##   points:  (K,4) array of points
+##   lines:   (N,2,4) array of line endpoints
+##   arcs:    (M,4) centers, (M,) radius, start, and end angles, an
+##            (M,) samplereverse flag, and (M,4) plane normals with an
+##            (M,) flag recording whether the normal was specified
+##   polys:   (P+1,) offsets into a (V,4) vertex array, such that poly
+##            i is vertices[offsets[i]:offsets[i+1]]
+
+## In addition, the kinds and indices arrays record the type of each
+## element in the (flattened) original order, and the position of that
+## element in its type table, so that conversion back to a geometry
+## list preserves ordering.  Nested geometry lists are flattened.
+
+from math import *
+import numpy as np
+from yapcad.geom import *
+import yapcad.xform as xform
+
+## element kind codes
+POINT = 0
+LINE = 1
+ARC = 2
+POLY = 3
+
+class GeometryBuffer:
+    """columnar, struct-of-arrays representation of a flattened geometry list"""
+
+    def __init__(self,gl=False):
+        pnts = []
+        lns = []
+        arcs = []
+        plys = []
+        kinds = []
+        indices = []
+
+        def _add(g):
+            if ispoint(g):
+                kinds.append(POINT)
+                indices.append(len(pnts))
+                pnts.append(g)
+            elif isline(g):
+                kinds.append(LINE)
+                indices.append(len(lns))
+                lns.append(g)
+            elif isarc(g):
+                kinds.append(ARC)
+                indices.append(len(arcs))
+                arcs.append(g)
+            elif ispoly(g):
+                kinds.append(POLY)
+                indices.append(len(plys))
+                plys.append(g)
+            elif isgeomlist(g):
+                for gg in g:
+                    _add(gg)
+            else:
+                raise ValueError('bad argument to GeometryBuffer constructor: {}'.format(vstr(g)))
+
+        if isinstance(gl,GeometryBuffer):
+            gl = gl.geomlist()
+        if not (isinstance(gl,bool) and gl == False):
+            _add(gl)
+
+        self.kinds = np.array(kinds,dtype=np.int8)
+        self.indices = np.array(indices,dtype=np.int64)
+
+        self.points = np.array(pnts,dtype=np.float64).reshape((-1,4))
+        self.lines = np.array(lns,dtype=np.float64).reshape((-1,2,4))
+
+        self.arccenters = np.array([a[0] for a in arcs],
+                                   dtype=np.float64).reshape((-1,4))
+        self.radius = np.array([a[1][0] for a in arcs],dtype=np.float64)
+        self.start = np.array([a[1][1] for a in arcs],dtype=np.float64)
+        self.end = np.array([a[1][2] for a in arcs],dtype=np.float64)
+        self.samplereverse = np.array([a[1][3] == -2 for a in arcs],
+                                      dtype=bool)
+        self.hasnormal = np.array([len(a) == 3 for a in arcs],dtype=bool)
+        self.normals = np.array([a[2] if len(a) == 3 else [0,0,1,1]
+                                 for a in arcs],
+                                dtype=np.float64).reshape((-1,4))
+
+        offsets = [0]
+        for p in plys:
+            offsets.append(offsets[-1]+len(p))
+        self.offsets = np.array(offsets,dtype=np.int64)
+        self.vertices = np.array([p for ply in plys for p in ply],
+                                 dtype=np.float64).reshape((-1,4))
+
+    def __repr__(self):
+        return 'GeometryBuffer({} points, {} lines, {} arcs, {} polys)'.format(
+            len(self.points),len(self.lines),len(self.radius),
+            len(self.offsets)-1)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    ## shallow structural copy with fresh coordinate arrays, used by
+    ## the transformation methods
+    def _copy(self):
+        b = GeometryBuffer.__new__(GeometryBuffer)
+        for k,v in self.__dict__.items():
+            setattr(b,k,v.copy())
+        return b
+
+    ## return True for arcs that are flagged as full circles
+    def _circles(self):
+        return (self.start == 0) & (self.end == 360)
+
+    ## normalized start and end angles, with end >= start, as used by
+    ## samplearc() and arclength()
+    def _arcangles(self):
+        circ = self._circles()
+        s = self.start % 360.0
+        e = self.end % 360.0
+        e = np.where(s > e, e + 360.0, e)
+        s = np.where(circ,0.0,s)
+        e = np.where(circ,360.0,e)
+        return s,e
+
+    def _linelengths(self):
+        d = self.lines[:,1,:3] - self.lines[:,0,:3]
+        return np.sqrt(np.sum(d*d,axis=1))
+
+    def _arclengths(self):
+        s,e = self._arcangles()
+        return pi2*self.radius*(e-s)/360.0
+
+    def _polylengths(self):
+        if len(self.offsets) < 2:
+            return np.zeros(0)
+        d = self.vertices[1:,:3] - self.vertices[:-1,:3]
+        cs = np.concatenate(([0.0],np.cumsum(np.sqrt(np.sum(d*d,axis=1)))))
+        return cs[self.offsets[1:]-1] - cs[self.offsets[:-1]]
+
+    def lengths(self):
+        """return an array of element lengths, in element order"""
+        r = np.zeros(len(self.kinds))
+        r[self.kinds == LINE] = self._linelengths()
+        r[self.kinds == ARC] = self._arclengths()
+        r[self.kinds == POLY] = self._polylengths()
+        return r
+
+    def length(self):
+        """return the total length of all elements"""
+        return float(np.sum(self._linelengths()) +
+                     np.sum(self._arclengths()) +
+                     np.sum(self._polylengths()))
+
+    ## exact bounding boxes of arcs, computed from the arc endpoints
+    ## and any axis-extreme points that fall within the swept angle
+    def _arcbboxes(self):
+        m = len(self.radius)
+        if m == 0:
+            return np.zeros((0,2,4))
+        s,e = self._arcangles()
+        cand = np.arange(8)*90.0
+        angs = np.concatenate((s[:,None],e[:,None],
+                               np.broadcast_to(cand,(m,8))),axis=1)
+        mask = np.ones(angs.shape,dtype=bool)
+        mask[:,2:] = (cand >= s[:,None]) & (cand <= e[:,None])
+        rad = np.radians(angs)
+        xs = self.arccenters[:,0:1] + self.radius[:,None]*np.cos(rad)
+        ys = self.arccenters[:,1:2] + self.radius[:,None]*np.sin(rad)
+        bb = np.zeros((m,2,4))
+        bb[:,0,0] = np.min(np.where(mask,xs,np.inf),axis=1)
+        bb[:,0,1] = np.min(np.where(mask,ys,np.inf),axis=1)
+        bb[:,1,0] = np.max(np.where(mask,xs,-np.inf),axis=1)
+        bb[:,1,1] = np.max(np.where(mask,ys,-np.inf),axis=1)
+        bb[:,:,2] = self.arccenters[:,None,2]
+        bb[:,:,3] = 1.0
+        return bb
+
+    def bboxes(self):
+        """return an `(E,2,4)` array of per-element bounding boxes, in
+        element order"""
+        r = np.zeros((len(self.kinds),2,4))
+        r[:,:,3] = 1.0
+        ee = np.array([epsilon,epsilon,epsilon])
+        pk = self.kinds == POINT
+        r[pk,0,:3] = self.points[:,:3] - ee
+        r[pk,1,:3] = self.points[:,:3] + ee
+        lk = self.kinds == LINE
+        r[lk,0,:3] = np.min(self.lines[:,:,:3],axis=1)
+        r[lk,1,:3] = np.max(self.lines[:,:,:3],axis=1)
+        r[self.kinds == ARC] = self._arcbboxes()
+        if len(self.offsets) > 1:
+            plk = self.kinds == POLY
+            v = self.vertices[:,:3]
+            r[plk,0,:3] = np.minimum.reduceat(v,self.offsets[:-1],axis=0)
+            r[plk,1,:3] = np.maximum.reduceat(v,self.offsets[:-1],axis=0)
+        return r
+
+    def bbox(self):
+        """return the three-dimensional bounding box of all elements, or
+        ``False`` if the buffer is empty"""
+        if len(self.kinds) == 0:
+            return False
+        bbs = self.bboxes()
+        return [ np.min(bbs[:,0,:],axis=0).tolist(),
+                 np.max(bbs[:,1,:],axis=0).tolist() ]
+
+    def translate(self,delta):
+        """return a new buffer translated by the vector ``delta``"""
+        b = self._copy()
+        d = np.array(delta[:3],dtype=np.float64)
+        b.points[:,:3] += d
+        b.lines[:,:,:3] += d
+        b.arccenters[:,:3] += d
+        b.vertices[:,:3] += d
+        return b
+
+    def transform(self,m):
+        """return a new buffer transformed by the ``xform.Matrix`` ``m``.
+        Arcs can only be transformed by matrices that act as a rotation
+        and uniform scaling in the XY plane."""
+        if not isinstance(m,xform.Matrix):
+            raise ValueError('bad transformation matrix passed to transform')
+        M = np.array([m.getrow(i) for i in range(4)],dtype=np.float64)
+        b = self._copy()
+        b.points = b.points @ M.T
+        b.lines = b.lines @ M.T
+        b.vertices = b.vertices @ M.T
+        if len(b.radius) > 0:
+            a11 = M[0][0]
+            a12 = M[0][1]
+            a21 = M[1][0]
+            a22 = M[1][1]
+            if not (close(a11,a22) and close(a12,-a21)) or \
+               a11*a22 - a12*a21 < epsilon:
+                raise NotImplementedError('arc transformation only supported for XY rotation and uniform scaling')
+            sf = sqrt(a11*a11 + a21*a21)
+            ang = atan2(a21,a11)*360.0/pi2
+            b.arccenters = b.arccenters @ M.T
+            b.radius *= sf
+            circ = self._circles()
+            b.start = np.where(circ,b.start,b.start+ang)
+            b.end = np.where(circ,b.end,b.end+ang)
+        return b
+
+    def geomlist(self):
+        """convert the buffer back to an ordinary (flat) geometry list"""
+        gl = []
+        for k,i in zip(self.kinds.tolist(),self.indices.tolist()):
+            if k == POINT:
+                gl.append(self.points[i].tolist())
+            elif k == LINE:
+                gl.append(self.lines[i].tolist())
+            elif k == ARC:
+                w = -2 if self.samplereverse[i] else -1
+                a = [ self.arccenters[i].tolist(),
+                      [ float(self.radius[i]), float(self.start[i]),
+                        float(self.end[i]), w ] ]
+                if self.hasnormal[i]:
+                    a.append(self.normals[i].tolist())
+                gl.append(a)
+            else:
+                gl.append(self.vertices[self.offsets[i]:
+                                        self.offsets[i+1]].tolist())
+        return gl
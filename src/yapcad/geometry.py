@@ -42,9 +42,14 @@ class Geometry:
     def _updateInternals(self):
         return
 
-    def geom(self):
-        if self.update:
+    ## return the geometry list.  If copy is False, return the
+    ## internal list itself rather than a copy, which is faster but
+    ## must be treated as read-only by the caller.
+    def geom(self,copy=True):
+        if self._update:
             self._updateInternals()
+        if not copy:
+            return self._elem
         return deepcopy(self._elem)
 
     
@@ -62,7 +67,15 @@ class SampleGeometry(Geometry):
     def sample(self,u):
         if self._update:
             self._updateInternals()
-        return sample(self.geom(),u)
+        return sample(self.geom(copy=False),u)
+
+    ## batched sample(), returning a PointArray
+    def sample_many(self,us):
+        return sample_many(self.geom(copy=False),us)
+
+    ## batched unsample(), returning an array of parameters
+    def unsample_many(self,pnts):
+        return unsample_many(self.geom(copy=False),pnts)
     
 
 class IntersectGeometry(SampleGeometry):
@@ -77,5 +90,5 @@ class IntersectGeometry(SampleGeometry):
     def intersectXY(self,g,inside=True,params=False):
         if self._update:
             self._updateInternals()
-        return intersectXY(g,self.geom(),inside,params)
+        return intersectXY(g,self.geom(copy=False),inside,params)
     
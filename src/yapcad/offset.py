@@ -0,0 +1,483 @@
+## offset curves of closed figures for yapCAD
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+## The offset of a closed figure by a distance d is the boundary of
+## the set of points within d of the region it encloses (d > 0), or of
+## the points of the region further than -d from its boundary (d < 0).
+## For figures made of lines and arcs the offset is again made of
+## lines and arcs: each line moves d along its normal, each arc
+## changes its radius by d, and convex corners are rounded off by arcs
+## of radius d centered on the corner.
+
+## offsetXY() builds this raw offset for each closed loop of the
+## figure, which overlaps itself wherever the figure has concave
+## corners, features narrower than 2d, or loops closer together than
+## 2d.  The self-intersections of the raw offset are found with the
+## same sweep as selfIntersectXY(), and the raw offset is cut at each
+## of them into runs.  A run is part of the result if its midpoint is
+## at least d from the original figure, which is checked against the
+## original elements that a BoxIndex reports to be nearby.  The kept
+## runs are then chained back together into closed loops.  Apart from
+## the sweep, each step is linear in the number of elements.
+
+## Loops are first oriented by their nesting, so that outer loops run
+## counterclockwise and holes clockwise.  The region always lies to
+## the left of the direction of travel, and the offset is taken to the
+## right of it.  Offset loops keep this orientation.
+
+from math import *
+from yapcad.geom import *
+from yapcad.geom import _samplearcangles, _sweeppairs, _sweepintersect, _xybox
+from yapcad.spatial import BoxIndex
+
+## ends of elements closer than this are taken to meet
+_jointol = 100*epsilon
+
+## runs that come closer than d-_disttol to the original figure are
+## discarded
+_disttol = 10*epsilon
+
+## Past _elements(), everything handled here is a line or an arc, and
+## arcs are told apart by the negative w of their second entry
+## without the full type checks.
+
+def _isarc(e):
+    return e[1][3] < 0
+
+def _length(e):
+    return arclength(e) if _isarc(e) else linelength(e)
+
+def _sample(e,u):
+    return samplearc(e,u) if _isarc(e) else sampleline(e,u)
+
+## the lines and arcs of figure x, in order.  Lines shorter than
+## _jointol are merged into the line before them, and other elements
+## that short are dropped, leaving a gap that the joins bridge.
+def _elements(x,out):
+    if isline(x):
+        _addline(x[0],x[1],out)
+    elif isarc(x):
+        if iscircle(x) or arclength(x) >= _jointol:
+            out.append(x)
+    elif ispoint(x):
+        pass
+    elif ispoly(x):
+        for i in range(1,len(x)):
+            _addline(x[i-1],x[i],out)
+    elif isinstance(x,list):
+        for g in x:
+            _elements(g,out)
+    else:
+        raise ValueError('bad geometry passed to offsetXY(): {}'.format(vstr(x)))
+    return out
+
+def _addline(p0,p1,out):
+    if dist(p0,p1) >= _jointol:
+        out.append([p0,p1])
+    elif out and not _isarc(out[-1]):
+        out[-1] = [out[-1][0],p1]
+
+## split a list of elements into closed loops, each of which ends
+## where it starts
+def _loops(elems):
+    loops = []
+    cur = []
+    l = 0.0
+    for e in elems:
+        cur.append(e)
+        l += _length(e)
+        if (iscircle(e) or l > 10*_jointol) and \
+           dist(_sample(e,1.0),_sample(cur[0],0.0)) < _jointol:
+            loops.append(cur)
+            cur = []
+            l = 0.0
+    if cur:
+        loops.append(cur)
+    return loops
+
+def _reverseloop(loop):
+    r = []
+    for e in reversed(loop):
+        if not _isarc(e):
+            r.append(line(e[1],e[0]))
+        else:
+            c = arc(e)
+            c[1][3] = -1 if c[1][3] == -2 else -2
+            r.append(c)
+    return r
+
+## signed area enclosed by a loop, positive if it runs
+## counterclockwise
+def _looparea(loop):
+    a = 0.0
+    for e in loop:
+        if not _isarc(e):
+            a += e[0][0]*e[1][1] - e[1][0]*e[0][1]
+        else:
+            cx = e[0][0]
+            cy = e[0][1]
+            r = e[1][0]
+            start,end = _samplearcangles(e)
+            a0 = start*pi2/360.0
+            a1 = end*pi2/360.0
+            s = r*cx*(sin(a1)-sin(a0)) - r*cy*(cos(a1)-cos(a0)) + r*r*(a1-a0)
+            a += -s if e[1][3] == -2 else s
+    return a/2.0
+
+## Nesting of loops that don't cross each other: return the index of
+## the loop that immediately encloses each loop, or -1.  Loops are
+## placed in order of decreasing area, so that the enclosing loop of
+## each is already placed, and the candidates come from a BoxIndex
+## over the loop boxes.  The smallest candidate whose box holds the
+## loop box and that winds around a point of the loop is its parent.
+## Candidates are tried smallest first, and as the parent is usually
+## the smallest of them, a loop usually takes a single winding number
+## test.
+def _nest(loops):
+    n = len(loops)
+    parent = [-1]*n
+    if n < 2:
+        return parent
+    boxes = [ _xybox(l,0.0) for l in loops ]
+    areas = [ abs(_looparea(l)) for l in loops ]
+    idx = BoxIndex(boxes)
+    order = sorted(range(n),key=lambda i: -areas[i])
+    placed = [False]*n
+    for i in order:
+        b = boxes[i]
+        cand = [ j for j in idx.query(b) if placed[j] and
+                 boxes[j][0] <= b[0] and boxes[j][1] <= b[1] and
+                 boxes[j][2] >= b[2] and boxes[j][3] >= b[3] ]
+        cand.sort(key=lambda j: areas[j])
+        p = _sample(loops[i][0],0.5)
+        for j in cand:
+            if windingnumberXY(loops[j],p) != 0:
+                parent[i] = j
+                break
+        placed[i] = True
+    return parent
+
+## nesting depth of each loop, from the parents found by _nest()
+def _depths(parent):
+    depth = [-1]*len(parent)
+    for i in range(len(parent)):
+        chain = []
+        k = i
+        while k >= 0 and depth[k] < 0:
+            chain.append(k)
+            k = parent[k]
+        d = depth[k] if k >= 0 else -1
+        for k in reversed(chain):
+            d += 1
+            depth[k] = d
+    return depth
+
+## point and unit direction of travel of element e at parameter u
+def _frame(e,u):
+    p = _sample(e,u)
+    if not _isarc(e):
+        dx = e[1][0]-e[0][0]
+        dy = e[1][1]-e[0][1]
+        l = sqrt(dx*dx+dy*dy)
+        return p,dx/l,dy/l
+    a = atan2(p[1]-e[0][1],p[0]-e[0][0])
+    if e[1][3] == -2:
+        return p,sin(a),-cos(a)
+    return p,-sin(a),cos(a)
+
+## the element e moved a distance d to its right, or [] if it
+## vanishes
+def _offsetelem(e,d):
+    if not _isarc(e):
+        p,tx,ty = _frame(e,0.0)
+        v = [d*ty,-d*tx,0.0,0.0]
+        return [ line(add4(e[0],v),add4(e[1],v)) ]
+    r = e[1][0] + (d if e[1][3] == -1 else -d)
+    if iscircle(e):
+        return [] if r < _jointol else [ [point(e[0]),[r,0,360,e[1][3]]] ]
+    if abs(r) < _jointol:
+        return []
+    c = arc(e)
+    if r > 0.0:
+        c[1][0] = r
+    else:
+        ## a negative radius puts the arc on the other side of its
+        ## center, traversed in the same sense
+        c[1][0] = -r
+        c[1][1] = (c[1][1]+180.0) % 360.0
+        c[1][2] = (c[1][2]+180.0) % 360.0
+    return [ c ]
+
+## the elements joining the offsets of e0 and e1, where e1 follows
+## e0, and whether the offsets overlap.  Where they overlap, they are
+## better trimmed to their crossing, and the elements returned only
+## serve if they don't cross.
+def _join(e0,e1,d):
+    v,t0x,t0y = _frame(e0,1.0)
+    p1,t1x,t1y = _frame(e1,0.0)
+    q0 = point(v[0]+d*t0y,v[1]-d*t0x,v[2])
+    q1 = point(p1[0]+d*t1y,p1[1]-d*t1x,p1[2])
+    if dist(q0,q1) < _jointol:
+        return [],False
+    turn = t0x*t1y - t0y*t1x
+    dt = t0x*t1x + t0y*t1y
+    if d*turn > 0.0 or (turn == 0.0 and dt < 0.0):
+        ## the offsets part, round the corner
+        a0 = (atan2(q0[1]-v[1],q0[0]-v[0])*360.0/pi2) % 360.0
+        a1 = (atan2(q1[1]-v[1],q1[0]-v[0])*360.0/pi2) % 360.0
+        if d > 0.0:
+            return [ arc(v,d,a0,a1) ],False
+        return [ arc(v,-d,a1,a0,samplereverse=True) ],False
+    ## a connection through the corner is cut away with the overlap,
+    ## unless the corner is so slight that a chord is as good as an
+    ## arc
+    if abs(d)*(1.0-sqrt((1.0+dt)/2.0)) < _disttol:
+        return [ line(q0,q1) ],True
+    return [ line(q0,v), line(v,q1) ],True
+
+## the crossing (ua,ub) of offset elements a and b nearest to the end
+## of a and the start of b, with ua > lo and ub < hi, or None
+def _crossing(a,b,lo,hi):
+    la = _length(a)
+    lb = _length(b)
+    best = None
+    for ua,ub in _sweepintersect([a],[b]):
+        if (ua-lo)*la > _jointol and (hi-ub)*lb > _jointol:
+            k = (1.0-ua)*la + ub*lb
+            if best is None or k < best[0]:
+                best = (k,ua,ub)
+    return None if best is None else best[1:]
+
+def _segment(e,u1,u2):
+    if not _isarc(e):
+        return segmentline(e,u1,u2)
+    return segmentarc(e,u1,u2)
+
+## the raw offset of a loop
+def _rawloop(loop,d):
+    n = len(loop)
+    offs = [_offsetelem(e,d) for e in loop]
+    u0 = [0.0]*n
+    u1 = [1.0]*n
+    joins = []
+    for i in range(n):
+        j = (i+1) % n
+        jn,overlap = _join(loop[i],loop[j],d)
+        if overlap and i != j and offs[i] and offs[j]:
+            uu = _crossing(offs[i][0],offs[j][0],u0[i],u1[j])
+            if uu is not None:
+                u1[i],u0[j] = uu
+                jn = []
+        joins.append(jn)
+    raw = []
+    for i in range(n):
+        for e in offs[i]:
+            if u0[i] > 0.0 or u1[i] < 1.0:
+                e = _segment(e,u0[i],u1[i])
+            raw.append(e)
+        raw += joins[i]
+    return raw
+
+## distance in the XY plane from (px,py) to element e
+def _xydist(e,px,py):
+    if not _isarc(e):
+        x0 = e[0][0]
+        y0 = e[0][1]
+        dx = e[1][0]-x0
+        dy = e[1][1]-y0
+        dd = dx*dx+dy*dy
+        t = 0.0 if dd == 0.0 else \
+            min(1.0,max(0.0,((px-x0)*dx+(py-y0)*dy)/dd))
+        return sqrt((x0+t*dx-px)**2 + (y0+t*dy-py)**2)
+    cx = e[0][0]
+    cy = e[0][1]
+    r = e[1][0]
+    rho = sqrt((px-cx)**2 + (py-cy)**2)
+    if iscircle(e):
+        return abs(rho-r)
+    start,end = _samplearcangles(e)
+    a = (atan2(py-cy,px-cx)*360.0/pi2) % 360.0
+    if (a >= start and a <= end) or (a+360.0 <= end):
+        return abs(rho-r)
+    a0 = start*pi2/360.0
+    a1 = end*pi2/360.0
+    return min(sqrt((cx+r*cos(a0)-px)**2 + (cy+r*sin(a0)-py)**2),
+               sqrt((cx+r*cos(a1)-px)**2 + (cy+r*sin(a1)-py)**2))
+
+## Chain runs, each a list of lines and arcs, into closed loops by
+## joining the end of each run to a run that starts there, trying the
+## next run first.  Return the loops, or None if some chain doesn't
+## close.
+def _chain(runs):
+    S = [_sample(r[0],0.0) for r in runs]
+    E = [_sample(r[-1],1.0) for r in runs]
+    sindex = BoxIndex([[s[0]-_jointol,s[1]-_jointol,
+                        s[0]+_jointol,s[1]+_jointol] for s in S])
+    used = [False]*len(runs)
+    loops = []
+    for k0 in range(len(runs)):
+        if used[k0]:
+            continue
+        chain = []
+        k = k0
+        while True:
+            used[k] = True
+            chain += runs[k]
+            e = E[k]
+            if dist(e,S[k0]) < _jointol:
+                break
+            succ = None
+            if k+1 < len(runs) and not used[k+1] and \
+               dist(S[k+1],e) < _jointol:
+                succ = k+1
+            else:
+                for j in sindex.query([e[0],e[1],e[0],e[1]]):
+                    if not used[j] and dist(S[j],e) < _jointol:
+                        succ = j
+                        break
+            if succ is None:
+                return None
+            k = succ
+        loops.append(chain)
+    return loops
+
+def offsetXY(x,d):
+    """
+    Offset closed figure ``x``, a closed poly, geometry list of one or
+    more closed loops, or an object such as a ``Polygon`` that provides
+    a ``geom()`` method, by distance ``d`` in the XY plane.  Positive
+    ``d`` grows the figure, negative ``d`` shrinks it, and convex
+    corners are rounded.  Return the resulting closed loops as a list
+    of geometry lists of lines and arcs, with outer loops running
+    counterclockwise and holes clockwise.  The list is empty if the
+    figure shrinks away.  Raise ``ValueError`` if the offset can't be
+    chained into closed loops.
+    """
+    if hasattr(x,'geom'):
+        x = x.geom(copy=False)
+    loops = _loops(_elements(x,[]))
+    if len(loops) == 0:
+        return []
+    if close(d,0.0):
+        d = 0.0
+
+    ## orient the loops by nesting depth
+    depth = _depths(_nest(loops))
+    for i in range(len(loops)):
+        if (_looparea(loops[i]) < 0.0) != (depth[i] % 2 == 1):
+            loops[i] = _reverseloop(loops[i])
+    if d == 0.0:
+        return [ deepcopy(l) for l in loops ]
+
+    ## raw offset elements, the index of the element that follows
+    ## each of them in its loop, and the range of elements of each loop
+    raw = []
+    nxt = []
+    bounds = []
+    for loop in loops:
+        k = len(raw)
+        raw += _rawloop(loop,d)
+        if len(raw) > k:
+            nxt += list(range(k+1,len(raw))) + [k]
+            bounds.append((k,len(raw)))
+    n = len(raw)
+    lengths = [_length(e) for e in raw]
+
+    ## cut the raw offset where it crosses itself.  cuts[i] holds the
+    ## interior cut parameters of element i, and brk[i] is true if a
+    ## run starts at element i.
+    cuts = [ [] for i in range(n) ]
+    brk = [False]*n
+    def _cut(i,u):
+        if u*lengths[i] < _jointol:
+            brk[i] = True
+        elif (1.0-u)*lengths[i] < _jointol:
+            brk[nxt[i]] = True
+        else:
+            cuts[i].append(u)
+    with unchecked():
+        for i,j in _sweeppairs([_xybox(e) for e in raw]):
+            for ua,ub in _sweepintersect([raw[i]],[raw[j]]):
+                if (nxt[i] == j and (1.0-ua)*lengths[i] < _jointol and
+                    ub*lengths[j] < _jointol) or \
+                   (nxt[j] == i and (1.0-ub)*lengths[j] < _jointol and
+                    ua*lengths[i] < _jointol):
+                    continue
+                _cut(i,ua)
+                _cut(j,ub)
+
+    ## split each loop into runs, starting at a cut if it has one
+    runs = []
+    for k0,k1 in bounds:
+        pieces = []
+        for i in range(k0,k1):
+            us = [0.0]
+            for u in sorted(cuts[i]):
+                if (u-us[-1])*lengths[i] >= _jointol:
+                    us.append(u)
+            us.append(1.0)
+            if len(us) == 2:
+                pieces.append([raw[i],brk[i]])
+                continue
+            for j in range(len(us)-1):
+                pieces.append([_segment(raw[i],us[j],us[j+1]),
+                               brk[i] or j > 0])
+        starts = [j for j in range(len(pieces)) if pieces[j][1]]
+        if starts:
+            pieces = pieces[starts[0]:] + pieces[:starts[0]]
+        r = []
+        for g,b in pieces:
+            if b and r:
+                runs.append(r)
+                r = []
+            r.append(g)
+        runs.append(r)
+
+    ## keep the runs that are at least d from the original figure
+    orig = _elements(loops,[])
+    index = BoxIndex([_xybox(e,0.0) for e in orig])
+    ad = abs(d)
+    kept = []
+    for r in runs:
+        g = max(r,key=_length)
+        p = _sample(g,0.5)
+        near = index.query([p[0]-ad,p[1]-ad,p[0]+ad,p[1]+ad])
+        if all(_xydist(orig[i],p[0],p[1]) >= ad-_disttol for i in near):
+            kept.append(r)
+
+    ## chain the kept runs into loops.  Every run should end where
+    ## another starts, so a chain that can't be closed means the cuts
+    ## or the kept runs are inconsistent, and is an error
+    chains = _chain(kept)
+    if chains is None:
+        raise ValueError('offset of figure by {} left a chain that '
+                         'does not close'.format(d))
+    result = []
+    for chain in chains:
+        chain = [g for g in chain if iscircle(g) or _length(g) > epsilon]
+        if chain:
+            result.append(chain)
+    return result
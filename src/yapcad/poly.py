@@ -1,6 +1,8 @@
 # Polyline and Polygon geometry generating classes for yapCAD
+from bisect import bisect_left, bisect_right
 from yapcad.geom import *
 from yapcad.geometry import *
+from yapcad.offset import offsetXY
 
 ## Copyright (c) 2020 Richard W. DeVaul
 ## Copyright (c) 2020 yapCAD contributors
@@ -56,11 +58,17 @@ class Polyline(IntersectGeometry):
         self._length=0.0
         self._lengths=[]
         self._lines=[]
+        self._path=None
         self._update=True
         self._closed=False
         self._center=point(0,0,0)
         self._bbox=line(point(-epsilon,-epsilon),
                         point(epsilon,epsilon))
+        self._built=0
+        self._csum=None
+        self._appendonly=None
+        self._builtelem=None
+        self._version=0
         if isinstance(a,Polyline):
             self._elem = deepcopy(a._elem)
             self._updateInternals()
@@ -81,8 +89,8 @@ class Polyline(IntersectGeometry):
     ## add another drawing element
     def addPoint(self,element):
         if ispoint(element):
-            self._update=True  # flag that we need to recalculate stuff
             self._elem.append(element)
+            self._edit(len(self._elem)-1,'insert')
         else:
             raise ValueError('attempt to add a non point to Polyline')
 
@@ -92,27 +100,64 @@ class Polyline(IntersectGeometry):
             raise ValueError('bad point passed to Polyline.setPoint(): '.format(p))
         if i < len(self._elem):
             self._elem[i]=point(p)
+            self._edit(i,'set')
         elif i == len(self._elem):
             self._elem.append(p)
+            self._edit(i,'insert')
         else:
             raise ValueError('index out of range in PolylinesetPoint(): '.format(i))
-        self._update=True
+
+    ## note that element i has been set, inserted or removed, as
+    ## given by kind ('set', 'insert' or 'remove'), so that the
+    ## derived geometry is brought up to date on the next query
+    def _edit(self,i,kind):
+        self._update=True  # flag that we need to recalculate stuff
+        if kind == 'insert' and i == len(self._elem)-1 and \
+           self._appendonly is not False:
+            self._appendonly = True
+        else:
+            self._appendonly = False
         
     ## return a copy of the elem list
     def getElem(self):
         return deepcopy(self._elem)
     
+    ## If the only edits since the last update were elements added to
+    ## the end with addPoint() or setPoint(), the segments, lengths,
+    ## center and bounding box are extended to cover the new elements,
+    ## as is the arc-length index if it has been built.  Any other
+    ## edit, or a change to _elem made without _edit(), rebuilds them.
+    ## As the list of segments that geom(copy=False) returns may be
+    ## extended in place, _version counts the updates, so that
+    ## PreparedPolygon can tell that it has changed.
     def _updateInternals(self):
         if self._update:
-            self._updateCenter()
-            self._updateLines()
+            self._version += 1
+            if self._appendonly and self._builtelem is self._elem and \
+               self._built <= len(self._elem):
+                k = len(self._lines)
+                self._updateLines()
+                if self._path is not None:
+                    self._path.extend(self._lines[k:],self._lengths[k:])
+                    self._path.closed = self._closed
+            else:
+                self._lines=[]
+                self._lengths=[]
+                self._length=0.0
+                self._built=0
+                self._csum=None
+                self._updateLines()
+                self._path=None
+            self._builtelem=self._elem
+            self._appendonly=None
             self._update=False
 
 
     ## compute barycentric center of figure by equally weighting the
     ## points.  If last and first points are the same, ignore the
-    ## last point.
-    def _updateCenter(self):
+    ## last point.  Unless box is False, also compute the bounding
+    ## box of the elements.
+    def _updateCenter(self,box=True):
         l = len(self._elem)
         if l == 0:
             return
@@ -131,7 +176,8 @@ class Polyline(IntersectGeometry):
                 p = add(center(self._elem[i]),p)
 
             self._center = scale3(p,1/l)
-            self._bbox = bbox(self._elem)
+            if box:
+                self._bbox = bbox(self._elem)
         return
 
     ## return the center of the figure.  If necessary, recompute that
@@ -148,43 +194,82 @@ class Polyline(IntersectGeometry):
     
     ## function to take the points in the elem[] list and build a
     ## list of the individual lines, line lengths and total length to
-    ## facilitate sampling
-    
+    ## facilitate sampling.  Only the elements from self._built on are
+    ## added, and the center and bounding box are brought up to date
+    ## from the sum of the element centers so far (in the same order
+    ## as _updateCenter() adds them) and the previous bounding box.
+    ## Consecutive lines share their common point.
+
     def _updateLines(self):
-        for i in range(1,len(self._elem)):
-            p0=  center(self._elem[i-1])
-            p1=  center(self._elem[i])
-            self._lines.append(line(p0,p1))
+        elem = self._elem
+        n = len(elem)
+        k = self._built
+        if n < 2:
+            self._updateCenter()
+            self._built = n
+            return
+        if k == 0:
+            p0 = center(elem[0])
+            k = 1
+        else:
+            p0 = self._lines[-1][1] if self._lines else center(elem[0])
+        csum = self._csum
+        for i in range(k,n):
+            csum = p0 if csum is None else add(p0,csum)
+            p1 = center(elem[i])
+            self._lines.append([p0,p1])
             l = dist(p0,p1)
             self._lengths.append(l)
             self._length += l
-        if len(self._elem) > 2 and dist(center(self._elem[0]),
-                                        center(self._elem[-1])) < epsilon:
-            self._closed = True
+            p0 = p1
+        self._csum = csum
+
+        c0 = self._lines[0][0]
+        self._closed = n > 2 and dist(c0,p0) < epsilon
+        if dist(c0,p0) < epsilon:
+            self._center = scale3(csum,1/(n-1))
+        else:
+            self._center = scale3(add(p0,csum),1/n)
+
+        if self._built < 2:
+            self._bbox = bbox(elem)
+        else:
+            b = self._bbox
+            minx,miny = b[0][0],b[0][1]
+            maxx,maxy = b[1][0],b[1][1]
+            for e in elem[self._built:]:
+                ps = [e] if ispoint(e) else bbox(e)
+                for q in ps:
+                    minx = min(minx,q[0])
+                    miny = min(miny,q[1])
+                    maxx = max(maxx,q[0])
+                    maxy = max(maxy,q[1])
+            self._bbox = [ point(minx,miny),point(maxx,maxy) ]
+        self._built = n
 
-    def geom(self):
+    def geom(self,copy=True):
         if self._update:
             self._updateInternals()
+        if not copy:
+            return self._lines
         return deepcopy(self._lines)
 
+    ## return the arc-length index for the figure, building it the
+    ## first time it is needed after the geometry changes
+    def _prepared(self):
+        g = self.geom(copy=False)
+        if self._path is None:
+            self._path = PreparedPath(g,self._closed,lengths=self._lengths)
+        return self._path
+
     def sample(self,u):
-        if self._update:
-            self._updateInternals()
-        dist = u * self._length;
-        d = 0
-        if self._closed:
-            u = u%1.0
-        if u < 1.0:
-            for i in range(len(self._lines)):
-                l=self._lengths[i]
-                if dist <= d+l:
-                    uu = 1.0 - (d+l-dist)/l
-                    return sampleline(self._lines[i],uu)
-                else:
-                    d+=l
-        else:
-            uu = (dist-self._length+self._lengths[-1])/self._lengths[-1]
-            return sampleline(self._lines[-1],uu)
+        return self._prepared().sample(u)
+
+    def sample_many(self,us):
+        return sample_many(self._prepared(),us)
+
+    def unsample_many(self,pnts):
+        return unsample_many(self._prepared(),pnts)
         
 
 class Polygon(Polyline):
@@ -192,6 +277,12 @@ class Polygon(Polyline):
 
     def __init__(self,a=False):
         super().__init__()
+        self._closed=True
+        self._outline=[]
+        self._outlinebox=None
+        self._pieces=None
+        self._dirty=False
+        self._dropped=[]
         if isinstance(a,Polygon):
             self._elem = deepcopy(a._elem)
             self._updateInternals()
@@ -224,31 +315,73 @@ class Polygon(Polyline):
     def __repr__(self):
         return 'Polygon({})'.format(vstr(self._elem))
 
+    def getCenter(self):
+        if self._update:
+            self._updateInternals()
+        if self._center is None:
+            self._updateCenter(box=False)
+        return self._center
+
+    ## the bounding box of a polygon of two or more elements is that
+    ## of its outline, which _makeoutline() computes, and the center
+    ## is only computed when it is asked for
     def _updateInternals(self):
         if self._update:
-            self._updateCenter()
+            self._version += 1
+            if len(self._elem) < 2:
+                self._updateCenter()
+            else:
+                self._center = None
             self._makeoutline()
+            self._path=None
             self._update=False
 
+    ## Mark the outline pieces that an edit of element i invalidates.
+    ## The piece of an element depends on the elements on either side
+    ## of it (see _outlinepiece()), so those pieces are rebuilt too.
+    def _edit(self,i,kind):
+        super()._edit(i,kind)
+        pc = self._pieces
+        if pc is None or self._builtelem is not self._elem:
+            return
+        if kind == 'insert':
+            pc.insert(i,None)
+            self._trimmed.insert(i,[])
+            self._culled.insert(i,[])
+            self._plengths.insert(i,[])
+        elif kind == 'remove':
+            pc.pop(i)
+            self._trimmed.pop(i)
+            self._dropped += self._culled.pop(i)
+            self._plengths.pop(i)
+        n = len(self._elem)
+        if len(pc) != n or n == 0:
+            self._pieces = None
+            return
+        for j in ((i-1,i) if kind == 'remove' else (i-1,i,i+1)):
+            pc[j % n] = None
+        self._dirty = True
+
     ## add another drawing element
     def addLine(self,element):
         if isline(element):
-            self._update=True  # flag that we need to recalculate stuff
             self._elem.append(deepcopy(element))
+            self._edit(len(self._elem)-1,'insert')
         else:
             raise ValueError('attempt to add a non point, line or arc to poly')
     
     ## add another drawing element
     def addArc(self,element):
         if isarc(element):
-            self._update=True  # flag that we need to recalculate stuff
             self._elem.append(deepcopy(element))
+            self._edit(len(self._elem)-1,'insert')
         else:
             raise ValueError('attempt to add a non point, line or arc to poly')
                 
     def remove(self,element):
-        self._update=True  # flag that we need to recalculate stuff
-        self._elem.remove(element)
+        i = self._elem.index(element)
+        self._elem.pop(i)
+        self._edit(i,'remove')
                 
     ## function to take the elements in the elem[] list and
     ## construct the full outline.  For example, consider a list of
@@ -259,194 +392,156 @@ class Polygon(Polyline):
     ## by three arcs.  Elements that are explicitly specified lines or
     ## non-circular arcs are joined to adjacent elements by lines
 
+    ## The outline is kept as one piece per element: the lines and
+    ## arcs that element contributes to the raw outline (see
+    ## _outlinepiece()), the same entries after the trimming pass,
+    ## and what is left of them once zero-length entries are culled,
+    ## with their lengths.  After an edit made through _edit(), only
+    ## the pieces of the edited element and its neighbours are built
+    ## again, and the trimming pass is only run over the entries
+    ## around them.  Edits that touch the first or last entry of the
+    ## outline, where the trimming pass wraps around, and any other
+    ## change to the element list, rebuild the whole outline.
+
     def _makeoutline(self):
-        def _calclength():
-            l = 0
-            ll = []
-            length = 0
-            for o in self._outline:
-                if isarc(o):
-                    length=arclength(o)
-                elif isline(o): # line
-                    length=linelength(o)
-                else:
-                    #print("self._outline: ",vstr(self._outline))
-                    #print("o: ",vstr(o))
-                    raise ValueError("bad element in outline list for _calclength()")
-                l += length
-                ll.append(length)
-            self._length = l
-            self._lengths=ll
-
-        def _handleCircle(e0,e1,e2):
-            ## get the two tangent lines from circle e1 to the circle
-            ## e2
-            ll = circleCircleTangentsXY(e1,e2)
-            l=[]
-            x0=center(e0)
-            x1=center(e1)
-            x2=center(e2)
-            #print("x0: ",vstr(x0)," x1: ",vstr(x1)," x2: ",vstr(x2))
-            #print("ll: ",vstr(ll))
-            v1= sub(x1,x0)
-            v2= sub(x2,x1)
-            r0 = cross(v1,v2)
-            x3 = linecenter(ll[0])
-            x4 = linecenter(ll[1])
-            #print("x3: ",vstr(x3),"x4: ",vstr(x4))
-            #print("v1: ",vstr(v1),"v2: ",vstr(v2))
-            v3 = sub(x3,x2)
-            v4 = sub(x4,x2)
-            r1 = cross(v2,v3)
-            r2 = cross(v2,v4)
-            #print("v3: ",vstr(v3)," v4: ",vstr(v4))
-            #print("r0: ", r0[2], " r1: ",r1[2]," r2: ",r2[2])
-
-            if r0[2] >= 0:
-                #print("left-hand turn")
-                if r1[2] >= 0:
-                    l = ll[1]
+        elem = self._elem
+        n = len(elem)
+        if n < 2:
+            ## if one element, the outline is the element, and if
+            ## there are fewer than one elem, there is nothing to do
+            self._pieces = None
+            self._outline = deepcopy(elem)
+            self._lengths = [ _outlinelength(o) for o in self._outline ]
+            self._length = sum(self._lengths)
+            return
+
+        incremental = self._dirty and n >= 4 and \
+            self._pieces is not None and self._builtelem is elem and \
+            len(self._pieces) == n
+        if incremental:
+            raw = self._pieces
+            trimmed = self._trimmed
+            culled = self._culled
+            plengths = self._plengths
+            dirty = [ j for j in range(n) if raw[j] is None ]
+            incremental = 2*len(dirty) <= n
+        if not incremental:
+            raw = [None]*n
+            trimmed = [ [] for j in range(n) ]
+            culled = [ [] for j in range(n) ]
+            plengths = [ [] for j in range(n) ]
+            dirty = list(range(n))
+
+        ## first pass: construct all lines and circle-tangent lines,
+        ## inserting explicit line and arc elements
+        for j in dirty:
+            raw[j] = _outlinepiece(elem,j)
+        off = [0]
+        for pc in raw:
+            off.append(off[-1]+len(pc))
+        flat = [ e for pc in raw for e in pc ]
+        m = len(flat)
+
+        ## entries [s,e] of the flat outline whose trimming steps have
+        ## to be run again
+        windows = []
+        if incremental:
+            for j in dirty:
+                s = off[j]-1
+                e = off[j+1]
+                if e+1 < m and iscircle(flat[e+1]):
+                    e += 1
+                if windows and s <= windows[-1][1]+2:
+                    windows[-1][1] = max(windows[-1][1],e)
                 else:
-                    l = ll[0]
-            else:
-                #print("right hand turn")
-                if r2[2] >= 0:
-                    l = ll[0]
+                    windows.append([s,e])
+            incremental = windows[0][0] >= 1 and windows[-1][1] <= m-2
+
+        ## second pass: replace full circles with arcs and catch any
+        ## intersecting lines due to non-convex curvature
+        if incremental:
+            dset = set(dirty)
+            ol = [ e for j in range(n)
+                   for e in (raw[j] if j in dset else trimmed[j]) ]
+            touched = set(dirty)
+            for s,e in windows:
+                ## entry s keeps the start set by the step before it,
+                ## and entry e+1 the end set by the step after it
+                if isline(flat[s]):
+                    ol[s] = line(ol[s][0],flat[s][1])
                 else:
-                    l = ll[1]
-                        
-            self._outline.append(line(l))
-            
-        def _fromPointAdd(e0,p1,e2):
-            if ispoint(e2): #r1 is a point -- simplest case
-                #ll = dist(p1,e2)
-                self._outline.append(line(p1,e2))
-            elif isline(e2):
-                self._outline.append(line(p1,e2[0]))
-                self._outline.append(line(e2))
-            elif isarc(e2) and not iscircle(e2):
-                p = samplearc(e2,1*epsilon)
-                self._outline.append(line(p1,p))
-                self._outline.append(arc(e2))
-            elif iscircle(e2): 
-                _handleCircle(e0,arc(p1,1*epsilon),e2)
-                self._outline.append(arc(e2))
-            else:
-                raise ValueError('bad object in element list')
-            
-        self._outline=[]
-        self._length=0
-        self._lengths=[]
+                    ol[s] = flat[s]
+                last = ol[e+1]
+                ol[s+1:e+2] = flat[s+1:e+2]
+                for i in range(s,e+1):
+                    _trimstep(ol,i)
+                if isline(last):
+                    ol[e+1] = line(ol[e+1][0],last[1])
+                touched.update(range(bisect_right(off,s)-1,
+                                     bisect_right(off,e+1)))
+            touched = sorted(touched)
+        else:
+            ol = list(flat)
+            for i in range(1,m):
+                _trimstep(ol,i)
+            touched = range(n)
 
-        if len(self._elem) < 2:
-            ## if one element, the outline is the element
-            if len(self._elem) == 1:
-                self._outline=deepcopy(self._elem)
-                _calclength()
-            ## if there are fewer than one elem, there is nothing to do
-            return
-        ## we have work to do.  Construct all lines and circle-tangent
-        ## lines first, inserting explicit line and arc elements.
-        ## Then go back and convert circles to arcs.  Finally compute
-        ## total length and length list for use in sample() function.
+        ## cull zero-length entries, and compute the lengths for use in
+        ## the sample() function
+        dropped = self._dropped if incremental else []
+        added = []
+        for j in touched:
+            trimmed[j] = ol[off[j]:off[j+1]]
+            dropped += culled[j]
+            culled[j] = cullZeroLength(trimmed[j])
+            added += culled[j]
+            plengths[j] = [ _outlinelength(o) for o in culled[j] ]
+        self._outline = [ e for c in culled for e in c ]
+        self._lengths = [ l for c in plengths for l in c ]
+        self._length = sum(self._lengths)
 
-        
-        for i in range(len(self._elem)):
-            if i == 0:
-                e0 = self._elem[-1]
-            else:
-                e0 = self._elem[i-1]
-            e1 = self._elem[i]
-            if i == len(self._elem)-1: #last item
-                e2 = self._elem[0]
-            else:
-                e2 = self._elem[i+1]
-            ## work through element types
-            if ispoint(e1): #e1 is a point
-                _fromPointAdd(e0,e1,e2)
-            elif isline(e1):
-                _fromPointAdd(e0,e1[0],e2)
-            elif isarc(e1) and not iscircle(e1):
-                p1 = samplearc(e1,1.0)
-                _fromPointAdd(e0,p1,e2)
-            elif iscircle(e1):
-                c2 = []
-                if ispoint(e2):
-                    c2 = arc(e2,1*epsilon)
-                if iscircle(e2):
-                    c2 = e2
-                else:
-                    p = sample(e2,0.0)
-                    c2 = arc(p,1*epsilon)
-                _handleCircle(e0,e1,c2)
-                
-                if not ispoint(e2):
-                    self._outline.append(deepcopy(e2))
-
-        ## OK, now go back through and replace full circles with arcs
-        ## and catch any intersecting lines due to non-convex
-        ## curvature
-        for i in range(1,len(self._outline)):
-            e0 = self._outline[i-1]
-            e1 = self._outline[i]
-            if i == len(self._outline)-1: #last item
-                e2 = self._outline[0]
-            else:
-                e2 = self._outline[i+1]
-            if isline(e1) and isline(e2):
-                pi = lineLineIntersectXY(e1,e2,inside=True)
-                if pi == False:
-                    # print("not expected: adjacent lines don't intersect. We will fix that")
-                    pi = lineLineIntersectXY(e1,e2,inside=False)
-                    if pi == False:
-                        # raise ValueError('parallel adjacent lines -- no clue')
-                        print("odd parallel? adjacent line condition")
-                        continue
-                    else:
-                        self._outline[i] = line(e1[0],pi)
-                        self._outline[(i+1)%len(self._outline)] = line(pi,e2[1])
-            if iscircle(e1):
-                if not isline(e0) or not isline(e2):
-                    raise ValueError('circle not bracketed by lines')
-                pp0 = lineArcIntersectXY(e0,e1,False)
-                pp1 = lineArcIntersectXY(e2,e1,False)
-                # these should be tangent lines, so exactly one
-                # intersection each.  sometimes we get two that are
-                # just a bit more than epsilon apart, which is OK.
-                if len(pp0) < 1 or len(pp1) < 1:
-                    raise ValueError('bad line-circle intersection in poly outline calculation')
-                # we are assuming that elements are ordered in a
-                # counter-clockwise fashion
-                p0=sub(pp0[0],e1[0])
-                p1=sub(pp1[0],e1[0])
-                start = (atan2(p0[1],p0[0]) % pi2) * 360.0/pi2
-                end = (atan2(p1[1],p1[0]) % pi2) * 360.0/pi2
-                newarc = arc(e1[0],e1[1][0],start,end)
-                self._outline[i]=newarc
-
-        self._outline = cullZeroLength(self._outline)
-                
-        _calclength()
-        self._bbox = geomlistbbox(self._outline)
+        ## the bounding box only has to be found again if an entry that
+        ## was dropped may have been on it
+        bb = self._outlinebox
+        if incremental and bb and not _touchesbox(dropped,bb):
+            if added:
+                bb = geomlistbbox([bb] + added)
+        else:
+            bb = geomlistbbox(self._outline)
+        self._bbox = self._outlinebox = bb
+
+        self._pieces = raw
+        self._trimmed = trimmed
+        self._culled = culled
+        self._plengths = plengths
+        self._builtelem = elem
+        self._dirty = False
+        self._dropped = []
         
     def sample(self,u):
         if self._update:
             self._updateInternals()
         if len(self._outline) == 0:
             raise ValueError('no geometry to sample, empty poly')
-        dist = (u % 1.0) * self._length
-        d = 0
-        for i in range(len(self._outline)):
-            l=self._lengths[i]
-            if dist <= d+l:
-                u = 1.0 - (d+l-dist)/l
-                e = self._outline[i]
-                return sample(e,u)
-            else:
-                d=d+l
+        return self._prepared().sample(u)
+
+    def sample_many(self,us):
+        if self._update:
+            self._updateInternals()
+        if len(self._outline) == 0:
+            raise ValueError('no geometry to sample, empty poly')
+        return sample_many(self._prepared(),us)
 
     def segment(self,u1,u2,reverse=False):
-        return segmentgeomlist(self.geom(),u1,u2,closed=True,reverse=reverse)
+        return self._prepared().segment(u1,u2,reverse)
+
+    ## the arc-length index reuses the outline lengths computed by
+    ## _makeoutline()
+    def _prepared(self):
+        g = self.geom(copy=False)
+        if self._path is None:
+            self._path = PreparedPath(g,self._closed,lengths=self._lengths)
+        return self._path
 
     def mirror(self,plane,poly=False):
         if poly:
@@ -457,7 +552,7 @@ class Polygon(Polyline):
             p._update=True
             return p
         
-        return mirror(self.geom(),plane)
+        return mirror(self.geom(copy=False),plane)
 
     def rotate(self,angle,cent=point(0,0,0),axis=point(0,0,1),poly=False):
         if poly:
@@ -466,7 +561,7 @@ class Polygon(Polyline):
             p._update = True
             return p
         
-        return rotate(self.geom(),angle,cent,axis)
+        return rotate(self.geom(copy=False),angle,cent,axis)
 
     def scale(self,sx,sy=False,sz=False,cent=point(0,0),poly=False):
         if poly:
@@ -475,7 +570,7 @@ class Polygon(Polyline):
             p._update = True
             return p
 
-        return scale(self.geom(),sx,sy,sz,cent)
+        return scale(self.geom(copy=False),sx,sy,sz,cent)
 
     def translate(self,delta,poly=False):
         if poly:
@@ -484,11 +579,13 @@ class Polygon(Polyline):
             p._update = True
             return p
 
-        return translate(self.geom(),delta)
+        return translate(self.geom(copy=False),delta)
     
-    def geom(self):
+    def geom(self,copy=True):
         if self._update:
             self._updateInternals()
+        if not copy:
+            return self._outline
         return deepcopy(self._outline)
                 
     def bbox(self):
@@ -502,44 +599,387 @@ class Polygon(Polyline):
         bb = self._bbox
         if not isinsidebbox(bb,p):
             return False
-        p2 = add([1,1,0,1],bb[1])
-        if vclose(p2,p): ## did we randomly pick an outside point near the
-                         ## test point?
-            p2 = sub(bb[0],[1,1,0,1])
-        l = line(p,p2)
-        pp = intersectGeomListXY(l,self.geom())
-        if pp == False:
-            return False
-        return len(pp) % 2 == 1
+        return windingnumberXY(self._outline,p) % 2 == 1
+
+    ## batched isinside(), returning a boolean array
+    def isinside_many(self,pnts):
+        if self._update:
+            self._updateInternals()
+        if len(self._outline) == 0:
+            return np.zeros(len(pnts),dtype=bool)
+        return isinside_many(self._outline,pnts)
 
     def grow(self,r):
+        """
+        Offset the outline by ``r``, rounding convex corners, or
+        shrink it for negative ``r``.  If shrinking splits the figure,
+        the piece with the longest outline is kept, and if it vanishes, the polygon is
+        left empty.  See ``yapcad.offset.offsetXY()``.
+        """
         if close(r,0.0):
             return
-        elif r < 0:
-            raise ValueError('negative growth values not valid')
-        def _growgeom(elem):
-            ne = []
-            for e in elem:
-                if ispoint(e):
-                    ne.append(arc(e,r))
-                elif isline(e):
-                    ne.append(arc(e[0],r))
-                    ne.append(arc(e[1],r))
-                elif isarc(e):
-                    a = arc(e)
-                    a[1][0] += r
-                    ne.append(a)
-                elif ispoly(e):
-                    for p in e:
-                        ne.append(arc(p,r))
-                elif isgeomlist(e):
-                    ne += _growgeom(e)
-            return ne
-        self._elem = _growgeom(self._elem)
+        loops = offsetXY(self.geom(copy=False),r)
+        if len(loops) == 0:
+            self._elem = []
+        else:
+            loop = max(loops,key=length)
+            ## lines are rebuilt from their start points
+            self._elem = [ e[0] if isline(e) else e for e in loop ]
         self._update=True
 
     def shrink(self,r):
+        """shrink the outline by ``r``, the same as ``grow(-r)``"""
+        self.grow(-r)
+
+
+## Outline construction for Polygon._makeoutline().  The first pass
+## turns each element into its piece of the raw outline, which depends
+## only on the element and the elements on either side of it.  The
+## second pass works through the raw outline in order, and at each
+## step only looks at the entries on either side of the current one.
+
+def _outlinelength(o):
+    if isarc(o):
+        return arclength(o)
+    elif isline(o): # line
+        return linelength(o)
+    raise ValueError("bad element in outline list for _calclength()")
+
+## append to out the line tangent to circles e1 and e2 on the outside
+## of the turn from e0 through e1 to e2
+def _handleCircle(e0,e1,e2,out):
+    ## get the two tangent lines from circle e1 to the circle
+    ## e2
+    ll = circleCircleTangentsXY(e1,e2)
+    l=[]
+    x0=center(e0)
+    x1=center(e1)
+    x2=center(e2)
+    v1= sub(x1,x0)
+    v2= sub(x2,x1)
+    r0 = cross(v1,v2)
+    x3 = linecenter(ll[0])
+    x4 = linecenter(ll[1])
+    v3 = sub(x3,x2)
+    v4 = sub(x4,x2)
+    r1 = cross(v2,v3)
+    r2 = cross(v2,v4)
+
+    if r0[2] >= 0:
+        if r1[2] >= 0:
+            l = ll[1]
+        else:
+            l = ll[0]
+    else:
+        if r2[2] >= 0:
+            l = ll[0]
+        else:
+            l = ll[1]
+
+    out.append(line(l))
+
+## connecting lines of zero length, such as between an arc
+## and an element that starts where it ends, are left out
+def _fromPointAdd(e0,p1,e2,out):
+    if ispoint(e2): #r1 is a point -- simplest case
+        if dist(p1,e2) > epsilon:
+            out.append(line(p1,e2))
+    elif isline(e2):
+        if dist(p1,e2[0]) > epsilon:
+            out.append(line(p1,e2[0]))
+        out.append(line(e2))
+    elif isarc(e2) and not iscircle(e2):
+        p = samplearc(e2,1*epsilon)
+        if dist(p1,p) > epsilon:
+            out.append(line(p1,p))
+        out.append(arc(e2))
+    elif iscircle(e2):
+        _handleCircle(e0,arc(p1,1*epsilon),e2,out)
+        out.append(arc(e2))
+    else:
+        raise ValueError('bad object in element list')
+
+## the piece of the raw outline that runs from element i of elem to
+## the element after it
+def _outlinepiece(elem,i):
+    out = []
+    e0 = elem[i-1]
+    e1 = elem[i]
+    if i == len(elem)-1: #last item
+        e2 = elem[0]
+    else:
+        e2 = elem[i+1]
+    ## work through element types
+    if ispoint(e1): #e1 is a point
+        _fromPointAdd(e0,e1,e2,out)
+    elif isline(e1):
+        _fromPointAdd(e0,e1[0],e2,out)
+    elif isarc(e1) and not iscircle(e1):
+        p1 = samplearc(e1,1.0)
+        _fromPointAdd(e0,p1,e2,out)
+    elif iscircle(e1):
+        c2 = []
+        if ispoint(e2):
+            c2 = arc(e2,1*epsilon)
+        if iscircle(e2):
+            c2 = e2
+        else:
+            p = sample(e2,0.0)
+            c2 = arc(p,1*epsilon)
+        _handleCircle(e0,e1,c2,out)
+
+        if not ispoint(e2):
+            out.append(deepcopy(e2))
+    return out
+
+## step i of the second pass over outline ol: trim adjacent lines
+## ol[i] and ol[i+1] to their crossing, or replace circle ol[i] with
+## the arc between the lines on either side of it
+def _trimstep(ol,i):
+    e0 = ol[i-1]
+    e1 = ol[i]
+    if i == len(ol)-1: #last item
+        e2 = ol[0]
+    else:
+        e2 = ol[i+1]
+    if isline(e1) and isline(e2):
+        pi = lineLineIntersectXY(e1,e2,inside=True)
+        if pi == False:
+            ## the lines don't meet within their extents, so extend
+            ## them to their crossing.  Parallel adjacent lines have
+            ## no crossing and are left as they are
+            pi = lineLineIntersectXY(e1,e2,inside=False)
+            if pi == False:
+                return
+            else:
+                ol[i] = line(e1[0],pi)
+                ol[(i+1)%len(ol)] = line(pi,e2[1])
+    if iscircle(e1):
+        if not isline(e0) or not isline(e2):
+            raise ValueError('circle not bracketed by lines')
+        pp0 = lineArcIntersectXY(e0,e1,False)
+        pp1 = lineArcIntersectXY(e2,e1,False)
+        # these should be tangent lines, so exactly one
+        # intersection each.  sometimes we get two that are
+        # just a bit more than epsilon apart, which is OK.
+        if len(pp0) < 1 or len(pp1) < 1:
+            raise ValueError('bad line-circle intersection in poly outline calculation')
+        # we are assuming that elements are ordered in a
+        # counter-clockwise fashion
+        p0=sub(pp0[0],e1[0])
+        p1=sub(pp1[0],e1[0])
+        start = (atan2(p0[1],p0[0]) % pi2) * 360.0/pi2
+        end = (atan2(p1[1],p1[0]) % pi2) * 360.0/pi2
+        ol[i]=arc(e1[0],e1[1][0],start,end)
+
+## does the bounding box of the outline entries in gl reach the edge
+## of bounding box bb?  The z extent only counts if bb has one.
+def _touchesbox(gl,bb):
+    if not gl:
         return False
+    b = geomlistbbox(gl)
+    k = 3 if bb[1][2]-bb[0][2] > epsilon else 2
+    return any(b[0][i] <= bb[0][i]+epsilon or b[1][i] >= bb[1][i]-epsilon
+               for i in range(k))
+
+
+## Point location for repeated inside testing.  A PreparedPolygon
+## divides the plane into horizontal slabs at the y coordinates of all
+## edge endpoints, so that within a slab every edge it crosses spans
+## the full height of the slab.  Arcs are first split into pieces that
+## are monotone in y.  An inside query finds its slab by bisection,
+## and counts the edges to the right of the point by a second
+## bisection over the slab's edges, which are sorted left to right.
+## Slabs in which edges cross each other can't be sorted this way, and
+## fall back to checking each of their edges.
+
+## Endpoints of different elements that lie within _snaptol of each
+## other are merged first, closing the small gaps that outline
+## construction leaves between elements, which would otherwise let a
+## crossing count go astray in the slab between the two endpoints.
+
+_snaptol = 100*epsilon
+
+class PreparedPolygon:
+    """slab-based point-location index for a closed poly, geometry list,
+    ``Polygon``, or ``Boolean``.  Geometry lists are taken to be
+    closed, as ``isinsideXY()`` takes them; open polys, for which
+    ``isinsideXY()`` tests whether a point lies on the poly, raise
+    ``ValueError``."""
+
+    def __init__(self,a):
+        self._source = None
+        self._outline = None
+        self._version = None
+        if isinstance(a,list):
+            if not (ispoly(a) or isgeomlist(a)):
+                raise ValueError('bad argument to PreparedPolygon: {}'.format(vstr(a)))
+            if ispoly(a) and not (len(a) > 2 and dist(a[0],a[-1]) < epsilon):
+                raise ValueError('open poly passed to PreparedPolygon: {}'.format(vstr(a)))
+            self._build(a)
+        elif hasattr(a,'geom') and hasattr(a,'_update'):
+            self._source = a
+            self._build(a.geom(copy=False))
+            self._version = getattr(a,'_version',None)
+        else:
+            raise ValueError('bad argument to PreparedPolygon: {}'.format(a))
+
+    def __repr__(self):
+        return 'PreparedPolygon({} edges, {} slabs)'.format(
+            self._numedges,len(self._slabs))
+
+    ## rebuild the index if the source figure has been modified, which
+    ## for a Polyline may leave its outline the same list
+    def _refresh(self):
+        if self._source is not None:
+            g = self._source.geom(copy=False)
+            v = getattr(self._source,'_version',None)
+            if g is not self._outline or v != self._version:
+                self._build(g)
+                self._version = v
+
+    def _build(self,gl):
+        self._outline = gl
+        self._bbox = bbox(gl) if len(gl) > 0 else False
+
+        ## merge endpoints that are within _snaptol of each other
+        grid = {}
+        def _snap(x,y):
+            i = int(floor(x/_snaptol))
+            j = int(floor(y/_snaptol))
+            for di in (-1,0,1):
+                for dj in (-1,0,1):
+                    for q in grid.get((i+di,j+dj),()):
+                        if abs(q[0]-x) <= _snaptol and abs(q[1]-y) <= _snaptol:
+                            return q
+            q = (x,y)
+            grid.setdefault((i,j),[]).append(q)
+            return q
+
+        ## edges are (ylo,yhi,kind,data), where kind 0 is a line with
+        ## data (x0,y0,x1,y1) and kind 1 is an arc piece with data
+        ## (cx,cy,r,side)
+        edges = []
+        def _line(p0,p1):
+            x0,y0 = _snap(p0[0],p0[1])
+            x1,y1 = _snap(p1[0],p1[1])
+            if y0 != y1:
+                edges.append((min(y0,y1),max(y0,y1),0,(x0,y0,x1,y1)))
+        def _add(g):
+            if ispoint(g):
+                return
+            elif isline(g):
+                _line(g[0],g[1])
+            elif isarc(g):
+                cx = g[0][0]
+                cy = g[0][1]
+                r = g[1][0]
+                if iscircle(g):
+                    brk = [ -90.0, 90.0, 270.0 ]
+                    ys = [ cy-r, cy+r, cy-r ]
+                else:
+                    start = g[1][1] % 360.0
+                    end = g[1][2] % 360.0
+                    if end == start:
+                        return
+                    if end < start:
+                        end += 360.0
+                    brk = [ start ]
+                    a = 90.0 + 180.0*floor((start-90.0)/180.0 + 1.0)
+                    while a < end:
+                        brk.append(a)
+                        a += 180.0
+                    brk.append(end)
+                    ys = [ cy+r*sin(b*pi2/360.0) for b in brk ]
+                    ys[0] = _snap(cx+r*cos(start*pi2/360.0),ys[0])[1]
+                    ys[-1] = _snap(cx+r*cos(end*pi2/360.0),ys[-1])[1]
+                    for k in range(1,len(brk)-1):
+                        ys[k] = cy+r if brk[k] % 360.0 == 90.0 else cy-r
+                for k in range(1,len(brk)):
+                    if ys[k-1] != ys[k]:
+                        mid = (brk[k-1]+brk[k])*pi2/720.0
+                        side = 1.0 if cos(mid) > 0.0 else -1.0
+                        edges.append((min(ys[k-1],ys[k]),max(ys[k-1],ys[k]),
+                                      1,(cx,cy,r,side)))
+            elif ispoly(g):
+                for k in range(1,len(g)):
+                    _line(g[k-1],g[k])
+            elif isinstance(g,list):
+                for gg in g:
+                    _add(gg)
+        _add(gl)
+        self._numedges = len(edges)
+
+        ys = sorted(set([e[0] for e in edges] + [e[1] for e in edges]))
+        self._ys = ys
+        members = [ [] for k in range(max(0,len(ys)-1)) ]
+        for e in edges:
+            for k in range(bisect_left(ys,e[0]),bisect_left(ys,e[1])):
+                members[k].append(e)
+        self._slabs = []
+        for k in range(len(members)):
+            m = members[k]
+            y0 = ys[k]
+            y1 = ys[k+1]
+            ym = (y0+y1)/2.0
+            m.sort(key=lambda e: _edgex(e,ym))
+            ## the slab is sorted if its edges are in the same order at
+            ## the bottom and the top of the slab
+            ordered = True
+            for i in range(1,len(m)):
+                if _edgex(m[i-1],y0) > _edgex(m[i],y0) + epsilon or \
+                   _edgex(m[i-1],y1) > _edgex(m[i],y1) + epsilon:
+                    ordered = False
+                    break
+            self._slabs.append((m,ordered))
+
+    ## count the edges crossing the +x ray from (px,py)
+    def _crossings(self,px,py):
+        ys = self._ys
+        if len(ys) < 2 or py < ys[0] or py >= ys[-1]:
+            return 0
+        m,ordered = self._slabs[bisect_right(ys,py)-1]
+        if not ordered:
+            return len([e for e in m if _rightof(e,px,py)])
+        lo = 0
+        hi = len(m)
+        while lo < hi:
+            mid = (lo+hi)//2
+            if _rightof(m[mid],px,py):
+                hi = mid
+            else:
+                lo = mid+1
+        return len(m)-lo
+
+    def isinside(self,p):
+        """is point ``p`` inside the figure?"""
+        self._refresh()
+        if self._bbox == False or not isinsidebbox(self._bbox,p):
+            return False
+        return self._crossings(p[0],p[1]) % 2 == 1
+
+    def isinside_many(self,pnts):
+        """batched ``isinside()``, returning a boolean array"""
+        return np.array([self.isinside(p) for p in PointArray(pnts)],
+                        dtype=bool)
+
+## does slab edge e pass to the right of point (px,py)?  For line
+## edges this is a robust orientation test.
+def _rightof(e,px,py):
+    if e[2] == 0:
+        x0,y0,x1,y1 = e[3]
+        o = orient2d((x0,y0),(x1,y1),(px,py))
+        return o > 0.0 if y1 > y0 else o < 0.0
+    return _edgex(e,py) > px
+
+## x coordinate of slab edge e at height y
+def _edgex(e,y):
+    if e[2] == 0:
+        x0,y0,x1,y1 = e[3]
+        return x0 + (y-y0)*(x1-x0)/(y1-y0)
+    cx,cy,r,side = e[3]
+    dy = y-cy
+    return cx + side*sqrt(max(r*r-dy*dy,0.0))
 
     
 ## Utility functions
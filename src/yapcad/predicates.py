@@ -0,0 +1,99 @@
+## robust geometric predicates for yapCAD
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+## Orientation tests are signs of small determinants.  Evaluated in
+## floating point, the sign can come out wrong when the points are
+## nearly collinear, which is exactly when the answer matters most.
+## The functions below follow Shewchuk's adaptive approach
+## ("Adaptive Precision Floating-Point Arithmetic and Fast Robust
+## Geometric Predicates", 1997): the determinant is first evaluated
+## in floating point together with a bound on its rounding error,
+## and only if the result is smaller than the bound is it evaluated
+## again exactly, here with rational arithmetic on the (exactly
+## representable) float inputs.
+
+## The returned values are the floating-point determinants, or the
+## exact determinants rounded to float, so their sign is always
+## correct and their magnitude can be used as an approximation.
+
+## Points are given as sequences whose first two elements are the x
+## and y coordinates, such as yapCAD points.
+
+from fractions import Fraction
+import numpy as np
+
+## machine epsilon, as used in Shewchuk's error bounds (half an ulp
+## of 1.0)
+_eps = 2.0**-53
+_ccwerrbound = (3.0 + 16.0*_eps)*_eps
+
+def _orient2dexact(ax,ay,bx,by,cx,cy):
+    ax,ay,bx,by,cx,cy = map(Fraction,(ax,ay,bx,by,cx,cy))
+    return float((ax-cx)*(by-cy) - (ay-cy)*(bx-cx))
+
+def orient2d(a,b,c):
+    """
+    Return a positive value if points ``a``, ``b`` and ``c`` are in
+    counterclockwise order, a negative value if they are in clockwise
+    order, and zero if they are collinear.  The value approximates
+    twice the signed area of the triangle ``a``, ``b``, ``c``.
+    """
+    detleft = (a[0]-c[0])*(b[1]-c[1])
+    detright = (a[1]-c[1])*(b[0]-c[0])
+    det = detleft - detright
+    ## if the two products differ in sign, the difference can't
+    ## change sign through rounding
+    if detleft > 0.0:
+        if detright <= 0.0:
+            return det
+        detsum = detleft + detright
+    elif detleft < 0.0:
+        if detright >= 0.0:
+            return det
+        detsum = -detleft - detright
+    else:
+        return det
+    if det >= _ccwerrbound*detsum or -det >= _ccwerrbound*detsum:
+        return det
+    return _orient2dexact(a[0],a[1],b[0],b[1],c[0],c[1])
+
+def orient2d_many(ax,ay,bx,by,cx,cy):
+    """
+    Batched ``orient2d()``, taking arrays of point coordinates that are
+    broadcast against each other, and returning an array of results.
+    """
+    ax,ay,bx,by,cx,cy = np.broadcast_arrays(*[np.asarray(v,dtype=np.float64)
+                                              for v in (ax,ay,bx,by,cx,cy)])
+    detleft = (ax-cx)*(by-cy)
+    detright = (ay-cy)*(bx-cx)
+    det = detleft - detright
+    bound = _ccwerrbound*(np.abs(detleft) + np.abs(detright))
+    unsure = (np.abs(det) < bound) & (detleft*detright > 0.0)
+    if np.any(unsure):
+        det = det.copy()
+        for i in zip(*np.nonzero(unsure)):
+            det[i] = _orient2dexact(ax[i],ay[i],bx[i],by[i],cx[i],cy[i])
+    return det
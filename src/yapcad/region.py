@@ -0,0 +1,144 @@
+## regions with holes for yapCAD
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+## The outline of a Boolean is a flat list of lines and arcs, and a
+## figure with holes is just several closed loops in that list.
+## Nothing records which loop is a hole of which, so a consumer that
+## needs to know (for area, filling, or hatching on export) has to
+## rediscover it with a point-in-polygon test of every loop against
+## every other.  A Region splits a figure into its closed loops once
+## and records their containment tree: the parent of each loop is the
+## smallest loop that encloses it, found with a BoxIndex over the
+## loop boxes and (usually) a single winding number test per loop.
+
+## Loops at even depth are outer boundaries, and loops at odd depth
+## are holes.  As with offsetXY(), loops are oriented so that outer
+## boundaries run counterclockwise and holes clockwise, which makes
+## the signed loop areas add up to the area of the region.
+
+from math import *
+import numpy as np
+from yapcad.geom import *
+from yapcad.geom import _xybox
+from yapcad.spatial import BoxIndex
+from yapcad.offset import _elements, _loops, _looparea, _reverseloop, \
+    _nest, _depths
+
+class Region:
+    """closed loops of a figure, with the tree of which loop lies
+    inside which"""
+
+    def __init__(self,x=[]):
+        if hasattr(x,'geom'):
+            x = x.geom(copy=False)
+        loops = _loops(_elements(x,[]))
+        self.parent = _nest(loops)
+        self.depth = _depths(self.parent)
+        self.children = [ [] for l in loops ]
+        for i,j in enumerate(self.parent):
+            if j >= 0:
+                self.children[j].append(i)
+        for i in range(len(loops)):
+            if (_looparea(loops[i]) < 0.0) != (self.depth[i] % 2 == 1):
+                loops[i] = _reverseloop(loops[i])
+            else:
+                loops[i] = deepcopy(loops[i])
+        self.loops = loops
+        self._index = None
+
+    def __repr__(self):
+        return 'Region({} outer loops, {} holes)'.format(
+            len(self.outers()),len(self.loops)-len(self.outers()))
+
+    def __len__(self):
+        return len(self.loops)
+
+    def isempty(self):
+        return len(self.loops) == 0
+
+    def outers(self):
+        """return the indices of the loops that are outer boundaries"""
+        return [ i for i in range(len(self.loops)) if self.depth[i] % 2 == 0 ]
+
+    def holes(self,i):
+        """return the indices of the holes of outer loop ``i``"""
+        return list(self.children[i])
+
+    def faces(self):
+        """
+        Return the region as a list of faces, each a list of loop
+        indices holding an outer loop followed by its holes.  Islands
+        inside holes are faces of their own.
+        """
+        return [ [i] + self.children[i] for i in self.outers() ]
+
+    def loopArea(self,i):
+        """signed area of loop ``i``, negative for holes"""
+        return _looparea(self.loops[i])
+
+    def area(self):
+        """area of the region, with the holes taken out"""
+        return sum(_looparea(l) for l in self.loops)
+
+    def bbox(self):
+        if self.loops == []:
+            return False
+        return bbox(self.geom(copy=False))
+
+    ## BoxIndex over the loop boxes, built on the first point query
+    def _loopindex(self):
+        if self._index is None:
+            self._index = BoxIndex([ _xybox(l,0.0) for l in self.loops ])
+        return self._index
+
+    def isinside(self,p):
+        """
+        Return ``True`` if point ``p`` lies inside the region.  The
+        deepest loop around ``p`` decides, and only loops whose boxes
+        hold ``p`` are tested, deepest first.
+        """
+        if self.loops == []:
+            return False
+        cand = self._loopindex().query([p[0],p[1],p[0],p[1]])
+        cand.sort(key=lambda i: -self.depth[i])
+        for i in cand:
+            if windingnumberXY(self.loops[i],p) != 0:
+                return self.depth[i] % 2 == 0
+        return False
+
+    ## batched isinside(), returning a boolean array
+    def isinside_many(self,pnts):
+        if self.loops == []:
+            return np.zeros(len(PointArray(pnts)),dtype=bool)
+        return isinside_many(self.geom(copy=False),pnts)
+
+    def geom(self,copy=True):
+        """return the loops as a flat list of lines and arcs"""
+        gl = [ e for l in self.loops for e in l ]
+        if copy:
+            return deepcopy(gl)
+        return gl
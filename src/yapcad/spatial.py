@@ -0,0 +1,137 @@
+## spatial indexing of bounding boxes for yapCAD
+
+## Copyright (c) 2020 Richard W. DeVaul
+## Copyright (c) 2020 yapCAD contributors
+## All rights reserved
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+## Intersecting two figures made of n and m elements by testing every
+## pair of elements is O(n*m), but almost all of those pairs are far
+## apart.  The BoxIndex class is a uniform hash grid over the XY
+## bounding boxes of a list of elements, which answers "which elements
+## might touch this box" by looking only at the grid cells the query
+## box covers.
+
+## Boxes are given as [xmin,ymin,xmax,ymax] rows.  This module knows
+## nothing about geometry; yapcad.geom computes the element boxes and
+## caches an index on each PreparedPath (see PreparedPath.index()).
+
+## Query results are sorted lists of element indices, so that callers
+## that visit the candidates in order produce results in the same
+## order as a linear walk over all elements.
+
+import numpy as np
+
+## elements that would cover more than this many grid cells are kept
+## in a separate list that is checked on every query
+_maxcells = 64
+
+class BoxIndex:
+    """uniform hash grid over a list of XY bounding boxes"""
+
+    def __init__(self,boxes,cellsize=None):
+        self.boxes = np.array(boxes,dtype=np.float64).reshape((-1,4))
+        self._cells = {}
+        self._big = []
+        n = len(self.boxes)
+        if n == 0:
+            self.cellsize = 1.0
+            self._origin = (0.0,0.0)
+            self._range = (0,-1,0,-1)
+            return
+        b = self.boxes
+        xmin = float(np.min(b[:,0]))
+        ymin = float(np.min(b[:,1]))
+        xmax = float(np.max(b[:,2]))
+        ymax = float(np.max(b[:,3]))
+        if cellsize is None:
+            ## cells about twice the size of a typical element, but
+            ## no more than n cells across the whole extent
+            ext = np.maximum(b[:,2]-b[:,0],b[:,3]-b[:,1])
+            cellsize = max(2.0*float(np.median(ext)),
+                           max(xmax-xmin,ymax-ymin)/n)
+            if not cellsize > 0.0:
+                cellsize = 1.0
+        self.cellsize = cellsize
+        self._origin = (xmin,ymin)
+
+        i0,j0 = self._cell(b[:,0],b[:,1])
+        i1,j1 = self._cell(b[:,2],b[:,3])
+        self._range = (int(np.min(i0)),int(np.max(i1)),
+                       int(np.min(j0)),int(np.max(j1)))
+        cells = self._cells
+        for k,a0,a1,c0,c1 in zip(range(n),i0.tolist(),i1.tolist(),
+                                 j0.tolist(),j1.tolist()):
+            if (a1-a0+1)*(c1-c0+1) > _maxcells:
+                self._big.append(k)
+                continue
+            for i in range(a0,a1+1):
+                for j in range(c0,c1+1):
+                    cells.setdefault((i,j),[]).append(k)
+
+    def __repr__(self):
+        return 'BoxIndex({} boxes, {} cells)'.format(len(self.boxes),
+                                                     len(self._cells))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    ## grid cell coordinates of the point(s) x,y
+    def _cell(self,x,y):
+        return (np.floor((x-self._origin[0])/self.cellsize).astype(np.int64),
+                np.floor((y-self._origin[1])/self.cellsize).astype(np.int64))
+
+    def query(self,box):
+        """
+        Return the sorted list of indices of the boxes that overlap
+        (or touch) ``box``, given as ``[xmin,ymin,xmax,ymax]``.
+        """
+        b = self.boxes
+        if len(b) == 0:
+            return []
+        i0,j0 = self._cell(np.float64(box[0]),np.float64(box[1]))
+        i1,j1 = self._cell(np.float64(box[2]),np.float64(box[3]))
+        r = self._range
+        i0 = max(int(i0),r[0])
+        i1 = min(int(i1),r[1])
+        j0 = max(int(j0),r[2])
+        j1 = min(int(j1),r[3])
+        if i1 < i0 or j1 < j0:
+            cand = self._big
+        elif (i1-i0+1)*(j1-j0+1) >= len(b):
+            ## the query covers most of the grid
+            cand = range(len(b))
+        else:
+            cand = set(self._big)
+            cells = self._cells
+            for i in range(i0,i1+1):
+                for j in range(j0,j1+1):
+                    c = cells.get((i,j))
+                    if c:
+                        cand.update(c)
+        if not cand:
+            return []
+        cand = np.fromiter(cand,dtype=np.int64)
+        cb = b[cand]
+        keep = (cb[:,0] <= box[2]) & (cb[:,2] >= box[0]) & \
+            (cb[:,1] <= box[3]) & (cb[:,3] >= box[1])
+        return sorted(cand[keep].tolist())
@@ -0,0 +1,76 @@
+import pytest
+from math import *
+from yapcad.geom import *
+from yapcad.clip import *
+## unit tests for yapCAD clip.py
+
+def rect(x0,y0,x1,y1):
+    return [point(x0,y0),point(x1,y0),point(x1,y1),point(x0,y1),
+            point(x0,y0)]
+
+def loops(gl):
+    if gl and isline(gl[0]):
+        return [gl]
+    return gl
+
+## signed area of a clipXY() result
+def area(gl):
+    a = 0.0
+    for l in loops(gl):
+        for e in l:
+            a += e[0][0]*e[1][1] - e[1][0]*e[0][1]
+    return a/2.0
+
+class TestClip:
+    def test_ops(self):
+        a = rect(0,0,2,2)
+        b = rect(1,1,3,3)
+        assert area(clipXY([a,b],'union')) == pytest.approx(7.0)
+        assert area(clipXY([a,b],'intersection')) == pytest.approx(1.0)
+        assert area(clipXY([a,b],'difference')) == pytest.approx(3.0)
+        assert area(clipXY([a,b],'xor')) == pytest.approx(6.0)
+        assert len(loops(clipXY([a,b],'xor'))) == 2
+        assert clipXY([a,rect(5,5,6,6)],'intersection') == []
+        with pytest.raises(ValueError):
+            clipXY([a,b],'nand')
+
+    def test_holes(self):
+        ## a hole is returned as a clockwise loop
+        r = clipXY([rect(0,0,4,4),rect(1,1,2,2)],'difference')
+        assert sorted(area([l]) for l in loops(r)) == \
+            pytest.approx([-1.0,16.0])
+        ## and an operand with a hole is filled even-odd
+        r = clipXY([r,rect(1.5,-1,3,5)],'union')
+        assert area(r) == pytest.approx(18.5)
+        ## squares touching at a corner stay separate loops, squares
+        ## sharing an edge merge into one rectangle of four lines
+        assert len(loops(clipXY([rect(0,0,1,1),rect(1,1,2,2)]))) == 2
+        r = clipXY([rect(0,0,1,1),rect(1,0,2,1)])
+        assert len(r) == 4 and area(r) == pytest.approx(2.0)
+
+    def test_many(self):
+        ops = [ rect(i,0,i+1.5,1) for i in range(10) ]
+        r = clipXY(ops,'union')
+        assert len(r) == 4 and area(r) == pytest.approx(10.5)
+        assert area(clipXY(ops,'xor')) == pytest.approx(10.5-4.5)
+        r = clipXY([rect(-1,-1,12,2)] + ops,'difference')
+        assert area(r) == pytest.approx(13*3-10.5)
+
+    def test_grid(self):
+        ## vertices are snapped to the grid, and so are crossings
+        r = clipXY([rect(0,0,1.04,1),rect(0.5,0.5,2,2.02)],'union',grid=0.1)
+        for e in r:
+            for p in e:
+                for c in p[:2]:
+                    assert abs(c*10 - round(c*10)) < 1e-9
+        assert area(r) == pytest.approx(1.0 + 1.5*1.5 - 0.25)
+
+    def test_arcs(self):
+        c = [arc(point(0,0),1.0)]
+        with pytest.raises(ValueError):
+            clipXY([c,rect(0,0,2,2)])
+        r = clipXY([c,rect(0,0,2,2)],'union',tol=1e-4)
+        assert area(r) == pytest.approx(4.0 + 0.75*pi,rel=1e-3)
+        for e in r:
+            for p in e:
+                assert mag(p) > 1.0-1e-4-1e-6
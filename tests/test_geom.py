@@ -173,6 +173,21 @@ class TestArc:
             print("  assert that these are the same")
             assert close(u,uu)
 
+    def test_bbox(self):
+        ## a partial arc whose lowest point, at 270 degrees, lies
+        ## between samples
+        c = arc(point(1,2),2.0,200.0,330.0)
+        bb = arcbbox(c)
+        assert vclose(bb[0],point(1-2*cos(pi/9),0))
+        assert vclose(bb[1],point(1+sqrt(3),2-2*sin(pi/9)))
+        ## an outline ending in such an arc: every inside test agrees
+        ## with the winding number just above its lowest point
+        gl = [c,line(samplearc(c,1.0),samplearc(c,0.0))]
+        p = point(1,0.01)
+        assert windingnumberXY(gl,p) == 1
+        assert isinsideXY(gl,p)
+        assert list(isinside_many(gl,[p])) == [True]
+
     def test_intersect_line(self):
         print("---> line-arc intersection testing")
         arc1=[vect(2.5,2.5),vect(2.5,90.0,270.0)]
@@ -288,8 +303,50 @@ class TestArc:
             assert close(uu2,u2)
             assert vclose(p,p1)
             assert vclose(p,p2)
-            
-        
+
+    def test_line_arc(self):
+        ## a segment ending on the circle keeps both intersections
+        r = lineArcIntersectXY(line(point(-6,0),point(6,0)),
+                               arc(point(5,0),1.0),params=True)
+        assert sorted(r[0]) == pytest.approx([5/6,1.0])
+        ## tangent and nearly tangent lines have one intersection
+        c = arc(point(0,0),2.0)
+        for y in (2.0,2.0+1e-7,2.0-1e-7):
+            r = lineArcIntersectXY(line(point(-3,y),point(3,y)),c,params=True)
+            assert r[0] == pytest.approx([0.5])
+
+    def test_arc_arc_params(self):
+        ## the second arc spans 0 degrees
+        c1 = arc(point(0,0),2.0,0.0,180.0)
+        c2 = arc(point(2,0),2.0,300.0,150.0)
+        for a,b in ((c1,c2),(c2,c1)):
+            r = arcArcIntersectXY(a,b,params=True)
+            uu = [ (ua,ub) for ua,ub in zip(r[0],r[1])
+                   if ua >= 0.0 and ua <= 1.0 and ub >= 0.0 and ub <= 1.0 ]
+            assert len(uu) == 1
+            assert vclose(samplearc(a,uu[0][0]),samplearc(b,uu[0][1]))
+            assert vclose(samplearc(a,uu[0][0]),point(1,sqrt(3)))
+
+    def test_line_arc_many(self):
+        c = arc(point(1,0.5),2.0,30.0,250.0)
+        rng = np.random.default_rng(2)
+        ls = [line(point(*rng.uniform(-4,4,2)),point(*rng.uniform(-4,4,2)))
+              for i in range(200)]
+        ls.append(line(point(-3,2.5),point(3,2.5)))
+        for inside in (True,False):
+            uu1,uu2 = lineArcIntersectXY_many(ls,c,inside)
+            for l,u1,u2 in zip(ls,uu1,uu2):
+                r = lineArcIntersectXY(l,c,inside=False,params=True)
+                expect = []
+                if r:
+                    expect = [ (a,b) for a,b in zip(r[0],r[1])
+                               if not inside or (a >= 0.0 and a <= 1.0 and
+                                                 b >= 0.0 and b <= 1.0) ]
+                got = [ (a,b) for a,b in zip(u1,u2) if not isnan(a) ]
+                assert len(got) == len(expect)
+                for a,b in zip(sorted(got),sorted(expect)):
+                    assert a == pytest.approx(b)
+
 class TestUtility:
     def test_copy(self):
         a = point(-5,-1)
@@ -306,6 +363,25 @@ class TestUtility:
         foo[0]=e
         assert not foobar==foo
         bar = [a,b,[1,2],l2,l3]
+
+    def test_copy_structure(self):
+        a = point(-5,-1)
+        arc1 = arc(point(1,1),2.0,0.0,90.0,samplereverse=True)
+        pol1 = poly(a,point(5,3),point(0,4),a)
+        gl = [pol1,[arc1,line(a,point(1,1))],a]
+        gc = deepcopy(gl)
+        assert gc == gl
+        gc[0][0][0] = 100.0
+        gc[1][0][1][0] = 7.0
+        assert pol1[0][0] == -5
+        assert arc1[1][0] == 2.0
+        ## tagged figures stay tagged
+        tc = deepcopy(tag(gl))
+        assert istagged(tc) and istagged(tc[1][0])
+        ## non-geometry falls back to copy.deepcopy
+        d = {'a': [a]}
+        dc = deepcopy(d)
+        assert dc == d and dc['a'][0] is not a
         
 class TestPoly:
     def test_create(self):
@@ -435,3 +511,316 @@ class TestPoly:
         print("intersectSimplePolyXY(arc1,pol2,params=True): ",vstr(int0u))
 
 
+
+class TestPointArray:
+    def test_convert(self):
+        a = point(0,-5)
+        b = point(5,0)
+        c = point(0,5,2)
+        pol1 = poly(a,b,c,a)
+        pa = PointArray(pol1)
+        assert len(pa) == 4
+        assert ispointarray(pa)
+        assert pa.poly() == pol1
+        assert ispoly(pa.poly())
+        assert poly(pa) == pol1
+        assert pa[2] == c
+        assert vclose(samplepoly(pa.poly(),0.5),samplepoly(pol1,0.5))
+        pa2 = PointArray(np.array([[1.0,2.0],[3.0,4.0]]))
+        assert pa2.poly() == [[1,2,0,1],[3,4,0,1]]
+        with pytest.raises(ValueError):
+            PointArray([a,b,'foo'])
+
+    def test_kernels(self):
+        pts1 = [point(5,0),point(0,5),point(-3,-3),point(1,2,3)]
+        pts2 = [point(0,5),point(1,1),point(1,1),point(-2,0,4)]
+        pa1 = PointArray(pts1)
+        pa2 = PointArray(pts2)
+        s = add_many(pa1,pa2)
+        d = sub_many(pa1,pa2)
+        x = cross_many(pa1,pa2)
+        sc = scale3_many(pa1,2.5)
+        dt = dot_many(pa1,pa2)
+        m = mag_many(pa1)
+        ds = dist_many(pa1,pa2)
+        for i in range(len(pts1)):
+            assert vclose(s[i],add(pts1[i],pts2[i]))
+            assert vclose(d[i],sub(pts1[i],pts2[i]))
+            assert vclose(x[i],cross(pts1[i],pts2[i]))
+            assert vclose(sc[i],scale3(pts1[i],2.5))
+            assert close(dt[i],dot(pts1[i],pts2[i]))
+            assert close(m[i],mag(pts1[i]))
+            assert close(ds[i],dist(pts1[i],pts2[i]))
+        ## single points broadcast against arrays
+        t = add_many(pa1,point(1,1))
+        assert vclose(t[3],point(2,3,3))
+        h = homo_many([point(2,4,6,2),point(1,1,1,0.5)])
+        assert vclose(h[0],point(1,2,3))
+        assert vclose(h[1],point(2,2,2))
+
+class TestTagged:
+    def test_tag(self):
+        a = point(0,-5)
+        b = point(5,0)
+        c = point(0,5)
+        pol1 = poly(a,b,c,a)
+        l1 = line(point(-10,0),point(10,0))
+        arc1 = arc(point(0,0),2.0)
+        gl = [pol1,[l1,arc1],point(1,1)]
+        tgl = tag(gl)
+        assert istagged(tgl)
+        assert tgl == gl
+        assert tgl.kind == 'glist'
+        assert tgl[0].kind == 'poly'
+        assert tgl[1].kind == 'glist'
+        assert tgl[1][1].kind == 'arc'
+        assert isgeomlist(tgl)
+        assert isgeomlistXYPlanar(tgl)
+        assert ispoly(tgl[0]) and isgeomlist(tgl[0])
+        assert not ispoly(tgl) and not ispoly(tgl[1][1])
+        assert close(length(tgl),length(gl))
+        assert vclose(sample(tgl,0.3),sample(gl,0.3))
+        assert intersectXY(l1,tgl) == intersectXY(l1,gl)
+        ## copies keep the tag, in-place changes drop it
+        tcopy = deepcopy(tgl)
+        assert istagged(tcopy) and istagged(tcopy[0])
+        tcopy.append('foo')
+        assert not istagged(tcopy)
+        assert not isgeomlist(tcopy)
+        with pytest.raises(ValueError):
+            tag([pol1,[1,2]])
+
+    def test_planar(self):
+        pol1 = poly(point(0,0),point(1,0),point(1,1,1))
+        tp = tag(pol1)
+        assert tp.kind == 'poly'
+        assert tp.xyplane is False
+        assert not isgeomlistXYPlanar(tp)
+        tgl = tag([line(point(0,0,1),point(1,1,1)),point(0,0,2)])
+        assert not isgeomlistXYPlanar(tgl)
+        with pytest.raises(ValueError):
+            intersectSimplePolyXY(line(point(0,-1),point(0,2)),tp)
+
+class TestPreparedPath:
+    def test_sample(self):
+        pol1 = poly(point(0,0),point(4,0),point(4,3),point(0,3),point(0,0))
+        pp = PreparedPath(pol1)
+        assert pp.closed and pp.ispoly
+        assert close(pp.length,14.0)
+        assert pp.cumlengths == [0.0,4.0,7.0,11.0,14.0]
+        assert vclose(pp.sample(0.5),point(4,3))
+        assert vclose(pp.sample(1.25),pp.sample(0.25))
+        assert close(pp.unsample(point(2,3)),9.0/14.0)
+        assert pp.unsample(point(2,2)) == False
+        assert pp.segment(0.0,0.5) == [point(0,0),point(4,0),point(4,3)]
+        ## open paths extrapolate from the end segments
+        pl = poly(point(0,0),point(1,0),point(1,1))
+        assert vclose(samplepoly(pl,-0.5),point(-1,0))
+        assert vclose(samplepoly(pl,1.5),point(1,2))
+
+    def test_geomlist(self):
+        gl = [line(point(0,0),point(2,0)),
+              arc(point(2,1),1.0,270.0,90.0,samplereverse=True),
+              line(point(2,2),point(0,2))]
+        pp = PreparedPath(gl)
+        assert len(pp) == 3 and not pp.closed
+        for u in (0.1,0.4,0.5,0.9):
+            assert vclose(pp.sample(u),samplegeomlist(gl,u))
+            assert close(unsample(gl,pp.sample(u)),u)
+        sgl = segmentgeomlist(gl,0.8,0.2,closed=True)
+        assert abs(length(sgl)-0.4*pp.length) < 0.001
+
+    def test_cache(self):
+        tp = tag(poly(point(0,0),point(1,0),point(1,1)))
+        pp = preparedpath(tp)
+        assert preparedpath(tp) is pp
+        assert vclose(samplepoly(tp,0.75),point(1,0.5))
+        tp.append(point(0,1))
+        assert preparedpath(tp) is not pp
+        assert close(preparedpath(tp).length,3.0)
+        with pytest.raises(ValueError):
+            PreparedPath(point(0,0))
+
+class TestBatchSample:
+    def test_sample_many(self):
+        pol1 = poly(point(0,0),point(4,0),point(4,3),point(0,3),point(0,0))
+        l1 = line(point(0,0),point(2,2))
+        arc1 = arc(point(1,1),2.0,45.0,270.0,samplereverse=True)
+        gl = [l1,arc1]
+        us = np.linspace(-0.5,1.5,21)
+        for x in (l1,arc1,pol1,gl):
+            pa = sample_many(x,us)
+            assert ispointarray(pa) and len(pa) == len(us)
+            for u,p in zip(us,pa):
+                assert vclose(p,sample(x,u))
+
+    def test_unsample_many(self):
+        pol1 = poly(point(0,0),point(4,0),point(4,3),point(0,3),point(0,0))
+        us = np.array([0.0,0.1,0.35,0.6,0.99])
+        r = unsample_many(pol1,sample_many(pol1,us))
+        assert np.allclose(r,us)
+        r = unsample_many(pol1,[point(2,2),point(2,0)])
+        assert np.isnan(r[0]) and close(r[1],1.0/7.0)
+        arc1 = arc(point(1,1),2.0,300.0,60.0)
+        r = unsample_many(arc1,sample_many(arc1,us))
+        assert np.allclose(r,us)
+
+class TestWinding:
+    def test_poly(self):
+        sq = poly(point(-1,-1),point(1,-1),point(1,1),point(-1,1),point(-1,-1))
+        assert windingnumberXY(sq,point(0,0)) == 1
+        assert windingnumberXY(list(reversed(sq)),point(0,0)) == -1
+        assert windingnumberXY(sq,point(3,0)) == 0
+        ## rays through vertices used to be miscounted
+        sq2 = poly(point(-1,-1),point(2,-1),point(3,3),point(-1,2),point(-1,-1))
+        assert isinsideXY(sq2,point(0,0))
+        assert isinsideXY(sq,point(0,0))
+
+    def test_arcs(self):
+        d = [line(point(0,-1),point(0,1)),
+             arc(point(0,0),1.0,90.0,270.0)]
+        assert windingnumberXY(d,point(-0.5,0)) == 1
+        assert windingnumberXY(d,point(0.5,0)) == 0
+        ## a tangent point of the arc, and a nearly-tangent ray
+        assert windingnumberXY(d,point(-0.01,0.99)) == 1
+        assert windingnumberXY(d,point(-2.0,1.0)) == 0
+        ## a sample-reversed arc runs clockwise
+        rd = [line(point(0,1),point(0,-1)),
+              arc(point(0,0),1.0,90.0,270.0,samplereverse=True)]
+        assert windingnumberXY(rd,point(-0.5,0)) == -1
+        ## holes work with either orientation
+        ring = [arc(point(0,0),2.0),arc(point(0,0),1.0)]
+        assert isinsideXY(ring,point(1.5,0))
+        assert not isinsideXY(ring,point(0.5,0))
+        ## small gaps between elements don't matter
+        gap = [line(point(0,-1),point(0,-0.00001)),
+               line(point(0,0.00001),point(0,1)),
+               arc(point(0,0),1.0,90.0,270.0)]
+        assert isinsideXY(gap,point(-0.5,0.0))
+        assert not isinsideXY(gap,point(0.5,0.0))
+
+class TestBatchInside:
+    def test_simple(self):
+        pnts = [point(0,0),point(1,0.5),point(3,0),point(-1,-1),point(0.5,1.5)]
+        l1 = line(point(-1,-1),point(2,2))
+        arc1 = arc(point(0,0),2.0,0.0,90.0)
+        circ1 = arc(point(0,0),2.0)
+        pol1 = poly(point(-2,-2),point(2,-2),point(2,2),point(-2,2),point(-2,-2))
+        pol2 = poly(point(-1,-1),point(2,-1),point(2,2))
+        expect = [ (point(1,0.5),[False,True,False,False,False]),
+                   (l1,[True,False,False,True,False]),
+                   (arc1,[True,True,False,False,True]),
+                   (circ1,[True,True,False,True,True]),
+                   (pol1,[True,True,False,True,True]),
+                   (pol2,[False,False,False,True,False]) ]
+        for x,e in expect:
+            assert list(isinside_many(x,pnts)) == e
+
+    def test_arc_edges(self):
+        ## a closed "D" shape made of a line and a semicircle that
+        ## spans the top of the circle, and a ring made of two circles
+        gl = [line(point(0,-1),point(0,1)),
+              arc(point(0,0),1.0,90.0,270.0)]
+        ring = [arc(point(0,0),2.0),arc(point(0,0),1.0)]
+        pnts = PointArray(np.random.default_rng(1).uniform(-3,3,(500,2)))
+        r = isinside_many(gl,pnts)
+        d = mag_many(pnts)
+        assert np.array_equal(r,(d < 1.0) & (pnts.array[:,0] < 0.0))
+        r = isinside_many(ring,pnts)
+        assert np.array_equal(r,(d < 2.0) & (d > 1.0))
+
+class TestSweep:
+    def test_intersect(self):
+        a = [point(cos(i*pi2/50)*5,sin(i*pi2/50)*5) for i in range(50)]
+        a.append(a[0])
+        b = [line(point(-6,0),point(6,0)),arc(point(0,3),3.0,0.0,180.0),
+             arc(point(5,0),1.0)]
+        for g1,g2 in ((a,b),(b,a),(b[1],a)):
+            r = sweepIntersectXY(g1,g2)
+            r2 = intersectXY(g1,g2,params=True)
+            flat = lambda r: [u for uu in sorted(zip(r[0],r[1])) for u in uu]
+            assert flat(r) == pytest.approx(flat(r2))
+            for u1,u2 in zip(r[0],r[1]):
+                assert vclose(sample(g1,u1),sample(g2,u2))
+        assert sweepIntersectXY(b[1],b[2]) is False
+
+    def test_self(self):
+        sq = poly(point(-1,-1),point(1,-1),point(1,1),point(-1,1),point(-1,-1))
+        assert selfIntersectXY(sq) is False
+        bowtie = poly(point(0,0),point(2,2),point(2,0),point(0,2),point(0,0))
+        r = selfIntersectXY(bowtie)
+        assert len(r[0]) == 1
+        assert vclose(sample(bowtie,r[0][0]),point(1,1))
+        assert vclose(sample(bowtie,r[1][0]),point(1,1))
+        d = [line(point(0,-1),point(0,1)),
+             arc(point(0,0),1.0,90.0,270.0)]
+        assert selfIntersectXY(d) is False
+        d.append(line(point(-2,0),point(1,0)))
+        r = selfIntersectXY(d)
+        assert len(r[0]) == 2
+
+    def test_box_reject(self,monkeypatch):
+        import yapcad.geom as geom
+        rng = np.random.default_rng(3)
+        def rand(ox):
+            if rng.uniform() < 0.5:
+                return line(point(*(rng.uniform(0,1,2)+[ox,0])),
+                            point(*(rng.uniform(0,1,2)+[ox,0])))
+            return arc(point(*(rng.uniform(0.3,0.6,2)+[ox,0])),
+                       rng.uniform(0.1,0.3),rng.uniform(0,360),
+                       rng.uniform(0,360))
+        ## pairs whose boxes overlap give the same parameters, within
+        ## both elements, as the unpruned calculation
+        for i in range(200):
+            a = rand(0.0)
+            b = rand(rng.uniform(-0.5,0.5))
+            r = intersectXY(a,b,params=True)
+            r2 = intersectXY(a,b,inside=False,params=True)
+            inr = lambda r: sorted((u1,u2) for u1,u2 in zip(r[0],r[1])
+                                   if 0.0 <= u1 <= 1.0 and 0.0 <= u2 <= 1.0)
+            assert inr(r or [[],[]]) == inr(r2 or [[],[]])
+        ## disjoint pairs are rejected before any intersection is
+        ## calculated
+        calls = []
+        for name in ('lineLineIntersectXY','lineArcIntersectXY',
+                     'arcArcIntersectXY'):
+            f = getattr(geom,name)
+            monkeypatch.setattr(geom,name,
+                                lambda *a,f=f: calls.append(1) or f(*a))
+        for i in range(50):
+            assert intersectXY(rand(0.0),rand(5.0),params=True) is False
+        assert calls == []
+        assert intersectXY(rand(0.0),rand(5.0),inside=False,
+                           params=True) is not None
+        assert len(calls) == 1
+
+class TestChecking:
+    def test_unchecked(self):
+        pol1 = poly(point(0,0),point(1,0),point(1,1,1))
+        l = line(point(0.5,-1),point(0.5,2))
+        assert checking()
+        with pytest.raises(ValueError):
+            intersectSimplePolyXY(l,pol1)
+        with unchecked():
+            assert not checking()
+            ## no planarity check, so no exception
+            intersectSimplePolyXY(l,pol1)
+        assert checking()
+        try:
+            setdebugchecks(True)
+            with unchecked():
+                assert checking()
+                with pytest.raises(ValueError):
+                    intersectSimplePolyXY(l,pol1)
+        finally:
+            setdebugchecks(False)
+
+    def test_same_results(self):
+        pol2 = poly(point(0,-5),point(5,0),point(0,5),point(-5,0),point(0,-5))
+        line1 = line(point(0,0),point(5,5))
+        arc1 = arc(point(0,0),4.0,270,90)
+        r1 = intersectXY(line1,pol2,params=True)
+        r2 = intersectXY(arc1,[pol2,line1],params=True)
+        with unchecked():
+            assert intersectXY(line1,pol2,params=True) == r1
+            assert intersectXY(arc1,[pol2,line1],params=True) == r2
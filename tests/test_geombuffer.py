@@ -0,0 +1,65 @@
+import pytest
+from yapcad.geom import *
+from yapcad.geombuffer import *
+import yapcad.xform as xform
+## unit tests for yapCAD geombuffer.py
+
+def _glist():
+    return [ point(1,2),
+             line(point(0,0),point(3,4)),
+             arc(point(5,5),2.0),
+             arc(point(-5,0),1.0,45.0,135.0,samplereverse=True),
+             [ poly(point(0,-5),point(5,0),point(0,5),point(0,-5)),
+               line(point(-1,-1),point(-2,-3)) ],
+             arc(point(0,0),3.0,300.0,30.0) ]
+
+class TestGeometryBuffer:
+    def test_convert(self):
+        gl = _glist()
+        gb = GeometryBuffer(gl)
+        assert len(gb) == 7
+        flat = gl[0:4] + gl[4] + gl[5:]
+        assert gb.geomlist() == flat
+        assert isgeomlist(gb.geomlist())
+        assert GeometryBuffer(gb).geomlist() == flat
+        assert GeometryBuffer([]).bbox() == False
+        with pytest.raises(ValueError):
+            GeometryBuffer([point(0,0),'foo'])
+
+    def test_length_bbox(self):
+        gl = _glist()
+        gb = GeometryBuffer(gl)
+        assert close(gb.length(),length(gl))
+        flat = gb.geomlist()
+        lens = gb.lengths()
+        bbs = gb.bboxes()
+        for i in range(len(flat)):
+            assert close(lens[i],length(flat[i]))
+            ## exact bounding boxes contain the sampled ones
+            bb = bbox(flat[i])
+            assert bbs[i][0][0] <= bb[0][0] + epsilon
+            assert bbs[i][0][1] <= bb[0][1] + epsilon
+            assert bbs[i][1][0] >= bb[1][0] - epsilon
+            assert bbs[i][1][1] >= bb[1][1] - epsilon
+        ## arc spanning the 0 degree direction reaches x=3
+        assert close(bbs[-1][1][0],3.0)
+        bb = gb.bbox()
+        assert close(bb[0][0],-5.0-cos(pi/4))
+        assert close(bb[0][1],-5.0)
+        assert close(bb[1][0],7.0)
+        assert close(bb[1][1],7.0)
+
+    def test_transform(self):
+        gl = _glist()
+        gb = GeometryBuffer(gl)
+        d = point(10,-3)
+        gt = gb.translate(d)
+        assert gt.geomlist() == GeometryBuffer(translate(gl,d)).geomlist()
+        m = xform.Rotation(point(0,0,1),90.0)
+        gr = gb.transform(m)
+        rr = rotate(gb.geomlist(),90.0)
+        for g1,g2 in zip(gr.geomlist(),rr):
+            for u in (0.0,0.3,1.0):
+                assert vclose(sample(g1,u),sample(g2,u))
+        with pytest.raises(NotImplementedError):
+            gb.transform(xform.Scale(1.0,2.0,1.0))
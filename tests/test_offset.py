@@ -0,0 +1,96 @@
+import pytest
+from math import *
+from yapcad.geom import *
+from yapcad.offset import *
+from yapcad.offset import _looparea, _xydist, _elements
+## unit tests for yapCAD offset.py
+
+def square(w):
+    return [point(-w/2,-w/2),point(w/2,-w/2),point(w/2,w/2),
+            point(-w/2,w/2),point(-w/2,-w/2)]
+
+## every point of the offset is d from the figure
+def checkdistance(x,loops,d):
+    orig = _elements(x,[])
+    for l in loops:
+        for e in l:
+            for u in (0.1,0.5,0.9):
+                p = sample(e,u)
+                m = min(_xydist(o,p[0],p[1]) for o in orig)
+                assert m == pytest.approx(abs(d),abs=1e-6)
+
+class TestOffset:
+    def test_square(self):
+        s = square(2)
+        r = offsetXY(s,1.0)
+        assert len(r) == 1
+        assert _looparea(r[0]) == pytest.approx(4.0+8.0+pi)
+        checkdistance(s,r,1.0)
+        ## clockwise figures grow just the same
+        r = offsetXY(list(reversed(s)),1.0)
+        assert _looparea(r[0]) == pytest.approx(4.0+8.0+pi)
+        r = offsetXY(s,-0.5)
+        assert len(r) == 1 and len(r[0]) == 4
+        assert _looparea(r[0]) == pytest.approx(1.0)
+        assert offsetXY(s,-1.5) == []
+
+    def test_concave(self):
+        L = [point(0,0),point(4,0),point(4,1),point(1,1),point(1,4),
+             point(0,4),point(0,0)]
+        r = offsetXY(L,0.5)
+        assert len(r) == 1
+        ## five rounded convex corners, one overlapping concave corner
+        assert _looparea(r[0]) == pytest.approx(
+            7.0+16*0.5+5*(pi/2)*0.125-0.25)
+        checkdistance(L,r,0.5)
+        r = offsetXY(L,-0.25)
+        assert _looparea(r[0]) == pytest.approx(
+            3.25+0.0625-pi*0.0625/4)
+        checkdistance(L,r,-0.25)
+
+    def test_split(self):
+        ## two squares joined by a neck narrower than twice the offset
+        db = [point(0,0),point(2,0),point(2,0.8),point(3,0.8),point(3,0),
+              point(5,0),point(5,2),point(3,2),point(3,1.2),point(2,1.2),
+              point(2,2),point(0,2),point(0,0)]
+        r = offsetXY(db,-0.3)
+        assert len(r) == 2
+        checkdistance(db,r,-0.3)
+
+    def test_arcs(self):
+        c = arc(point(1,1),2.0)
+        r = offsetXY([c],1.0)
+        assert len(r) == 1 and iscircle(r[0][0])
+        assert r[0][0][1][0] == pytest.approx(3.0)
+        assert offsetXY([c],-2.5) == []
+        ## a wavy figure with many self-intersections of its raw
+        ## offset
+        ply = []
+        for i in range(200):
+            a = i*pi2/200
+            rr = 4.0+sin(7*a)+0.3*sin(31*a)
+            ply.append(point(rr*cos(a),rr*sin(a)))
+        ply.append(ply[0])
+        for d in (0.4,-0.4):
+            r = offsetXY(ply,d)
+            assert len(r) == 1
+            checkdistance(ply,r,d)
+
+    def test_open_chain(self,monkeypatch):
+        import yapcad.offset as offset
+        ## a comb with two notches, whose grown outline is cut where
+        ## the offsets of each notch's walls cross
+        comb = [point(0,0),point(10,0),point(10,10),point(7,10),
+                point(7,5),point(6,5),point(6,10),point(4,10),
+                point(4,5),point(3,5),point(3,10),point(0,10),point(0,0)]
+        r = offsetXY(comb,1.0)
+        assert len(r) == 1
+        checkdistance(comb,r,1.0)
+        ## wrongly discarding the run between the notches leaves a
+        ## chain that can't be closed
+        dist0 = offset._xydist
+        monkeypatch.setattr(offset,'_xydist',
+                            lambda e,x,y: 0.0 if 4.0 < x < 6.0 and y > 10.0
+                            else dist0(e,x,y))
+        with pytest.raises(ValueError):
+            offsetXY(comb,1.0)
@@ -0,0 +1,327 @@
+import pytest
+from yapcad.geom import *
+from yapcad.poly import *
+from yapcad.combine import *
+## unit tests for yapCAD poly.py and combine.py
+
+class TestPolyline:
+    def test_append(self):
+        a = Polyline()
+        for i in range(30):
+            a.addPoint(point(i,(i*7) % 5))
+            ## queries between appends don't pile up segments
+            assert len(a.geom(copy=False)) == i
+            if i == 10:
+                a.sample(0.5)
+        assert a.getLength() == pytest.approx(
+            sum(dist(point(i,(i*7) % 5),point(i+1,((i+1)*7) % 5))
+                for i in range(29)))
+        a.setPoint(30,point(0,0))
+        a.setPoint(3,point(3,9))
+        for b in (a,Polyline(a)):
+            assert len(b.geom()) == 30
+        b = Polyline()
+        b._elem = deepcopy(a._elem)
+        assert a.geom() == b.geom()
+        assert a._lengths == b._lengths
+        assert a.getCenter() == b.getCenter()
+        assert a._bbox == b._bbox
+        for u in (0.0,0.25,0.6,1.0):
+            assert a.sample(u) == b.sample(u)
+        ## closing the figure makes the path wrap around
+        a.addPoint(point(0,0))
+        assert a._prepared().closed
+
+class TestPolygon:
+    def test_geom_view(self):
+        a = makeRoundRect(4,4,0.5)
+        g = a.geom()
+        assert g is not a.geom()
+        v = a.geom(copy=False)
+        assert v is a.geom(copy=False)
+        assert g == v
+        assert a.isinside(point(0,0))
+        assert not a.isinside(point(5,0))
+        pnts = [point(0,0),point(5,0),point(1.9,1.9),point(1.7,1.7)]
+        assert list(a.isinside_many(pnts)) == [a.isinside(p) for p in pnts]
+        # a view does not outlive an update
+        a.grow(1.0)
+        assert a.geom(copy=False) is not v
+
+    def test_sample_many(self):
+        a = makeRoundRect(4,4,0.5)
+        us = [0.0,0.25,0.6,1.3]
+        pa = a.sample_many(us)
+        for u,p in zip(us,pa):
+            assert vclose(p,a.sample(u))
+        r = unsample_many(a,pa)
+        assert close(r[1],0.25) and close(r[3],0.3)
+
+    def test_grow(self):
+        a = makeRoundRect(4,4,0.5)
+        a.grow(1.0)
+        assert vclose(a.bbox()[0],point(-3,-3))
+        assert vclose(a.bbox()[1],point(3,3))
+        assert a.isinside(point(2.5,2.5))
+        assert not a.isinside(point(2.95,2.95))
+        ## shrinking past the corner radius leaves sharp corners
+        a.shrink(1.5)
+        assert len(a.geom()) == 4
+        assert vclose(a.bbox()[1],point(1.5,1.5))
+        c = makeCircle(point(0,0),2)
+        c.shrink(3)
+        assert c.geom() == []
+
+    def test_incremental(self):
+        ## a ring of points and circles, edited one element at a time
+        n = 24
+        elems = []
+        for i in range(n):
+            r = 10.0 if i % 2 else 11.0
+            p = point(r*cos(pi2*i/n),r*sin(pi2*i/n))
+            elems.append(arc(p,0.4) if i % 3 == 1 else p)
+        a = Polygon(elems)
+        a.geom()
+        def check():
+            b = Polygon()
+            b._elem = deepcopy(a._elem)
+            assert a.geom() == b.geom()
+            assert a._lengths == b._lengths
+            assert a.getLength() == b.getLength()
+            assert vclose(a.bbox()[0],b.bbox()[0])
+            assert vclose(a.bbox()[1],b.bbox()[1])
+            assert vclose(a.getCenter(),b.getCenter())
+        a.setPoint(6,point(5,9))
+        ## only the pieces next to the edited element are rebuilt
+        kept = [ pc for j,pc in enumerate(a._pieces) if j not in (5,6,7) ]
+        assert a._pieces[6] is None
+        check()
+        assert all(x is y for x,y in
+                   zip(kept,[ pc for j,pc in enumerate(a._pieces)
+                              if j not in (5,6,7) ]))
+        a.remove(a._elem[12])
+        check()
+        a.addPoint(point(12,-1))
+        check()
+        a.setPoint(0,point(12,0))
+        check()
+        assert a.sample(0.5) == PreparedPath(a.geom()).sample(0.5)
+
+class TestBoolean:
+    def test_grow(self):
+        a = makeRect(4,4)
+        b = makeRect(2,2,point(2,2))
+        d = Boolean('difference',[a,b])
+        d.shrink(0.25)
+        assert d.isinside(point(0,0))
+        assert not d.isinside(point(0.9,0.9))
+        assert not d.isinside(point(-1.9,0))
+        d.grow(0.5)
+        assert d.isinside(point(-2.1,0))
+        u = Boolean('union',[a,b])
+        u.grow(1.0)
+        bb = u.scale(2.0,poly=True).bbox()
+        assert vclose(bb[0],point(-6,-6)) and vclose(bb[1],point(8,8))
+
+    def test_nary(self):
+        ## a and b only overlap through c
+        a = makeCircle(point(0,0),1)
+        b = makeCircle(point(3,0),1)
+        c = makeCircle(point(1.5,0),1)
+        u = Boolean('union',[a,b,c])
+        for x in (-0.9,0.75,1.5,2.25,3.9):
+            assert u.isinside(point(x,0))
+        assert not u.isinside(point(0.75,0.9))
+        ## disjoint operands are gathered without being combined
+        d = Boolean('union',[a,makeCircle(point(5,0),1),
+                             makeCircle(point(10,0),1)])
+        assert len(d.geom()) == 3
+        ## a plate with two edge notches, one hole made of two
+        ## overlapping circles, and a circle that misses it
+        r = makeRect(10,4)
+        e = Boolean('difference',[r,makeRect(1,2,point(-3,2)),
+                                  makeRect(1,2,point(3,2)),
+                                  makeCircle(point(0,0),0.5),
+                                  makeCircle(point(0,0.3),0.5),
+                                  makeCircle(point(20,0),1)])
+        for p in (point(-3,1.5),point(3,1.5),point(0,0),point(0,0.7)):
+            assert not e.isinside(p)
+        for p in (point(-3,0.5),point(3,0.5),point(0,-0.6),point(4,1.5)):
+            assert e.isinside(p)
+        i = Boolean('intersection',[makeRect(4,4),makeRect(4,4,point(1,1)),
+                                    makeCircle(point(1,1),1.5)])
+        assert i.isinside(point(1,1))
+        assert not i.isinside(point(2.1,1))
+        assert not i.isinside(point(-0.4,-0.4))
+        assert Boolean('intersection',[a,b,c]).geom() == []
+        assert Boolean('union',[]).geom() == []
+
+    def test_ring(self):
+        ## six circles whose union closes a ring around a hole, then
+        ## Booleans with the ring as an operand of several loops
+        cs = [ makeCircle(point(3*cos(i*pi2/6),3*sin(i*pi2/6)),1.8)
+               for i in range(6) ]
+        ring = Boolean('union',cs)
+        reg = Region(ring.geom())
+        assert len(reg) == 2 and len(reg.outers()) == 1
+        assert 'unpaired segments' in [ d['kind'] for d in ring.diagnostics ]
+        c = makeCircle(point(3,0),1.0)
+        d = Boolean('difference',[ring,c])
+        dreg = Region(d.geom())
+        assert 'several loops' in [ x['kind'] for x in d.diagnostics ]
+        rng = np.random.default_rng(4)
+        for p in rng.uniform(-5.5,5.5,(3000,2)):
+            p = point(p[0],p[1])
+            inring = any(q.isinside(p) for q in cs)
+            assert reg.isinside(p) == inring
+            assert dreg.isinside(p) == \
+                (inring and not c.isinside(p))
+
+    def test_diagnostics(self,capsys):
+        u = Boolean('union',[makeCircle(point(0,0),2),
+                             makeCircle(point(2,0),2)])
+        u.geom()
+        assert u.diagnostics == []
+        ## a cross, with four intersections
+        c = Boolean('union',[makeRoundRect(6,2,0.5),makeRoundRect(2,6,0.5)])
+        c.geom()
+        assert c.isinside(point(0,2.5)) and c.isinside(point(2.5,0))
+        assert not c.isinside(point(2,2))
+        kinds = set(d['kind'] for d in c.diagnostics)
+        assert kinds == set(['between'])
+        assert len(c.diagnostics) == 4
+        assert capsys.readouterr().out == ''
+        c.grow(0.1)
+        c.geom()
+        assert len(c.diagnostics) == 4
+
+    def test_cache(self):
+        clearBooleanCache()
+        def make():
+            return Boolean('difference',[makeRoundRect(4,4,0.5),
+                                         makeCircle(point(2,0),1)])
+        a = make()
+        b = make()
+        assert a.geom(copy=False) is b.geom(copy=False)
+        g = b.geom()
+        g.pop()
+        assert a.geom() == b.geom() and len(g) < len(a.geom())
+        b.grow(0.1)
+        assert b.geom(copy=False) is not a.geom(copy=False)
+        clearBooleanCache()
+        assert make().geom(copy=False) is not a.geom(copy=False)
+        ## transformed copies take over the transformed outline
+        for t in (a.translate(point(1,2),poly=True),
+                  a.rotate(30,poly=True),
+                  a.scale(2.0,poly=True)):
+            assert not t._update
+            bb = t.bbox()
+            l = t.getLength()
+            clearBooleanCache()
+            t._update = True
+            assert close(t.getLength(),l)
+            assert vclose(t.bbox()[0],bb[0]) and vclose(t.bbox()[1],bb[1])
+        m = a.mirror('yz',poly=True)
+        assert m._update
+
+    def test_clip(self):
+        ## line-only operands go to the clipper, which supports xor
+        a = makeRect(4,4)
+        b = makeRect(4,4,point(2,2))
+        x = Boolean('xor',[a,b])
+        assert x.isinside(point(-1,-1)) and x.isinside(point(3,3))
+        assert not x.isinside(point(1,1))
+        assert Boolean('difference',[a,b]).getLength() == pytest.approx(16.0)
+        ## operands with arcs are flattened with a chord tolerance
+        c = makeCircle(point(2,0),1)
+        f = Boolean('difference',[a,c],flatten=1e-3)
+        assert all(isline(e) for e in f.geom())
+        assert f.getLength() == pytest.approx(
+            Boolean('difference',[a,c]).getLength(),rel=1e-3)
+        ## or combined loop by loop for xor
+        x = Boolean('xor',[a,c])
+        r = Region(x.geom())
+        assert len(r) == 2
+        assert any(isarc(e) for e in r.geom())
+        assert r.area() == pytest.approx(16.0,rel=1e-4)
+        assert x.getLength() == pytest.approx(
+            Boolean('xor',[a,c],flatten=1e-3).getLength(),rel=1e-3)
+        for p in (point(1.5,0),point(2.5,0),point(0,0),point(3.5,0)):
+            assert x.isinside(p) == (a.isinside(p) != c.isinside(p))
+
+    def test_lazy(self):
+        a = makeCircle(point(0,0),2)
+        b = makeCircle(point(3,0),2)
+        c = makeRect(2,2,point(1.5,0))
+        pnts = [ point(x*0.5-2.49,y*0.5-2.47) for x in range(14)
+                 for y in range(11) ]
+        for tpe in Boolean.types:
+            for ops in ([a,b],[a,b,c]):
+                x = Boolean(tpe,ops)
+                lazy = [ x.isinside(p) for p in pnts ]
+                many = list(x.isinside_many(pnts))
+                assert x._update
+                y = Boolean(tpe,ops)
+                y.geom()
+                assert lazy == many == [ y.isinside(p) for p in pnts ]
+        ## nested Booleans are queried lazily as well
+        u = Boolean('union',[a,b])
+        d = Boolean('difference',[u,c])
+        assert not d.isinside(point(1.5,0)) and d.isinside(point(-1.5,0))
+        bb = u.bbox()
+        assert vclose(bb[0],point(-2,-2)) and vclose(bb[1],point(5,2))
+        assert u._update and d._update
+        f = Boolean('difference',[u,makeCircle(point(20,0),1)])
+        assert not f.isempty()
+        assert u._update and f._update
+        assert not d.isempty()
+        assert Boolean('intersection',[a,makeCircle(point(10,0),1)]).isempty()
+        e = Boolean('difference',[makeRect(1,1,point(0.5,0)),a])
+        assert e.isempty() and not e._update
+
+    def test_geom_view(self):
+        a = makeCircle(point(0,0),2)
+        b = makeCircle(point(2,0),2)
+        u = Boolean('union',[a,b])
+        v = u.geom(copy=False)
+        assert v is u.geom(copy=False)
+        assert u.geom() == v and u.geom() is not v
+        assert u.isinside(point(3,0))
+        assert not u.isinside(point(5,0))
+
+class TestPreparedPolygon:
+    def test_isinside(self):
+        a = makeRoundRect(4,4,0.5)
+        b = Boolean('difference',[makeRoundRect(4,4,0.5),
+                                  makeCircle(point(0,0),1)])
+        ply = [point(0,0),point(3,0),point(3,3),point(1,1),point(0,3),
+               point(0,0)]
+        pnts = [ point(x*0.37-2.6,y*0.41-2.3) for x in range(15)
+                 for y in range(13) ]
+        for fig,test in ((a,a.isinside),(b,b.isinside),
+                         (ply,lambda p: isinsideXY(ply,p))):
+            pp = PreparedPolygon(fig)
+            assert [pp.isinside(p) for p in pnts] == [test(p) for p in pnts]
+        ## a point on the axis of a union of circles, where the outline
+        ## has small gaps between its elements
+        u = Boolean('union',[makeCircle(point(0,0),2),makeCircle(point(2,0),2)])
+        assert PreparedPolygon(u).isinside(point(3.5,0))
+
+    def test_update(self):
+        a = makeRoundRect(4,4,0.5)
+        pp = PreparedPolygon(a)
+        assert not pp.isinside(point(2.5,0))
+        a.grow(1.0)
+        assert pp.isinside(point(2.5,0))
+        ## appending to a Polyline extends its outline in place
+        c = Polyline([point(0,0),point(1,0),point(2,0)])
+        pp = PreparedPolygon(c)
+        assert not pp.isinside(point(3,3))
+        for p in (point(5,0),point(5,5),point(0,5),point(0,0)):
+            c.addPoint(p)
+        assert pp.isinside(point(3,3))
+        with pytest.raises(ValueError):
+            PreparedPolygon(point(0,0))
+        ## open polys aren't regions
+        with pytest.raises(ValueError):
+            PreparedPolygon([point(0,0),point(4,0),point(4,4),point(0,4)])
@@ -0,0 +1,32 @@
+import pytest
+from fractions import Fraction
+import numpy as np
+from yapcad.predicates import *
+## unit tests for yapCAD predicates.py
+
+def _exactorient(a,b,c):
+    a,b,c = [list(map(Fraction,p)) for p in (a,b,c)]
+    return (a[0]-c[0])*(b[1]-c[1]) - (a[1]-c[1])*(b[0]-c[0])
+
+def _sign(x):
+    return int(x > 0) - int(x < 0)
+
+class TestOrient:
+    def test_simple(self):
+        assert orient2d((0,0),(1,0),(0,1)) > 0
+        assert orient2d((0,0),(0,1),(1,0)) < 0
+        assert orient2d((0,0),(1,1),(2,2)) == 0
+
+    def test_nearly_collinear(self):
+        ## points a few ulps from the line through b and c, where the
+        ## plain floating-point determinant gets the sign wrong
+        b = (12.0,12.0)
+        c = (24.0,24.0)
+        pnts = [(0.5+i*2.0**-53,0.5+j*2.0**-53)
+                for i in range(32) for j in range(32)]
+        for p in pnts:
+            assert _sign(orient2d(p,b,c)) == _sign(_exactorient(p,b,c))
+        P = np.array(pnts)
+        r = orient2d_many(P[:,0],P[:,1],b[0],b[1],c[0],c[1])
+        assert [_sign(x) for x in r] == \
+            [_sign(_exactorient(p,b,c)) for p in pnts]
@@ -0,0 +1,64 @@
+import pytest
+from math import *
+from yapcad.geom import *
+from yapcad.poly import *
+from yapcad.combine import *
+from yapcad.region import *
+## unit tests for yapCAD region.py
+
+def square(w,c=point(0,0)):
+    return [point(c[0]-w/2,c[1]-w/2),point(c[0]+w/2,c[1]-w/2),
+            point(c[0]+w/2,c[1]+w/2),point(c[0]-w/2,c[1]+w/2),
+            point(c[0]-w/2,c[1]-w/2)]
+
+class TestRegion:
+    def test_nesting(self):
+        ## a square with a square hole holding a round island, and a
+        ## separate square off to the side
+        x = [ square(10), square(6), [point(0,0),[1,0,360,-1]],
+              square(2,point(20,0)) ]
+        r = Region(x)
+        assert len(r) == 4
+        assert r.parent == [-1,0,1,-1]
+        assert r.depth == [0,1,2,0]
+        assert r.outers() == [0,2,3]
+        assert r.holes(0) == [1]
+        assert r.faces() == [[0,1],[2],[3]]
+        assert r.area() == pytest.approx(100-36+pi+4)
+        ## outer loops run counterclockwise, holes clockwise
+        assert r.loopArea(0) == pytest.approx(100)
+        assert r.loopArea(1) == pytest.approx(-36)
+        assert r.loopArea(2) == pytest.approx(pi)
+        pnts = [point(0,0),point(2,0),point(4,0),point(6,0),point(20,0)]
+        expect = [True,False,True,False,True]
+        assert [ r.isinside(p) for p in pnts ] == expect
+        assert list(r.isinside_many(pnts)) == expect
+        assert Region([]).isempty()
+        assert not Region([]).isinside(point(0,0))
+
+    def test_boolean(self):
+        ## a plate with a ring of holes, from an N-ary difference
+        plate = makeRoundRect(20,20,2)
+        holes = [ makeCircle(point(6*cos(i*pi/4),6*sin(i*pi/4)),1)
+                  for i in range(8) ]
+        b = Boolean('difference',[plate]+holes)
+        r = b.region()
+        assert len(r.outers()) == 1
+        o = r.outers()[0]
+        assert len(r.holes(o)) == 8
+        assert r.area() == pytest.approx(Region(plate).area()-8*pi,rel=1e-5)
+        assert not r.isinside(point(6,0))
+        assert r.isinside(point(0,0))
+
+    def test_washer(self):
+        ## the difference of two nested circles, which don't intersect
+        outer = Polygon([arc(point(0,0),2)])
+        inner = Polygon([arc(point(0.1,0.1),0.5)])
+        r = Boolean('difference',[outer,inner]).region()
+        assert len(r) == 2 and len(r.outers()) == 1
+        assert r.holes(r.outers()[0]) == [1-r.outers()[0]]
+        assert r.area() == pytest.approx(pi*(4-0.25))
+        assert Boolean('union',[outer,inner]).region().area() == \
+            pytest.approx(4*pi)
+        assert Boolean('intersection',[outer,inner]).region().area() == \
+            pytest.approx(0.25*pi)
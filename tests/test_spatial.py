@@ -0,0 +1,51 @@
+import pytest
+import random
+from yapcad.geom import *
+from yapcad.spatial import *
+## unit tests for yapCAD spatial.py
+
+class TestBoxIndex:
+    def test_query(self):
+        random.seed(3)
+        boxes = []
+        for i in range(500):
+            x = random.uniform(-100,100)
+            y = random.uniform(-100,100)
+            w = random.uniform(0,5) if i % 50 else random.uniform(50,150)
+            h = random.uniform(0,5)
+            boxes.append([x,y,x+w,y+h])
+        idx = BoxIndex(boxes)
+        assert len(idx) == 500
+        for q in ([0,0,10,10],[-200,-200,200,200],[90,90,91,91],
+                  [300,300,400,400],[-20,5,60,5]):
+            ref = [i for i,b in enumerate(boxes)
+                   if b[0] <= q[2] and b[2] >= q[0] and
+                   b[1] <= q[3] and b[3] >= q[1]]
+            assert idx.query(q) == ref
+
+    def test_empty(self):
+        idx = BoxIndex([])
+        assert len(idx) == 0
+        assert idx.query([0,0,1,1]) == []
+
+    def test_intersect(self):
+        ## pruned intersections match a walk over every segment pair
+        a = [point(cos(i*pi2/200)*10,sin(i*pi2/200)*10) for i in range(200)]
+        a.append(a[0])
+        b = [point(x[0]+3,x[1]) for x in a]
+        la = [line(a[i-1],a[i]) for i in range(1,len(a))]
+        lb = [line(b[i-1],b[i]) for i in range(1,len(b))]
+        ref = []
+        for l1 in la:
+            for l2 in lb:
+                p = intersectXY(l1,l2)
+                if p:
+                    ref += p
+        for r in (intersectXY(a,b),intersectXY(la,lb)):
+            assert len(r) == len(ref) == 2
+            for p in r:
+                assert min(dist(p,q) for q in ref) < epsilon
+        r = intersectXY(a,b,params=True)
+        for u1,u2 in zip(r[0],r[1]):
+            assert vclose(sample(a,u1),sample(b,u2))
+        assert preparedpath(la).index().query([-1,-1,1,1]) == []